@@ -0,0 +1,326 @@
+# src/bench/__main__.py
+"""
+Benchmark de extremo a extremo, sin clave ni red: pasa por ChatbotLogic.process_message las
+preguntas de data/training_data.json y de data/faqs.json, tres paráfrasis de cada una (sin tildes
+ni signos, con una muletilla al principio y con un error de tipeo) y preguntas fuera de los datos
+locales, con GeminiAPI sobre el backend local "fake" (src/utils/llm_backend.py), de modo que la
+caché, las sesiones, los plazos y la agrupación de preguntas idénticas son los reales. El backend
+toma su latencia y sus errores de las variables FAKE_LLM_* del .env (--latencia-ms y --errores
+los reemplazan) y la configuración que se informa es la del modelo creado. Informa el
+rendimiento, los percentiles de latencia (en total, de las respuestas locales y de las de Gemini),
+la fracción respondida localmente y la memoria máxima del proceso, y los compara con dos líneas
+base; termina con código 1 si alguna métrica empeoró más de lo tolerado:
+- src/bench/baseline.json (en el repositorio): solo lo que no depende de la máquina, es decir, las
+  fracciones de respuestas locales y de la caché y las llamadas a Gemini y errores por consulta;
+- .bench/baseline-<máquina>.json (fuera del repositorio): los tiempos y la memoria, que solo se
+  comparan en la misma máquina; se crea en la primera ejecución.
+La reproducción se repite con un cliente de Gemini nuevo (caché vacía) y se toma el
+mejor valor de cada métrica; por omisión usa un solo hilo, porque con varios la latencia de las
+respuestas locales depende de cómo se repartan el GIL y varía demasiado entre ejecuciones.
+
+Uso: python -m src.bench [--hilos 1] [--rondas 10] [--repeticiones 3] [--latencia-ms 300] [--guardar-base]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bench.bench_normalization import LABELLED_QUERIES
+from src.core.chatbot_logic import ChatbotLogic
+from src.core.data_manager import DataManager
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.response_cache import ResponseCache
+from src.utils.text_normalizer import tokenize
+from src.utils.tracing import LOCAL_SOURCES, Tracer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Líneas base de los tiempos, una por máquina (ignoradas por git)
+MACHINE_BASELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                    ".bench")
+# Métricas que no dependen de la máquina; son las únicas de src/bench/baseline.json
+PORTABLE_METRICS = ("local_ratio", "cache_ratio", "gemini_calls_per_query", "errors_per_query")
+# Muletillas con las que se reformulan las preguntas
+OPENERS = ("oye, ", "disculpa, ", "una pregunta: ", "quisiera saber ")
+# Diferencias de latencia por debajo de este valor (ms) no cuentan como regresión aunque superen la tolerancia
+LATENCY_SLACK_MS = 0.1
+# Puntos (0..1) que puede bajar la fracción de respuestas locales
+LOCAL_RATIO_SLACK = 0.005
+# Métricas en las que más es mejor (en el resto, menos)
+HIGHER_IS_BETTER = ("throughput_rps", "local_ratio", "cache_ratio")
+
+
+def _with_typo(text: str, rng: random.Random) -> str:
+    """Intercambia dos letras contiguas en el interior de una de las palabras largas."""
+    words = text.split()
+    candidates = [i for i, word in enumerate(words) if len(word) >= 6 and word.isalpha()]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    word = words[i]
+    j = rng.randrange(1, len(word) - 2)
+    words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+
+def paraphrases(question: str, rng: random.Random) -> list[str]:
+    plain = " ".join(tokenize(question))
+    body = question.strip("¿?¡!. ")
+    return [plain, f"{rng.choice(OPENERS)}{body[:1].lower()}{body[1:]}", _with_typo(plain, rng)]
+
+
+def workload(data_manager: DataManager, seed: int = 0) -> list[str]:
+    """Preguntas del entrenamiento y de las FAQs con sus paráfrasis, más preguntas fuera de los datos locales."""
+    rng = random.Random(seed)
+    originals = [example["prompt"] for example in data_manager.training_data]
+    originals += [faq["pregunta"] for faq in data_manager.faqs_data.get("preguntas_frecuentes", [])]
+    questions = []
+    for question in originals:
+        questions.append(question)
+        questions.extend(paraphrases(question, rng))
+    questions.extend(question for question, expected in LABELLED_QUERIES if not expected)
+    return questions
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def peak_rss_mb() -> float | None:
+    """Memoria residente máxima del proceso, en MB (None si el sistema no la informa)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la da en KB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def backend_options(args) -> dict:
+    """Los valores de FAKE_LLM_* que se reemplazan desde la línea de comandos."""
+    options = {}
+    if args.latency_ms is not None:
+        options["latency_seconds"] = args.latency_ms / 1000
+    if args.error_rate is not None:
+        options["error_rate"] = args.error_rate
+    return options
+
+
+def model_settings(model) -> dict:
+    """Configuración efectiva del backend "fake" (FAKE_LLM_* más lo indicado en la línea de comandos)."""
+    return {"latency_ms": model.latency_seconds * 1000, "latency_distribution": model.latency_distribution,
+            "latency_spread": model.latency_spread, "chunk_rate": model.chunk_rate, "error_rate": model.error_rate}
+
+
+def replay(data_manager: DataManager, questions: list[str], args) -> tuple[dict, dict]:
+    """Una reproducción completa con un cliente de Gemini nuevo; devuelve sus métricas y la configuración del modelo."""
+    gemini_api = GeminiAPI(None, backend=FAKE, response_cache=ResponseCache(max_entries=1024),
+                           backend_options=backend_options(args))
+    model = gemini_api.model
+    chatbot = ChatbotLogic(data_manager=data_manager, gemini_api=gemini_api)
+    scratch = Tracer()
+    rng = random.Random(1)
+    jobs = []
+    for round_number in range(args.rounds):
+        order = list(enumerate(questions))
+        rng.shuffle(order)
+        jobs.extend((f"bench-{round_number}-{i}", question) for i, question in order)
+
+    results = []
+    lock = threading.Lock()
+
+    def ask(job: tuple[str, str]):
+        session_id, question = job
+        trace = scratch.start_trace("chat", session_id=session_id)
+        start = time.perf_counter()
+        chatbot.process_message(question, session_id=session_id, trace=trace)
+        elapsed = time.perf_counter() - start
+        trace.finish()
+        with lock:
+            results.append((trace.source, elapsed))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(ask, jobs))
+    wall = time.perf_counter() - start
+
+    def kind(source: str) -> str:
+        if source in LOCAL_SOURCES:
+            return "local"
+        return {"gemini": "gemini", "cache": "cache"}.get(source, "error")
+
+    answers = Counter(kind(source) for source, _elapsed in results)
+    latencies = [elapsed * 1000 for _source, elapsed in results]
+    local = [elapsed * 1000 for source, elapsed in results if kind(source) == "local"]
+    remote = [elapsed * 1000 for source, elapsed in results if kind(source) == "gemini"]
+    return {
+        "throughput_rps": len(results) / wall,
+        "latency_p50_ms": percentile(latencies, 0.5),
+        "latency_p90_ms": percentile(latencies, 0.9),
+        "latency_p95_ms": percentile(latencies, 0.95),
+        "local_p50_ms": percentile(local, 0.5),
+        "local_p99_ms": percentile(local, 0.99),
+        "gemini_p50_ms": percentile(remote, 0.5),
+        "gemini_p99_ms": percentile(remote, 0.99),
+        "local_ratio": answers["local"] / len(results),
+        "cache_ratio": answers["cache"] / len(results),
+        "gemini_calls_per_query": model.calls / len(results),
+        "errors_per_query": answers["error"] / len(results),
+    }, model_settings(model)
+
+
+def run(args) -> dict:
+    """Repite la reproducción y se queda con el mejor valor de cada métrica."""
+    data_manager = DataManager()
+    questions = workload(data_manager)
+    runs, settings = zip(*(replay(data_manager, questions, args) for _ in range(args.repeats)))
+    metrics = {name: (max if name in HIGHER_IS_BETTER else min)(each[name] for each in runs) for name in runs[0]}
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return {
+        "config": {"questions": len(questions), "rounds": args.rounds, "repeats": args.repeats,
+                   "threads": args.threads, "model": settings[0]},
+        "metrics": metrics,
+    }
+
+
+def machine() -> dict:
+    """Lo que identifica la máquina y el intérprete con que se midieron los tiempos."""
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count(), "host": platform.node()}
+
+
+def machine_baseline_path() -> str:
+    key = hashlib.sha1(json.dumps(machine(), sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(MACHINE_BASELINE_DIR, f"baseline-{key}.json")
+
+
+def save_baseline(path: str, baseline: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def load_baseline(path: str, config: dict, label: str) -> dict | None:
+    """Métricas de la línea base, o None si no existe o se midió con otra configuración."""
+    if not os.path.exists(path):
+        print(f"\nNo hay línea base {label} en {path}; créala con --guardar-base.")
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"\nLa línea base {label} se midió con otra configuración ({baseline.get('config')}); no se compara.")
+        return None
+    return baseline["metrics"]
+
+
+def regression(name: str, base: float, current: float, tolerance: float) -> bool:
+    """Indica si la métrica empeoró más de lo tolerado respecto de la línea base."""
+    if name == "local_ratio":
+        return current < base - LOCAL_RATIO_SLACK
+    if name in HIGHER_IS_BETTER:
+        return current < base * (1 - tolerance)
+    if name.endswith("_ms"):
+        return current > base * (1 + tolerance) and current - base > LATENCY_SLACK_MS
+    return current > base * (1 + tolerance) and current > base
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Imprime la comparación con la línea base y devuelve las métricas que empeoraron."""
+    regressions = []
+    print(f"\n{'métrica':>22} {'base':>10} {'actual':>10} {'cambio':>8}")
+    for name, current in metrics.items():
+        base = baseline.get(name)
+        if base is None or current is None:
+            print(f"{name:>22} {'-':>10} {current if current is not None else '-':>10}")
+            continue
+        change = f"{(current - base) / base:+.0%}" if base else ""
+        worse = regression(name, base, current, tolerance)
+        if worse:
+            regressions.append(name)
+        print(f"{name:>22} {base:>10.3f} {current:>10.3f} {change:>8}{'  REGRESIÓN' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo con un sustituto local de Gemini.")
+    parser.add_argument("--hilos", type=int, default=1, dest="threads")
+    parser.add_argument("--rondas", type=int, default=10, dest="rounds",
+                        help="Veces que se pregunta el conjunto de preguntas en cada reproducción (desde la "
+                             "segunda, las de Gemini salen de la caché).")
+    parser.add_argument("--repeticiones", type=int, default=3, dest="repeats",
+                        help="Reproducciones completas; se toma el mejor valor de cada métrica.")
+    parser.add_argument("--latencia-ms", type=float, default=None, dest="latency_ms",
+                        help="Latencia mediana del sustituto de Gemini (por omisión, FAKE_LLM_LATENCY_MS).")
+    parser.add_argument("--errores", type=float, default=None, dest="error_rate",
+                        help="Fracción de las llamadas al sustituto de Gemini que fallan (por omisión, "
+                             "FAKE_LLM_ERROR_RATE).")
+    parser.add_argument("--tolerancia", type=float, default=0.25, dest="tolerance",
+                        help="Empeoramiento relativo admitido antes de informar una regresión.")
+    parser.add_argument("--base", default=BASELINE_PATH, dest="baseline_path",
+                        help="Línea base de las métricas que no dependen de la máquina.")
+    parser.add_argument("--base-local", default=None, dest="machine_baseline_path",
+                        help="Línea base de los tiempos y la memoria (por omisión, una por máquina en .bench/).")
+    parser.add_argument("--guardar-base", action="store_true", dest="save_baseline",
+                        help="Guardar esta ejecución como las nuevas líneas base.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    result = run(args)
+    config, metrics = result["config"], result["metrics"]
+    model = config["model"]
+    n = config["questions"] * config["rounds"]
+    print(f"{n} consultas ({config['questions']} preguntas x {config['rounds']} rondas) con {config['threads']} "
+          f"hilo(s), mejor de {config['repeats']} reproducciones; Gemini simulado con {model['latency_ms']:.0f} ms "
+          f"de latencia ({model['latency_distribution']}) y {model['error_rate']:.0%} de errores")
+    print(f"Rendimiento: {metrics['throughput_rps']:.1f} consultas/s; latencia p50 {metrics['latency_p50_ms']:.2f} ms, "
+          f"p90 {metrics['latency_p90_ms']:.2f} ms, p95 {metrics['latency_p95_ms']:.2f} ms")
+    print(f"Locales: {metrics['local_ratio']:.1%} (p50 {metrics['local_p50_ms']:.2f} ms, "
+          f"p99 {metrics['local_p99_ms']:.2f} ms); de la caché: {metrics['cache_ratio']:.1%}; "
+          f"llamadas a Gemini: {metrics['gemini_calls_per_query'] * n:.0f} (p50 {metrics['gemini_p50_ms']:.1f} ms, "
+          f"p99 {metrics['gemini_p99_ms']:.1f} ms); errores: {metrics['errors_per_query'] * n:.0f}")
+    if metrics["peak_rss_mb"] is not None:
+        print(f"Memoria máxima del proceso: {metrics['peak_rss_mb']:.1f} MB")
+
+    portable = {name: metrics[name] for name in PORTABLE_METRICS}
+    timings = {name: value for name, value in metrics.items() if name not in PORTABLE_METRICS}
+    machine_path = args.machine_baseline_path or machine_baseline_path()
+    machine_result = {"config": config, "environment": machine(), "metrics": timings}
+    if args.save_baseline:
+        save_baseline(args.baseline_path, {"config": config, "metrics": portable})
+        save_baseline(machine_path, machine_result)
+        print(f"\nLíneas base guardadas en {args.baseline_path} y {machine_path}")
+        return
+
+    regressions = []
+    baseline = load_baseline(args.baseline_path, config, "del repositorio")
+    if baseline is not None:
+        regressions += compare(portable, baseline, args.tolerance)
+    if not os.path.exists(machine_path):
+        save_baseline(machine_path, machine_result)
+        print(f"\nPrimera ejecución en esta máquina: tiempos guardados como línea base en {machine_path}.")
+    else:
+        baseline = load_baseline(machine_path, config, "de esta máquina")
+        if baseline is not None:
+            regressions += compare(timings, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegresiones (tolerancia {args.tolerance:.0%}): {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\nSin regresiones (tolerancia {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
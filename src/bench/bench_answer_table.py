@@ -0,0 +1,50 @@
+# src/bench/bench_answer_table.py
+"""
+Costo por consulta de las respuestas de carreras: renderizarlas en cada consulta
+(normalizando plan_estudios y armando el texto, como se hacía antes) frente a
+leerlas de la tabla precompilada de DataManager.
+
+Uso: python -m src.bench.bench_answer_table [--repeticiones 20000]
+"""
+import argparse
+import logging
+import time
+
+from src.core.answer_table import CAREER_TOPICS, compile_answers, render_career_answer
+from src.core.data_manager import DataManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Respuestas renderizadas frente a precompiladas.")
+    parser.add_argument("--repeticiones", type=int, default=20000, dest="repetitions")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    data_manager = DataManager()
+    start = time.perf_counter()
+    compile_answers(data_manager.carreras_data)
+    compile_time = time.perf_counter() - start
+    print(f"Compilación: {len(data_manager.career_answers)} respuestas en {compile_time * 1000:.2f} ms")
+
+    print(f"{'tema':>22} {'antes (µs)':>11} {'ahora (µs)':>11} {'aceleración':>11}")
+    for topic in CAREER_TOPICS:
+        queries = [(keyword, info) for keyword, info in data_manager.carreras_data.items()]
+        total = args.repetitions * len(queries)
+
+        start = time.perf_counter()
+        for _ in range(args.repetitions):
+            for keyword, info in queries:
+                render_career_answer(keyword, info, topic)
+        before = (time.perf_counter() - start) / total
+
+        start = time.perf_counter()
+        for _ in range(args.repetitions):
+            for keyword, _info in queries:
+                data_manager.get_career_answer(keyword, topic)
+        after = (time.perf_counter() - start) / total
+
+        print(f"{topic or 'resumen':>22} {before * 1e6:>11.2f} {after * 1e6:>11.2f} {before / after:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# src/bench/bench_chat_view.py
+"""
+Costo de añadir mensajes y de desplazarse por un historial largo.
+1. Modelo: tiempo de ChatHistoryModel.append y de localizar la zona visible con
+   N mensajes (no necesita pantalla).
+2. Ventana: añade N mensajes a VirtualChatView (y, con --legacy, a ScrollableFrame con
+   una ChatBubble por mensaje, como antes) y mide el tiempo de cuadro (operación +
+   update()) al añadir y al desplazarse a posiciones aleatorias. Necesita una pantalla;
+   en un servidor se puede usar Xvfb: xvfb-run -a python -m src.bench.bench_chat_view
+
+Uso: python -m src.bench.bench_chat_view [--mensajes 5000] [--legacy 1000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from src.gui.virtual_chat_view import ChatHistoryModel
+
+SAMPLE_TEXTS = [
+    "¿Cuál es el pensum de Sistemas?",
+    "Ingeniería de Sistemas: forma profesionales capaces de diseñar, desarrollar e implantar "
+    "sistemas de información. Duración: 10 semestres. Puedes preguntar sobre su perfil de egresado, "
+    "plan de estudios o salidas profesionales.",
+    "Gracias",
+    "El plan de estudios de Ingeniería de Sistemas incluye:\nSemestre 1°_semestre: Matemática I, Física I, "
+    "Dibujo\nSemestre 2°_semestre: Matemática II, Física II, Química General\nPara más detalles, consulta "
+    "la sección de la carrera en el portal de la UNEFA.",
+]
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (f"p50 {statistics.median(samples) * 1000:6.2f} ms  p95 {p95 * 1000:6.2f} ms  "
+            f"máx {samples[-1] * 1000:6.2f} ms")
+
+
+def bench_model(n_messages: int):
+    model = ChatHistoryModel(lambda text, is_user: 64 + len(text) // 8)
+    start = time.perf_counter()
+    for i in range(n_messages):
+        model.append(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], i % 2 == 0)
+    append_time = (time.perf_counter() - start) / n_messages
+
+    total = model.total_height
+    start = time.perf_counter()
+    for _ in range(10000):
+        top = random.random() * total
+        model.visible_range(top - 800, top + 1600)
+    range_time = (time.perf_counter() - start) / 10000
+    print(f"Modelo, {n_messages} mensajes: append {append_time * 1e6:.2f} µs, "
+          f"zona visible {range_time * 1e6:.2f} µs")
+
+
+def _frame_times(root, operations) -> list[float]:
+    times = []
+    for operation in operations:
+        start = time.perf_counter()
+        operation()
+        root.update()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_window(title: str, root, append, scroll_to, n_messages: int, checkpoints: list[int]):
+    """Añade n_messages midiendo el tiempo de cuadro por tramos y luego mide el desplazamiento."""
+    print(f"\n{title}")
+    done = 0
+    for checkpoint in sorted({c for c in checkpoints if c < n_messages} | {n_messages}):
+        times = _frame_times(root, [lambda i=i: append(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], i % 2 == 0)
+                                    for i in range(done, checkpoint)])
+        print(f"  añadir mensajes {done + 1:>5}-{checkpoint:<5}: {_percentiles(times[-100:])}")
+        done = checkpoint
+    positions = [random.random() for _ in range(200)]
+    times = _frame_times(root, [lambda p=p: scroll_to(p) for p in positions])
+    print(f"  desplazamiento con {done} mensajes: {_percentiles(times)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de cuadro del historial de chat con muchos mensajes.")
+    parser.add_argument("--mensajes", type=int, default=5000, dest="messages")
+    parser.add_argument("--legacy", type=int, default=0,
+                        help="Mensajes para la vista anterior (ScrollableFrame); 0 la omite.")
+    args = parser.parse_args()
+    random.seed(0)
+
+    bench_model(args.messages)
+    bench_model(args.messages * 10)
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("Sin pantalla (DISPLAY vacío): se omite la medición de la ventana. "
+              "Usa xvfb-run -a python -m src.bench.bench_chat_view")
+        return
+
+    import customtkinter as ctk
+    from src.gui.chat_bubble import ChatBubble
+    from src.gui.scrollable_frame import ScrollableFrame
+    from src.gui.virtual_chat_view import VirtualChatView
+
+    avatars = {True: os.path.join("assets", "images", "user_avatar.png"),
+               False: os.path.join("assets", "images", "bot_avatar.png")}
+    checkpoints = [100, 1000, 2500, 5000, 10000, 20000]
+
+    root = ctk.CTk()
+    root.geometry("900x800")
+    view = VirtualChatView(root, fg_color="#FFFFFF", user_avatar_path=avatars[True], bot_avatar_path=avatars[False])
+    view.pack(fill="both", expand=True)
+    root.update()
+    bench_window("Vista virtualizada (VirtualChatView)", root,
+                 lambda text, is_user: view.append_message(text, is_user, animate=False),
+                 lambda position: view._on_scrollbar("moveto", position), args.messages, checkpoints)
+    print(f"  burbujas creadas: {len(view._window_ids)} para {len(view.model)} mensajes")
+    root.destroy()
+
+    if args.legacy:
+        root = ctk.CTk()
+        root.geometry("900x800")
+        frame = ScrollableFrame(root, fg_color="#FFFFFF")
+        frame.pack(fill="both", expand=True)
+        root.update()
+
+        def legacy_append(text, is_user):
+            bubble = ChatBubble(frame.frame, text, is_user, avatar_path=avatars[is_user], chat_area_bg="#FFFFFF")
+            bubble.pack(fill="x", pady=5, padx=5, anchor="ne" if is_user else "nw")
+            frame.canvas.update_idletasks()
+            frame.canvas.yview_moveto(1.0)
+
+        bench_window("Vista anterior (ScrollableFrame)", root, legacy_append, frame.canvas.yview_moveto,
+                     args.legacy, checkpoints)
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
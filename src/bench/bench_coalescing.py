@@ -0,0 +1,138 @@
+# src/bench/bench_coalescing.py
+"""
+Agrupación de preguntas idénticas simultáneas (src/utils/single_flight.py) frente a un modelo
+local que imita a Gemini (el backend "fake", FaultInjectingModel). Cada ronda lanza N peticiones a la vez desde N
+hilos, cada una en su propia sesión sin historial:
+- misma pregunta, con send_message y con send_message_stream: debe haber una sola llamada al modelo;
+- la misma pregunta escrita de distintas formas ("¿Cuándo son las inscripciones?" y
+  "cuando son las inscripciones"): la clave es la pregunta normalizada;
+- varias preguntas distintas: una llamada por pregunta;
+- error del modelo: una llamada y todas las peticiones reciben los datos locales;
+- llamada colgada: las que esperan se rinden al vencer el plazo de espera.
+Compara con la agrupación desactivada y termina con código 1 si alguna verificación falla.
+
+Uso: python -m src.bench.bench_coalescing [--peticiones 50] [--latencia-ms 200]
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.resilience import CircuitBreaker, ResilientCaller
+from src.utils.response_cache import ResponseCache
+from src.utils.single_flight import SingleFlight
+from src.utils.tracing import Tracer
+
+LOCAL_CONTEXT = "- Las inscripciones se realizan al inicio de cada semestre en la oficina de Control de Estudios."
+QUESTION = "¿Cuándo son las inscripciones del próximo semestre?"
+VARIANTS = [QUESTION, "cuando son las inscripciones del proximo semestre", "¿CUÁNDO son las inscripciones "
+            "del próximo semestre??"]
+DISTINCT = ["¿Cuándo son las inscripciones?", "¿Dónde queda la biblioteca?", "¿Hay transporte estudiantil?",
+            "¿Cuánto dura el curso propedéutico?", "¿Qué horario tiene el comedor?"]
+# Plazo de espera de las peticiones agrupadas en el escenario de la llamada colgada
+HANG_WAIT_SECONDS = 0.3
+# Backend "fake" sin las variables FAKE_LLM_* que cambiarían las cuentas: latencia fija, sin
+# errores salvo en su ronda y la latencia repartida entre los fragmentos
+MODEL_SETTINGS = dict(latency_distribution="fixed", error_rate=0.0, chunk_rate=None, seed=0)
+
+
+def make_api(faults: dict, coalesce: bool, wait_timeout: float | None = 5.0) -> GeminiAPI:
+    # Sin caché (cada ronda empieza de cero) ni reintentos (cada llamada al modelo es un intento)
+    api = GeminiAPI(None, response_cache=ResponseCache(max_entries=1),
+                    caller=ResilientCaller(timeout=None, max_retries=0, hedge_percentile=0,
+                                           breaker=CircuitBreaker(failure_threshold=0)),
+                    single_flight=SingleFlight(wait_timeout=wait_timeout), backend=FAKE,
+                    backend_options={**MODEL_SETTINGS, **faults})
+    if not coalesce:
+        api.single_flight = None
+    return api
+
+
+def burst(api: GeminiAPI, questions: list[str], stream: bool) -> tuple[list[float], Counter]:
+    """Envía todas las preguntas a la vez (un hilo y una sesión por pregunta)."""
+    scratch = Tracer()
+    barrier = threading.Barrier(len(questions))
+    latencies = []
+    sources = Counter()
+    lock = threading.Lock()
+
+    def worker(n: int, question: str):
+        session_id = f"bench-{n}"
+        trace = scratch.start_trace("chat")
+        barrier.wait()
+        start = time.perf_counter()
+        if stream:
+            "".join(api.send_message_stream(question, use_cache=False, session_id=session_id,
+                                            local_context=LOCAL_CONTEXT, trace=trace))
+        else:
+            api.send_message(question, use_cache=False, session_id=session_id, local_context=LOCAL_CONTEXT,
+                             trace=trace)
+        elapsed = time.perf_counter() - start
+        label = trace.source + (" (compartida)" if trace.attributes.get("coalesced") else "")
+        with lock:
+            latencies.append(elapsed)
+            sources[label] += 1
+
+    threads = [threading.Thread(target=worker, args=(n, question)) for n, question in enumerate(questions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Llamadas a Gemini con preguntas idénticas simultáneas.")
+    parser.add_argument("--peticiones", type=int, default=50, dest="requests",
+                        help="Peticiones simultáneas por ronda.")
+    parser.add_argument("--latencia-ms", type=float, default=200, dest="latency_ms",
+                        help="Latencia del modelo local, en milisegundos.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    n = args.requests
+    latency = args.latency_ms / 1000
+    rounds = [
+        # (nombre, preguntas, streaming, opciones del modelo, llamadas esperadas con agrupación)
+        ("misma pregunta", [QUESTION] * n, False, {}, 1),
+        ("misma pregunta (streaming)", [QUESTION] * n, True, {}, 1),
+        ("escrita distinto", [VARIANTS[i % len(VARIANTS)] for i in range(n)], False, {}, 1),
+        (f"{len(DISTINCT)} preguntas distintas", [DISTINCT[i % len(DISTINCT)] for i in range(n)], False, {},
+         len(DISTINCT)),
+        ("error del modelo", [QUESTION] * n, False, {"error_rate": 1.0}, 1),
+        ("llamada colgada", [QUESTION] * n, False, {"hang_rate": 1.0, "hang_seconds": 2.0}, 1),
+    ]
+
+    failures = 0
+    print(f"{n} peticiones simultáneas por ronda; latencia del modelo {args.latency_ms:.0f} ms\n")
+    print(f"{'ronda':>28} {'agrupación':>11} {'llamadas':>9} {'p50 (ms)':>9} {'máx (ms)':>9}  respuestas")
+    for name, questions, stream, faults, expected_calls in rounds:
+        for coalesce in (False, True):
+            wait_timeout = HANG_WAIT_SECONDS if "hang_rate" in faults else 5.0
+            api = make_api({"latency_seconds": latency, **faults}, coalesce, wait_timeout)
+            model = api.model
+            latencies, sources = burst(api, questions, stream)
+            latencies.sort()
+            summary = ", ".join(f"{count} {source}" for source, count in sorted(sources.items()))
+            print(f"{name:>28} {'sí' if coalesce else 'no':>11} {model.calls:>9} "
+                  f"{latencies[len(latencies) // 2] * 1000:>9.0f} {latencies[-1] * 1000:>9.0f}  {summary}")
+            if coalesce:
+                stats = api.single_flight.stats()
+                ok = model.calls == expected_calls and stats.calls + stats.coalesced == n and not stats.in_flight
+                if "error_rate" in faults:
+                    ok = ok and stats.shared_errors == n - 1 and sources["fallback"] == n
+                if "hang_rate" in faults:
+                    ok = ok and stats.wait_timeouts == n - 1
+                failures += not ok
+                print(f"{'':>28} {'':>11} {'OK' if ok else 'FALLO'}: se esperaba{'n' if expected_calls > 1 else ''} "
+                      f"{expected_calls} llamada{'s' if expected_calls > 1 else ''}; {stats.coalesced} agrupadas, "
+                      f"{stats.shared_errors} errores compartidos, {stats.wait_timeouts} esperas vencidas")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# src/bench/bench_cold_start.py
+"""
+Arranque en frío de la capa de conocimiento en procesos nuevos: DataManager cargando
+la instantánea binaria (src/core/kb_snapshot.py) frente a leer los JSON y construir
+los índices. Cada medición se hace en un proceso aparte, como un worker de corta vida.
+
+Uso: python -m src.bench.bench_cold_start [--procesos 10]
+(genera la instantánea antes con: python -m src.core.kb_snapshot)
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_CHILD = """
+import json, logging, time
+t0 = time.perf_counter()
+logging.disable(logging.INFO)
+from src.core.data_manager import DataManager
+t1 = time.perf_counter()
+DataManager(snapshot_file={snapshot_file!r})
+t2 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "load": t2 - t1}}))
+"""
+
+
+def measure(snapshot_file: str, processes: int) -> tuple[list[float], list[float]]:
+    imports, loads = [], []
+    for _ in range(processes):
+        output = subprocess.run([sys.executable, "-c", _CHILD.format(snapshot_file=snapshot_file)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        imports.append(result["import"])
+        loads.append(result["load"])
+    return imports, loads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arranque en frío de DataManager.")
+    parser.add_argument("--procesos", type=int, default=10, dest="processes")
+    args = parser.parse_args()
+
+    from src.utils.config import KB_SNAPSHOT_FILE
+    print(f"{'modo':>12} {'importación (ms)':>17} {'carga (ms)':>11}")
+    for label, snapshot_file in (("JSON", ""), ("instantánea", KB_SNAPSHOT_FILE)):
+        imports, loads = measure(snapshot_file, args.processes)
+        print(f"{label:>12} {statistics.median(imports) * 1000:>17.1f} {statistics.median(loads) * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
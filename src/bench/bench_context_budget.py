@@ -0,0 +1,57 @@
+# src/bench/bench_context_budget.py
+"""
+Presupuesto de contexto frente a calidad, sobre los prompts de data/training_data.json.
+Para cada presupuesto de tokens construye el contexto local que acompañaría a la
+consulta a Gemini y mide qué fracción de las palabras relevantes de la respuesta de
+referencia ('completion') aparece en él: una cota de lo que el modelo puede responder
+apoyándose en los datos en lugar de inventar. También informa los tokens añadidos y
+el tiempo de construcción.
+
+Uso: python -m src.bench.bench_context_budget [--presupuestos 0 100 200 300 500 800]
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from src.core.data_manager import DataManager
+from src.utils.text_normalizer import tokenize
+
+# Palabras que no aportan información sobre el contenido de la respuesta
+_IGNORED_WORDS = {"para", "como", "esta", "este", "sobre", "entre", "desde", "hasta", "tiene", "puede", "pueden",
+                  "unefa", "ingenieria", "carrera", "estudios", "plan", "semestres", "recomiendo", "consultar",
+                  "oficial", "nucleo", "miranda", "teques", "sede", "los", "las", "del", "con", "que", "una"}
+
+
+def content_words(text: str) -> set[str]:
+    return {token for token in tokenize(text) if len(token) > 3 and token not in _IGNORED_WORDS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de contexto frente a calidad.")
+    parser.add_argument("--presupuestos", type=int, nargs="+", default=[0, 100, 200, 300, 500, 800],
+                        dest="budgets")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    data_manager = DataManager()
+    pairs = data_manager.training_data
+    print(f"{len(pairs)} prompts, {len(data_manager.context_builder.snippets)} fragmentos indexados.")
+    print(f"{'presupuesto':>11} {'tokens medios':>13} {'fragmentos':>10} {'cobertura':>9} {'µs/consulta':>11}")
+    for budget in args.budgets:
+        recalls, tokens, snippets = [], [], []
+        start = time.perf_counter()
+        contexts = [data_manager.get_context(pair["prompt"], budget) for pair in pairs]
+        elapsed = time.perf_counter() - start
+        for pair, context in zip(pairs, contexts):
+            expected = content_words(pair["completion"])
+            found = expected & content_words(context.text)
+            recalls.append(len(found) / len(expected) if expected else 1.0)
+            tokens.append(context.tokens)
+            snippets.append(len(context.snippet_ids))
+        print(f"{budget:>11} {statistics.mean(tokens):>13.0f} {statistics.mean(snippets):>10.1f} "
+              f"{statistics.mean(recalls):>9.0%} {elapsed / len(pairs) * 1e6:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# src/bench/bench_image_cache.py
+"""
+Costo de los avatares de N burbujas: abrir y decodificar la imagen en cada burbuja
+(como antes) frente a tomarla de la caché compartida. Muestra el tiempo total y la
+memoria de píxeles que queda retenida. No necesita pantalla (no se crean widgets).
+
+Uso: python -m src.bench.bench_image_cache [--burbujas 500]
+"""
+import argparse
+import os
+import time
+
+from PIL import Image
+
+from src.gui.chat_bubble import AVATAR_SIZE
+from src.gui.image_cache import ImageCache
+
+AVATARS = [os.path.join("assets", "images", "bot_avatar.png"), os.path.join("assets", "images", "user_avatar.jpg")]
+
+
+def _pixel_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avatares decodificados por burbuja frente a la caché compartida.")
+    parser.add_argument("--burbujas", type=int, default=500, dest="bubbles")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    retained = []
+    for i in range(args.bubbles):
+        image = Image.open(AVATARS[i % len(AVATARS)])
+        image.load()
+        retained.append(image)
+    before = time.perf_counter() - start
+    before_bytes = sum(_pixel_bytes(image) for image in retained)
+
+    cache = ImageCache()
+    start = time.perf_counter()
+    for i in range(args.bubbles):
+        cache.get(AVATARS[i % len(AVATARS)], AVATAR_SIZE)
+    after = time.perf_counter() - start
+    stats = cache.stats()
+
+    print(f"{args.bubbles} burbujas")
+    print(f"  por burbuja: {before * 1000:8.1f} ms, {before_bytes / 1024 / 1024:8.1f} MiB retenidos")
+    print(f"  con caché:   {after * 1000:8.1f} ms, {stats.bytes / 1024 / 1024:8.3f} MiB retenidos "
+          f"({stats.images} imágenes, {stats.hits} aciertos, {stats.misses} decodificaciones)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# src/bench/bench_intent_router.py
+"""
+Micro-benchmark del enrutamiento de intenciones.
+Compara el índice invertido de IntentRouter con la cascada lineal de
+comprobaciones 'in lower_message' que usaba ChatbotLogic.process_message, sobre la
+consulta ya normalizada como la recibe ahora. Mide el índice con los tokens de la
+normalización (route_tokens, lo que hace ChatbotLogic) y tokenizando el mensaje (route):
+con las carreras reales la cascada sigue siendo más rápida, y tokenizar cuesta más que la
+búsqueda; el índice solo gana con cientos de carreras.
+
+Uso: python -m src.bench.bench_intent_router
+"""
+import logging
+import timeit
+
+from src.core.data_manager import DataManager
+from src.core.intent_router import IntentRouter, Intent
+from src.utils.text_normalizer import tokenize
+
+SAMPLE_MESSAGES = [
+    "¿Cuál es el pensum de sistemas?",
+    "Perfil del egresado de mecanica",
+    "salidas profesionales de telecomunicaciones",
+    "que es ingenieria electrica",
+    "duracion de la carrera de sistemas",
+    "Ingeniería de Sistemas",
+    "¿Cuál es la mision de la universidad?",
+    "necesito el telefono de contacto",
+    "Hola, ¿cómo estás? Quisiera saber algo sobre becas y horarios de la biblioteca.",
+]
+
+
+def legacy_route(lower_message: str, career_keywords: list[str]) -> Intent | None:
+    """Reproduce el orden de comprobaciones de la cascada original."""
+    for keyword in career_keywords:
+        if keyword in lower_message:
+            if "plan de estudio" in lower_message or "pensum" in lower_message:
+                return Intent(keyword, "plan_estudios")
+            elif "perfil" in lower_message or "egresado" in lower_message:
+                return Intent(keyword, "perfil_egresado")
+            elif "salidas profesionales" in lower_message or "campo laboral" in lower_message:
+                return Intent(keyword, "salidas_profesionales")
+            elif "descripcion" in lower_message or "que es" in lower_message:
+                return Intent(keyword, "descripcion")
+            elif "duracion" in lower_message:
+                return Intent(keyword, "duracion")
+            return Intent(keyword, None)
+
+    if "contacto" in lower_message or "telefono" in lower_message or "ubicacion" in lower_message:
+        return Intent(None, "contacto")
+    elif "mision" in lower_message:
+        return Intent(None, "mision")
+    elif "vision" in lower_message:
+        return Intent(None, "vision")
+    elif "nombre de la institucion" in lower_message or "nombre de la universidad" in lower_message:
+        return Intent(None, "nombre_institucion")
+    return None
+
+
+def _time_per_message(func, messages: list[str], number: int) -> float:
+    """Devuelve el tiempo medio por mensaje en microsegundos."""
+    def run():
+        for message in messages:
+            func(message)
+    total = timeit.timeit(run, number=number)
+    return total / (number * len(messages)) * 1e6
+
+
+def main():
+    logging.disable(logging.INFO)
+    data_manager = DataManager()
+    careers = list(data_manager.carreras_data.keys())
+    unefa_topics = list(data_manager.unefa_info.keys())
+    # Como los recibe el enrutamiento: texto normalizado (cascada) y sus tokens (índice)
+    token_lists = [tuple(tokenize(m)) for m in SAMPLE_MESSAGES]
+    messages = [" ".join(tokens) for tokens in token_lists]
+
+    router = IntentRouter(careers, unefa_topics)
+    mismatches = [m for m, tokens in zip(messages, token_lists)
+                  if router.route_tokens(tokens) != legacy_route(m, careers)]
+    print(f"Mensajes de prueba: {len(messages)}; discrepancias con la cascada: {len(mismatches)}")
+    for message in mismatches:
+        print(f"  '{message}': índice={router.route(message)} cascada={legacy_route(message, careers)}")
+
+    print(f"{'carreras':>9} {'índice (µs/msg)':>17} {'+ tokenizar':>12} {'cascada (µs/msg)':>18}")
+    for extra in (0, 40, 400):
+        # Carreras sintéticas para medir cómo escala cada estrategia
+        all_careers = careers + [f"carrera{i}" for i in range(extra)]
+        scaled_router = IntentRouter(all_careers, unefa_topics)
+        index_us = _time_per_message(scaled_router.route_tokens, token_lists, number=2000)
+        tokenize_us = _time_per_message(scaled_router.route, messages, number=2000)
+        cascade_us = _time_per_message(lambda m: legacy_route(m, all_careers), messages, number=2000)
+        print(f"{len(all_careers):>9} {index_us:>17.2f} {tokenize_us:>12.2f} {cascade_us:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
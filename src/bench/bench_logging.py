@@ -0,0 +1,105 @@
+# src/bench/bench_logging.py
+"""
+Costo del registro (logging) por petición en el hilo que atiende la consulta, con respuestas
+locales y con respuestas largas de un modelo local que imita a Gemini:
+- antes: handler síncrono que formatea y escribe en el mismo hilo (lo que hacía basicConfig),
+  sin muestreo y con la pregunta y la respuesta completas en INFO;
+- ahora: la cola de src/utils/logger.py, con muestreo y las respuestas solo en DEBUG.
+
+Uso: python -m src.bench.bench_logging [--repeticiones 300] [--respuesta-kb 8] [--rondas 3]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from src.bench.bench_tracing import default_questions
+from src.core.chatbot_logic import ChatbotLogic
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.logger import LOG_FORMAT, logging_stats, set_sampling, setup_logging, shutdown_logging
+
+logger = logging.getLogger("src.utils.gemini_api")
+
+
+def configure(mode: str, log_path: str):
+    """Deja el logger raíz como en cada escenario."""
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    if mode == "sin registro":
+        root.setLevel(logging.WARNING)
+    elif mode == "antes":
+        handler = logging.FileHandler(log_path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        set_sampling(1)
+    else:
+        setup_logging(level="INFO", log_file=log_path, console=False)
+
+
+def per_call(function, calls: list, repetitions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for args in calls:
+            function(*args)
+    return (time.perf_counter() - start) / (repetitions * len(calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo del registro por petición.")
+    parser.add_argument("--repeticiones", type=int, default=300, dest="repetitions")
+    parser.add_argument("--respuesta-kb", type=int, default=8, dest="response_kb",
+                        help="Tamaño de las respuestas del modelo local, en KB.")
+    parser.add_argument("--rondas", type=int, default=3, dest="rounds",
+                        help="Se alternan los escenarios y se toma el mejor tiempo de cada uno.")
+    args = parser.parse_args()
+
+    # El backend "fake" responde al instante con un texto de 'response_kb' KB
+    gemini_api = GeminiAPI(None, backend=FAKE, backend_options={
+        "latency_seconds": 0, "response_chars": args.response_kb * 1024, "error_rate": 0.0})
+    chatbot = ChatbotLogic(gemini_api=gemini_api)
+    local_questions = [(q,) for q in default_questions(chatbot) if chatbot.find_local_answer(q)]
+    gemini_questions = [("¿Qué hace un ingeniero de sistemas en una empresa?",)]
+    legacy = False
+
+    def ask_gemini(question: str):
+        response_text = gemini_api.send_message(question, use_cache=False, session_id="bench")
+        if legacy:
+            # Lo que send_message registraba antes con cada respuesta
+            logger.info(f"Usuario: {question}")
+            logger.info(f"Gemini: {response_text}")
+        gemini_api.sessions.reset("bench")
+
+    modes = ("sin registro", "antes", "ahora")
+    best = {mode: (float("inf"), float("inf")) for mode in modes}
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(args.rounds):
+            for mode in modes:
+                configure(mode, os.path.join(tmp, "bench.log"))
+                legacy = mode == "antes"
+                per_call(chatbot.find_local_answer, local_questions, 5)  # Calentamiento
+                local = per_call(chatbot.find_local_answer, local_questions, args.repetitions)
+                gemini = per_call(ask_gemini, gemini_questions, args.repetitions * 10)
+                best[mode] = (min(best[mode][0], local), min(best[mode][1], gemini))
+                if mode == "ahora":
+                    stats = logging_stats()
+        configure("sin registro", "")
+
+    base_local, base_gemini = best["sin registro"]
+    print(f"Respuestas locales: {len(local_questions)} preguntas; respuesta del modelo: "
+          f"{gemini_api.model.response_chars} caracteres")
+    print(f"{'registro':>13} {'local (µs)':>11} {'+registro':>10} {'gemini (µs)':>12} {'+registro':>10}")
+    for mode, (local, gemini) in best.items():
+        print(f"{mode:>13} {local * 1e6:>11.1f} {(local - base_local) * 1e6:>+10.1f} {gemini * 1e6:>12.1f} "
+              f"{(gemini - base_gemini) * 1e6:>+10.1f}")
+    print(f"\nCola: {stats.enqueued} registros escritos en segundo plano (última ronda), {stats.sampled_out} "
+          f"descartados por muestreo y {stats.dropped} por cola llena (todas las rondas).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# src/bench/bench_normalization.py
+"""
+Tasa de aciertos locales sobre un conjunto de consultas etiquetadas (respuestas rápidas de la
+interfaz, preguntas con tildes, con errores de tipeo y fuera de los datos locales):
+- antes: la consulta en minúsculas tal cual y la cascada de 'in lower_message' original;
+- solo tildes: la normalización sin corregir errores de tipeo (TYPO_MAX_DISTANCE=0);
+- ahora: la normalización completa de src/utils/text_normalizer.py.
+Por cada modo cuenta las respuestas correctas, las consultas locales que acabarían en Gemini
+y las que se responden localmente sin deber. También mide lo que cuesta normalizar.
+
+Uso: python -m src.bench.bench_normalization [--repeticiones 2000] [--detalle]
+"""
+import argparse
+import logging
+import time
+
+from src.bench.bench_intent_router import legacy_route
+from src.core.chatbot_logic import ChatbotLogic
+from src.core.data_manager import DataManager
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.tracing import Tracer
+
+# (consulta, etiqueta esperada): "faq", "course", "training", "career:<carrera>[/<tema>]", "unefa:<tema>"
+# o "" si la consulta debe ir a Gemini
+LABELLED_QUERIES = [
+    # Respuestas rápidas de la interfaz
+    ("Ingeniería de Sistemas", "career:sistemas"),
+    ("Ingeniería Mecánica", "career:mecanica"),
+    ("Ingeniería Eléctrica", "career:electrica"),
+    ("Ingeniería de Telecomunicaciones", "career:telecomunicaciones"),
+    ("Requisitos de Inscripción", "faq"),
+    ("Pensum de Sistemas", "career:sistemas/plan_estudios"),
+    ("Perfil del Egresado de Sistemas", "career:sistemas/perfil_egresado"),
+    ("Salidas Profesionales de Sistemas", "career:sistemas/salidas_profesionales"),
+    ("Duración de Sistemas", "career:sistemas/duracion"),
+    ("Pensum de Mecánica", "career:mecanica/plan_estudios"),
+    ("Perfil del Egresado de Eléctrica", "career:electrica/perfil_egresado"),
+    ("Pensum de Telecomunicaciones", "career:telecomunicaciones/plan_estudios"),
+    # Con tildes y signos de puntuación
+    ("¿Cuál es la duración de Mecánica?", "career:mecanica/duracion"),
+    ("Descripción de Ingeniería Eléctrica", "career:electrica/descripcion"),
+    ("¿Qué es Telecomunicaciones?", "career:telecomunicaciones/descripcion"),
+    ("¿Cuál es la misión de la universidad?", "unefa:mision"),
+    ("¿Y cuál es la visión?", "unefa:vision"),
+    ("Teléfono de contacto", "unefa:contacto"),
+    ("¿Cuál es el nombre de la institución?", "unefa:nombre_institucion"),
+    ("Campo laboral de Ingeniería Mecánica", "career:mecanica/salidas_profesionales"),
+    ("¿Hay becas para estudiantes de ingeniería?", "faq"),
+    ("¿Cómo accedo a la biblioteca virtual?", "faq"),
+    ("¿Qué es IngeChat 360°?", "training"),
+    # Con errores de tipeo
+    ("pensun de mecanca", "career:mecanica/plan_estudios"),
+    ("duracion de sistmas", "career:sistemas/duracion"),
+    ("perfil del egresdo de electrica", "career:electrica/perfil_egresado"),
+    ("salidas profesionles de telecomunicasiones", "career:telecomunicaciones/salidas_profesionales"),
+    ("ingenieria de sitemas", "career:sistemas"),
+    ("que es ingenieria electrcia", "career:electrica/descripcion"),
+    ("ingeneria mecanica", "career:mecanica"),
+    ("mision de la universidd", "unefa:mision"),
+    ("telefono de contaco", "unefa:contacto"),
+    ("requisitos de inscripsion", "faq"),
+    ("horario de la ofcina de atencion estudiantil", "faq"),
+    ("biblioteca virtal de la unefa", "faq"),
+    ("cursos de nivelasion o propedeuticos", "faq"),
+    # Asignaturas, semestres y unidades de crédito
+    ("¿En qué semestre se ve Álgebra Lineal?", "course"),
+    ("¿Qué es MAT-21215?", "course"),
+    ("¿Cuántas UC tiene el 3° semestre?", "course"),
+    ("¿Qué materias se ven en el cuarto semestre de Sistemas?", "course"),
+    ("¿En qué semestre se ve Física I en Mecánica?", "course"),
+    ("¿Cuántas unidades de crédito tiene Ingeniería de Sistemas?", "course"),
+    ("¿Cuántas UC tiene el 3° semestre de Mecánica?", "course"),
+    ("¿Qué significa UC?", "course"),
+    # Fuera de los datos locales
+    ("¿Qué tiempo hará mañana en Caracas?", ""),
+    ("Recomiéndame una película", ""),
+    ("¿Cómo preparo arepas?", ""),
+    ("¿Quién ganó el último mundial?", ""),
+    ("Quiero estudiar medicina", ""),
+    ("¿Qué lenguaje de programación aprendo primero?", ""),
+    ("Explícame la ley de Ohm", ""),
+    ("¿Cuánto cuesta un pasaje a Mérida?", ""),
+    # Comparten una palabra rara con una FAQ, pero preguntan por otra cosa
+    ("horario de la biblioteca", ""),
+    ("¿Cuál es el horario de la biblioteca?", ""),
+]
+
+
+def _label(source: str | None, career: str | None = None, topic: str | None = None) -> str:
+    if source in ("career", "unefa"):
+        return f"{source}:{career}" + (f"/{topic}" if topic else "") if career else f"unefa:{topic}"
+    return source or ""
+
+
+def legacy_label(data_manager: DataManager, question: str) -> str:
+    """Etiqueta de la respuesta que daba la búsqueda local antes de normalizar las consultas."""
+    lower_message = question.lower()
+    if data_manager.get_faq_answer(lower_message):
+        return "faq"
+    intent = legacy_route(lower_message, list(data_manager.carreras_data))
+    if intent:
+        if intent.career and data_manager.get_career_answer(intent.career, intent.topic):
+            return _label("career", intent.career, intent.topic)
+        if not intent.career and data_manager.get_unefa_general_info(intent.topic):
+            return _label("unefa", None, intent.topic)
+    if data_manager.get_training_answer(question):
+        return "training"
+    return ""
+
+
+def chatbot_label(chatbot: ChatbotLogic, scratch: Tracer, question: str) -> str:
+    """Etiqueta de la respuesta local actual, a partir de los atributos de su traza."""
+    trace = scratch.start_trace("chat")
+    chatbot.find_local_answer(question, trace)
+    attributes = trace.attributes
+    return _label(attributes.get("source"), attributes.get("career"), attributes.get("topic"))
+
+
+def _matches(expected: str, actual: str) -> bool:
+    # Una carrera sin tema esperado acepta también una respuesta sobre un tema de esa carrera
+    return actual == expected or (expected.startswith("career:") and "/" not in expected
+                                  and actual.startswith(expected + "/"))
+
+
+def per_call(function, questions: list[str], repetitions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for question in questions:
+            function(question)
+    return (time.perf_counter() - start) / (repetitions * len(questions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aciertos locales con y sin normalización de consultas.")
+    parser.add_argument("--repeticiones", type=int, default=2000, dest="repetitions",
+                        help="Repeticiones para medir el costo de normalizar.")
+    parser.add_argument("--detalle", action="store_true", dest="details",
+                        help="Mostrar las consultas que no se resuelven como se esperaba.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    scratch = Tracer()
+    gemini_api = GeminiAPI(None, backend=FAKE, backend_options={"latency_seconds": 0})
+    chatbot = ChatbotLogic(gemini_api=gemini_api)
+    accents_only = ChatbotLogic(data_manager=DataManager(typo_max_distance=0), gemini_api=gemini_api)
+    modes = {
+        "antes": lambda question: legacy_label(chatbot.data_manager, question),
+        "solo tildes": lambda question: chatbot_label(accents_only, scratch, question),
+        "ahora": lambda question: chatbot_label(chatbot, scratch, question),
+    }
+
+    questions = [question for question, _expected in LABELLED_QUERIES]
+    n_local = sum(1 for _question, expected in LABELLED_QUERIES if expected)
+    print(f"{len(LABELLED_QUERIES)} consultas etiquetadas: {n_local} con respuesta local, "
+          f"{len(LABELLED_QUERIES) - n_local} para Gemini\n")
+    print(f"{'modo':>12} {'correctas':>10} {'locales':>8} {'a Gemini evitables':>19} {'locales de más':>15}")
+    for mode, classify in modes.items():
+        correct = local_hits = avoidable = spurious = 0
+        misses = []
+        for question, expected in LABELLED_QUERIES:
+            actual = classify(question)
+            correct += _matches(expected, actual)
+            if expected:
+                local_hits += bool(actual)
+                avoidable += not actual
+            else:
+                spurious += bool(actual)
+            if not _matches(expected, actual):
+                misses.append((question, expected, actual))
+        print(f"{mode:>12} {correct:>5}/{len(LABELLED_QUERIES):<4} {local_hits / n_local:>8.1%} "
+              f"{avoidable:>19} {spurious:>15}")
+        if args.details:
+            for question, expected, actual in misses:
+                print(f"{'':>14}{question!r}: se esperaba {expected or 'Gemini'!r}, se obtuvo {actual or 'Gemini'!r}")
+
+    data_manager = chatbot.data_manager
+    normalize = per_call(data_manager.normalize_query, questions, args.repetitions)
+    lookup = per_call(chatbot.find_local_answer, questions, args.repetitions // 10 or 1)
+    start = time.perf_counter()
+    snapshot = data_manager.snapshot.copy()
+    data_manager._build_query_normalizer(snapshot)
+    # El índice de borrados se construye con la primera consulta; aquí se fuerza para medirlo
+    snapshot.query_normalizer.corrector.warm_up()
+    build = time.perf_counter() - start
+    print(f"\nNormalizar: {normalize * 1e6:.1f} µs por consulta ({lookup * 1e6:.1f} µs la búsqueda local completa); "
+          f"construir el corrector: {build * 1000:.1f} ms "
+          f"({len(data_manager.query_normalizer.corrector.vocabulary)} palabras)")
+
+
+if __name__ == "__main__":
+    main()
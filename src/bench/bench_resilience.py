@@ -0,0 +1,154 @@
+# src/bench/bench_resilience.py
+"""
+GeminiAPI frente al backend local "fake" con fallos inyectados (FaultInjectingModel),
+con varios hilos consultando a la vez como los del servidor. Escenarios:
+- cola lenta: una fracción de las llamadas tarda mucho más que el resto;
+- colgadas: algunas llamadas no responden en mucho tiempo;
+- caída: todas las llamadas fallan durante un rato y luego Gemini se recupera.
+En cada uno compara el cliente sin protección (una llamada, sin plazo) con el de
+src/utils/resilience.py (plazo, reintentos, circuit breaker y, aparte, hedging), y muestra la
+latencia p50/p99, cuántas respuestas vinieron de Gemini, de los datos locales o fueron un
+error, y cuántas llamadas recibió el modelo. Antes verifica que el grupo de hilos rechace un
+duplicado cuando todos sus hilos están ocupados (termina con código 1 si no).
+
+Uso: python -m src.bench.bench_resilience [--hilos 8] [--peticiones 200]
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.resilience import CircuitBreaker, ResilientCaller, _DaemonPool
+from src.utils.response_cache import ResponseCache
+from src.utils.tracing import Tracer
+
+LOCAL_CONTEXT = "- La UNEFA Núcleo Miranda ofrece Ingeniería de Sistemas, Mecánica, Eléctrica y Telecomunicaciones."
+
+SCENARIOS = {
+    "cola lenta": dict(latency_seconds=0.05, slow_rate=0.05, slow_seconds=1.5),
+    "colgadas": dict(latency_seconds=0.05, hang_rate=0.03, hang_seconds=4.0),
+    "caída": dict(latency_seconds=0.05, error_rate=1.0),
+}
+# Backend "fake" sin las variables FAKE_LLM_*: latencia fija y errores solo en la caída
+MODEL_SETTINGS = dict(latency_distribution="fixed", error_rate=0.0, chunk_rate=None, seed=1)
+# Segundos que dura la caída antes de que el modelo vuelva a responder
+OUTAGE_SECONDS = 1.0
+# Cada hilo envía una consulta cada tantos segundos (o en cuanto termina la anterior, si tarda más)
+REQUEST_INTERVAL_SECONDS = 0.1
+
+
+def clients() -> dict:
+    """Configuraciones del cliente que se comparan (se crean de nuevo en cada escenario)."""
+    protected = dict(timeout=0.8, attempt_timeout=0.25, max_retries=2, retry_base=0.05, retry_max=0.2)
+    return {
+        "sin protección": lambda: ResilientCaller(timeout=None, max_retries=0, hedge_percentile=0,
+                                                  breaker=CircuitBreaker(failure_threshold=0)),
+        "resiliente": lambda: ResilientCaller(**protected, hedge_percentile=0,
+                                              breaker=CircuitBreaker(failure_threshold=5, reset_timeout=0.3)),
+        "+ hedging p90": lambda: ResilientCaller(**protected, hedge_percentile=0.9,
+                                                 breaker=CircuitBreaker(failure_threshold=5, reset_timeout=0.3)),
+    }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def check_hedge_refused() -> bool:
+    """
+    Tras atender más tareas que hilos (una cola), y con todos los hilos ocupados, el grupo no debe
+    aceptar un duplicado: quedaría esperando detrás de una llamada bloqueada.
+    """
+    pool = _DaemonPool(max_workers=2, name="check")
+    for future in [pool.submit(time.sleep, 0.01) for _ in range(6)]:
+        future.result()
+    release = threading.Event()
+    blocked = [pool.submit(release.wait) for _ in range(2)]
+    time.sleep(0.05)
+    refused = pool.submit(time.sleep, 0, only_if_idle=True) is None
+    release.set()
+    for future in blocked:
+        future.result()
+    time.sleep(0.05)
+    accepted = pool.submit(time.sleep, 0, only_if_idle=True) is not None
+    return refused and accepted
+
+
+def run(scenario: str, caller: ResilientCaller, threads: int, requests: int) -> dict:
+    """Lanza 'requests' consultas repartidas entre 'threads' hilos y resume el resultado."""
+    api = GeminiAPI(None, response_cache=ResponseCache(max_entries=1), caller=caller, backend=FAKE,
+                    backend_options={**MODEL_SETTINGS, **SCENARIOS[scenario]})
+    # Todas las peticiones repiten la misma pregunta: sin agrupar, para que cada una sea una llamada
+    api.single_flight = None
+    model = api.model
+    scratch = Tracer()
+    latencies = []
+    sources = Counter()
+    lock = threading.Lock()
+    per_thread = max(1, requests // threads)
+
+    def worker(worker_id: int):
+        next_send = time.perf_counter()
+        for i in range(per_thread):
+            time.sleep(max(0.0, next_send - time.perf_counter()))
+            next_send += REQUEST_INTERVAL_SECONDS
+            session_id = f"bench-{worker_id}-{i}"
+            trace = scratch.start_trace("chat")
+            start = time.perf_counter()
+            api.send_message("¿Qué hace un ingeniero de sistemas?", use_cache=False, session_id=session_id,
+                             local_context=LOCAL_CONTEXT, trace=trace)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                sources[trace.source] += 1
+            api.sessions.reset(session_id)
+
+    if scenario == "caída":
+        recovery = threading.Timer(OUTAGE_SECONDS, lambda: setattr(model, "error_rate", 0.0))
+        recovery.start()
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - start
+    stats = caller.stats()
+    return {"p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99), "wall": wall,
+            "throughput": len(latencies) / wall, "sources": sources, "model_calls": model.calls, "stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia y disponibilidad del cliente de Gemini ante fallos.")
+    parser.add_argument("--hilos", type=int, default=8, dest="threads")
+    parser.add_argument("--peticiones", type=int, default=200, dest="requests",
+                        help="Peticiones por escenario y cliente.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if not check_hedge_refused():
+        print("FALLO: el grupo de hilos aceptó un duplicado con todos sus hilos ocupados.")
+        sys.exit(1)
+    print("OK: con todos los hilos ocupados no se lanzan duplicados.")
+
+    header = (f"{'cliente':>15} {'p50 (ms)':>9} {'p99 (ms)':>9} {'pet/s':>7} {'gemini':>7} {'locales':>8} "
+              f"{'error':>6} {'llamadas':>9} {'reintentos':>11} {'duplicados':>11} {'cortadas':>9}")
+    for scenario in SCENARIOS:
+        print(f"\n{scenario} ({SCENARIOS[scenario]})")
+        print(header)
+        for name, make_caller in clients().items():
+            result = run(scenario, make_caller(), args.threads, args.requests)
+            sources, stats = result["sources"], result["stats"]
+            print(f"{name:>15} {result['p50'] * 1000:>9.0f} {result['p99'] * 1000:>9.0f} "
+                  f"{result['throughput']:>7.1f} {sources['gemini']:>7} {sources['fallback']:>8} "
+                  f"{sources['error']:>6} {result['model_calls']:>9} {stats.retries:>11} {stats.hedges:>11} "
+                  f"{stats.short_circuited:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# src/bench/bench_server.py
+"""
+Prueba de carga del servidor de chat con el sustituto local de Gemini.
+Levanta el servidor en este mismo proceso y lanza N clientes HTTP concurrentes
+(conexiones keep-alive) que mezclan preguntas con respuesta local y preguntas
+que van a Gemini.
+
+Uso: python -m src.bench.bench_server [--clientes 50] [--peticiones 20] [--latencia 0.2]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from src.core.chatbot_logic import ChatbotLogic
+from src.core.data_manager import DataManager
+from src.server.chat_server import ChatServer
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+
+LOCAL_MESSAGES = [
+    "pensum de sistemas",
+    "perfil del egresado de mecanica",
+    "¿Cuáles son los requisitos de inscripción?",
+    "duracion de telecomunicaciones",
+    "mision de la unefa",
+]
+UPSTREAM_MESSAGES = [
+    "¿Qué lenguajes de programación se usan en la carrera?",
+    "¿Hay laboratorios de robótica?",
+]
+
+
+async def _post_chat(reader, writer, message: str, session_id: str | None) -> tuple[int, dict]:
+    body = json.dumps({"message": message, "session_id": session_id}).encode("utf-8")
+    writer.write(b"POST /chat HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    content_length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value)
+    return status, json.loads(await reader.readexactly(content_length))
+
+
+async def _client(port: int, n_requests: int, upstream_every: int, latencies: list, statuses: dict):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    session_id = None
+    for i in range(n_requests):
+        if upstream_every and i % upstream_every == upstream_every - 1:
+            message = UPSTREAM_MESSAGES[i % len(UPSTREAM_MESSAGES)]
+        else:
+            message = LOCAL_MESSAGES[i % len(LOCAL_MESSAGES)]
+        start = time.perf_counter()
+        status, payload = await _post_chat(reader, writer, message, session_id)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        session_id = payload.get("session_id", session_id)
+    writer.close()
+    await writer.wait_closed()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(clients: int, requests_per_client: int, latency: float, upstream_every: int):
+    chatbot = ChatbotLogic(DataManager(), GeminiAPI(None, backend=FAKE, backend_options={"latency_seconds": latency}))
+    server = ChatServer(chatbot, port=0, max_upstream_concurrency=32, max_upstream_waiting=clients)
+    await server.start()
+
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(server.port, requests_per_client, upstream_every, latencies, statuses)
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+
+    print(f"Clientes: {clients}, peticiones: {len(latencies)} en {elapsed:.2f} s "
+          f"-> {len(latencies) / elapsed:.0f} peticiones/s")
+    print(f"Códigos HTTP: {statuses}")
+    print(f"Latencia p50: {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99: {_percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Respuestas locales: {server.stats['local_answers']}, "
+          f"consultas al sustituto de Gemini: {server.stats['upstream_answers']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor de chat.")
+    parser.add_argument("--clientes", type=int, default=50, dest="clients")
+    parser.add_argument("--peticiones", type=int, default=20, dest="requests",
+                        help="Peticiones por cliente.")
+    parser.add_argument("--latencia", type=float, default=0.2, dest="latency",
+                        help="Latencia en segundos del sustituto de Gemini.")
+    parser.add_argument("--cada", type=int, default=5, dest="upstream_every",
+                        help="Una de cada N preguntas va a Gemini (0 = todas locales).")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.clients, args.requests, args.latency, args.upstream_every))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# src/bench/bench_startup.py
+"""
+Informe de tiempos de arranque.
+1. Importaciones: ejecuta 'python -X importtime' sobre los módulos de entrada y muestra
+   los paquetes que más tiempo acumulan.
+2. Ventana: ejecuta 'python -m src.main --medir-arranque' y muestra cuándo se dibujó la
+   ventana, cuándo se decodificaron las imágenes y cuándo quedaron listas la lógica del
+   chatbot y el cliente de Gemini (requiere una pantalla; sin ella se omite).
+
+Con --max-importacion-ms o --max-ventana-ms el script termina con error si se superan,
+para detectar regresiones.
+
+Uso: python -m src.bench.bench_startup [--max-importacion-ms 300] [--max-ventana-ms 1500]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+ENTRY_MODULES = ["src.gui.main_window", "src.core.chatbot_logic", "src.server.chat_server"]
+
+
+def import_times(module: str) -> list[tuple[str, int, int, int]]:
+    """
+    Devuelve (módulo, propio µs, acumulado µs, profundidad) de las importaciones que hace
+    'module', terminando por él mismo. Se descartan las del arranque del intérprete (site, ...).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    # -X importtime lista cada módulo después de sus dependencias, con más sangría
+    end = max(i for i, row in enumerate(rows) if row[0] == module)
+    start = end
+    while start > 0 and rows[start - 1][3] > rows[end][3]:
+        start -= 1
+    return rows[start:end + 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe de tiempos de arranque.")
+    parser.add_argument("--top", type=int, default=8, help="Paquetes de primer nivel a mostrar por módulo.")
+    parser.add_argument("--max-importacion-ms", type=float, default=None, dest="max_import_ms")
+    parser.add_argument("--max-ventana-ms", type=float, default=None, dest="max_paint_ms")
+    args = parser.parse_args()
+    failures = []
+
+    print("== Importaciones ==")
+    for module in ENTRY_MODULES:
+        rows = import_times(module)
+        total_ms = rows[-1][2] / 1000
+        print(f"{module}: {total_ms:.0f} ms")
+        # Dependencias directas o de segundo nivel más costosas
+        heaviest = sorted((row for row in rows if row[3] <= 2 and row[0] != module), key=lambda r: -r[2])
+        for name, _, cumulative, depth in heaviest[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {'  ' * (depth - 1)}{name}")
+        if "google.generativeai" in {row[0] for row in rows}:
+            print("    aviso: importa google.generativeai al arrancar")
+        if module == ENTRY_MODULES[0] and args.max_import_ms is not None and total_ms > args.max_import_ms:
+            failures.append(f"importación de {module}: {total_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+
+    print("== Ventana ==")
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("Sin pantalla (DISPLAY vacío): se omite la medición de la ventana.")
+    else:
+        output = subprocess.run([sys.executable, "-m", "src.main", "--medir-arranque"],
+                                capture_output=True, text=True, timeout=120).stdout
+        timings = json.loads(next(line for line in reversed(output.splitlines()) if line.startswith("{")))
+        for key, label in (("imports_ms", "importaciones de src.main"), ("first_paint_ms", "ventana visible"),
+                           ("assets_ready_ms", "imágenes decodificadas"), ("chatbot_ready_ms", "lógica lista"),
+                           ("gemini_ready_ms", "cliente de Gemini listo")):
+            if key in timings:
+                print(f"{label:>28}: {timings[key]:8.0f} ms")
+        if args.max_paint_ms is not None and timings.get("first_paint_ms", 0) > args.max_paint_ms:
+            failures.append(f"ventana visible: {timings['first_paint_ms']:.0f} ms > {args.max_paint_ms:.0f} ms")
+
+    if failures:
+        print("Regresiones:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
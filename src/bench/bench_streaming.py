@@ -0,0 +1,54 @@
+# src/bench/bench_streaming.py
+"""
+Mide el tiempo hasta el primer fragmento frente al tiempo de respuesta completa
+de GeminiAPI.send_message_stream. Requiere GEMINI_API_KEY en el archivo .env.
+
+Uso: python -m src.bench.bench_streaming [--repeticiones 3]
+"""
+import argparse
+import json
+import logging
+import statistics
+
+from src.utils.config import GEMINI_API_KEY
+from src.utils.gemini_api import GeminiAPI
+from src.utils.tracing import Tracer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de las respuestas en streaming de Gemini.")
+    parser.add_argument("--repeticiones", type=int, default=1, dest="repetitions",
+                        help="Veces que se envía cada prompt de data/training_data.json.")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with open("data/training_data.json", 'r', encoding='utf-8') as f:
+        prompts = [pair["prompt"] for pair in json.load(f)]
+
+    gemini_api = GeminiAPI(GEMINI_API_KEY)
+    scratch = Tracer()
+    first_chunk_ms, total_ms = [], []
+    for _ in range(args.repetitions):
+        for prompt in prompts:
+            gemini_api.start_new_chat()
+            trace = scratch.start_trace("stream")
+            for _chunk in gemini_api.send_message_stream(prompt, use_cache=False, trace=trace):
+                pass
+            timing = trace.attributes.get("stream_timing")
+            if timing is None:
+                continue
+            first_chunk_ms.append(timing["time_to_first_chunk"] * 1000)
+            total_ms.append(timing["total_time"] * 1000)
+
+    if not total_ms:
+        print("No se obtuvo ninguna respuesta de Gemini.")
+        return
+    print(f"Respuestas: {len(total_ms)}")
+    print(f"Primer fragmento: mediana {statistics.median(first_chunk_ms):.0f} ms, máx {max(first_chunk_ms):.0f} ms")
+    print(f"Respuesta completa: mediana {statistics.median(total_ms):.0f} ms, máx {max(total_ms):.0f} ms")
+    print(f"Primer fragmento / respuesta completa (mediana): "
+          f"{statistics.median(f / t for f, t in zip(first_chunk_ms, total_ms)):.0%}")
+
+
+if __name__ == "__main__":
+    main()
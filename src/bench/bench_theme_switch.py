@@ -0,0 +1,66 @@
+# src/bench/bench_theme_switch.py
+"""
+Bloqueo del hilo de Tk al cambiar entre modo claro y oscuro con N burbujas: aplicando
+el tema a todas de una vez (como antes) frente a ThemeEngine (visibles primero y el
+resto por tandas). Necesita una pantalla; en un servidor se puede usar Xvfb:
+xvfb-run -a python -m src.bench.bench_theme_switch
+
+Uso: python -m src.bench.bench_theme_switch [--burbujas 200 1000 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bloqueo de la interfaz al cambiar de tema.")
+    parser.add_argument("--burbujas", type=int, nargs="+", default=[200, 1000, 2000], dest="bubbles")
+    args = parser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("Sin pantalla (DISPLAY vacío): usa xvfb-run -a python -m src.bench.bench_theme_switch")
+        return
+
+    import customtkinter as ctk
+    from src.gui.chat_bubble import ChatBubble
+    from src.gui.scrollable_frame import ScrollableFrame
+    from src.gui.theme import PALETTES, ThemeEngine
+
+    avatar = os.path.join("assets", "images", "bot_avatar.png")
+    print(f"{'burbujas':>8} {'de una vez (ms)':>16} {'tanda máx. (ms)':>16} {'tandas':>7} {'total (ms)':>11}")
+    for n_bubbles in args.bubbles:
+        ctk.set_appearance_mode("light")
+        root = ctk.CTk()
+        root.geometry("900x800")
+        frame = ScrollableFrame(root, fg_color=PALETTES["Light"]["chat_area_bg"])
+        frame.pack(fill="both", expand=True)
+        bubbles = [ChatBubble(frame.frame, f"Mensaje {i}", i % 2 == 0, avatar_path=avatar) for i in range(n_bubbles)]
+        frame.canvas.yview_moveto(1.0)
+        root.update()
+
+        def on_screen(bubble):
+            top = bubble.winfo_rooty() - frame.canvas.winfo_rooty()
+            return -bubble.winfo_height() < top < frame.canvas.winfo_height()
+
+        # Antes: todas las burbujas en el mismo ciclo
+        start = time.perf_counter()
+        for bubble in bubbles:
+            bubble.apply_palette(PALETTES["Dark"])
+        all_at_once = (time.perf_counter() - start) * 1000
+        root.update()
+
+        engine = ThemeEngine(root)
+        engine.palette = PALETTES["Dark"]
+        for bubble in bubbles:
+            engine.subscribe(bubble.apply_palette, is_visible=lambda b=bubble: on_screen(b))
+        engine.set_mode("Light")
+        while engine.last_switch is None:
+            root.update()
+        stats = engine.last_switch
+        print(f"{n_bubbles:>8} {all_at_once:>16.1f} {stats.max_slice_ms:>16.1f} {stats.slices:>7} {stats.total_ms:>11.1f}")
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# src/bench/bench_token_growth.py
+"""
+Tokens de entrada por turno en una conversación larga con Gemini.
+Simula una conversación de N turnos con un modelo local que cuenta los tokens
+que realmente recibe (instrucción del sistema + historial + mensaje), igual que
+lo haría Gemini en usage_metadata, y lo compara con el esquema anterior, que
+anteponía la instrucción del sistema a cada mensaje y la guardaba en el historial.
+
+Uso: python -m src.bench.bench_token_growth [--turnos 50]
+"""
+import argparse
+import logging
+
+from src.utils.gemini_api import GeminiAPI
+from src.utils.session_manager import estimate_tokens
+
+RESPONSE_TEXT = ("La carrera incluye asignaturas de matemática, física, programación y gestión de proyectos; "
+                 "puedes consultar el pensum oficial en la coordinación de la carrera. ") * 2
+
+
+class _UsageMetadata:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class _Part:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Response:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.parts = [_Part(text)]
+        self.usage_metadata = _UsageMetadata(prompt_tokens, estimate_tokens(text))
+
+
+class _CountingChat:
+    def __init__(self, system_instruction: str, history: list[dict]):
+        self.system_instruction = system_instruction
+        self.history = history
+
+    def send_message(self, content: str, stream: bool = False):
+        history_tokens = sum(estimate_tokens(part) for turn in self.history for part in turn["parts"])
+        prompt_tokens = estimate_tokens(self.system_instruction) + history_tokens + estimate_tokens(content)
+        return _Response(RESPONSE_TEXT, prompt_tokens)
+
+
+class _CountingModel:
+    """Modelo local que imita el conteo de tokens de entrada de Gemini."""
+
+    def __init__(self, system_instruction: str):
+        self.system_instruction = system_instruction
+
+    def start_chat(self, history: list[dict]):
+        return _CountingChat(self.system_instruction, history)
+
+
+def legacy_input_tokens(system_instruction: str, messages: list[str]) -> list[int]:
+    """Tokens de entrada por turno con la instrucción antepuesta y guardada en cada turno."""
+    per_turn, history_tokens = [], 0
+    for message in messages:
+        prompt_tokens = estimate_tokens(f"{system_instruction}\n\nUsuario: {message}")
+        per_turn.append(history_tokens + prompt_tokens)
+        history_tokens += prompt_tokens + estimate_tokens(RESPONSE_TEXT)
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crecimiento de tokens de entrada por turno.")
+    parser.add_argument("--turnos", type=int, default=50, dest="turns")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    gemini_api = GeminiAPI("clave-local-no-se-usa")
+    gemini_api.model = _CountingModel(gemini_api.system_instruction)
+    messages = [f"Pregunta número {i + 1} sobre las carreras de ingeniería de la UNEFA" for i in range(args.turns)]
+    for message in messages:
+        gemini_api.send_message(message, use_cache=False)
+
+    current = [usage.input_tokens for usage in gemini_api.token_metrics.recent][-args.turns:]
+    legacy = legacy_input_tokens(gemini_api.system_instruction, messages)
+    print(f"{'turno':>6} {'antes':>8} {'ahora':>8}")
+    for turn in sorted({1, 2, 5, 10, 20, 30, 40, args.turns} & set(range(1, args.turns + 1))):
+        print(f"{turn:>6} {legacy[turn - 1]:>8} {current[turn - 1]:>8}")
+    print(f"Total de tokens de entrada: antes {sum(legacy)}, ahora {sum(current)}")
+    print(f"Métricas: {gemini_api.token_metrics.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# src/bench/bench_tracing.py
+"""
+Informe de trazas: pasa una mezcla de preguntas (respuestas rápidas de la interfaz, FAQs,
+datos de entrenamiento y preguntas fuera de los datos locales, o las de un archivo) por
+ChatbotLogic con el sustituto local de Gemini y muestra qué fracción se respondió
+localmente, la latencia por origen y por tramo (p50/p95/p99) y las trazas más lentas.
+También mide cuánto cuesta trazar una búsqueda local.
+
+Uso: python -m src.bench.bench_tracing [preguntas.txt] [--latencia 0.05] [--trazas trazas.jsonl]
+"""
+import argparse
+import logging
+import time
+
+from src.core.chatbot_logic import ChatbotLogic
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.tracing import NULL_TRACE, JsonLinesExporter, Tracer, tracer
+
+# Textos de los botones de respuesta rápida de la interfaz
+QUICK_REPLIES = [
+    "Ingeniería de Sistemas", "Ingeniería Mecánica", "Ingeniería Eléctrica", "Ingeniería de Telecomunicaciones",
+    "Requisitos de Inscripción", "Pensum de Sistemas", "Perfil del Egresado de Sistemas",
+    "Salidas Profesionales de Sistemas", "Duración de Sistemas", "Pensum de Mecánica",
+    "Perfil del Egresado de Eléctrica", "Pensum de Telecomunicaciones",
+]
+OFF_TOPIC = [
+    "¿Qué tiempo hará mañana en Caracas?", "Recomiéndame una película", "¿Cómo preparo arepas?",
+    "¿Quién ganó el último mundial?",
+]
+
+
+def default_questions(chatbot: ChatbotLogic) -> list[str]:
+    """Respuestas rápidas, preguntas de las FAQs y del entrenamiento, y preguntas fuera de los datos locales."""
+    data_manager = chatbot.data_manager
+    faqs = [faq["pregunta"] for faq in data_manager.faqs_data.get("preguntas_frecuentes", [])]
+    training = [example["prompt"] for example in data_manager.training_data]
+    return QUICK_REPLIES + faqs + training[:20] + OFF_TOPIC
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fracción local y latencia de cola a partir de las trazas.")
+    parser.add_argument("questions_file", nargs="?", help="Archivo de texto con una pregunta por línea.")
+    parser.add_argument("--latencia", type=float, default=0.05, dest="latency",
+                        help="Latencia en segundos del sustituto local de Gemini.")
+    parser.add_argument("--trazas", default=None, dest="trace_file",
+                        help="Escribir también cada traza en este archivo JSON lines.")
+    parser.add_argument("--repeticiones", type=int, default=2000, dest="repetitions",
+                        help="Repeticiones para medir el costo de trazar.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    chatbot = ChatbotLogic(gemini_api=GeminiAPI(None, backend=FAKE, backend_options={"latency_seconds": args.latency}))
+    if args.questions_file:
+        with open(args.questions_file, 'r', encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = default_questions(chatbot)
+    if args.trace_file:
+        tracer.add_exporter(JsonLinesExporter(args.trace_file))
+
+    for i, question in enumerate(questions):
+        chatbot.process_message(question, session_id=f"bench-{i}")
+
+    snapshot = tracer.snapshot(slowest=3)
+    print(f"Peticiones: {snapshot['requests']}; respondidas localmente: {snapshot['local_fraction']:.1%}")
+    print("Respuestas por origen: " + ", ".join(f"{source} {count}"
+                                                for source, count in sorted(snapshot['answers'].items())))
+
+    header = f"{'count':>6} {'media (ms)':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}"
+    for title, latencies in (("origen", snapshot["latency_by_source"]), ("tramo", snapshot["latency_by_span"])):
+        print(f"\n{title:>20} {header}")
+        for name, summary in sorted(latencies.items(), key=lambda item: -item[1]["p95_ms"]):
+            print(f"{name:>20} {summary['count']:>6} {summary['avg_ms']:>11.3f} {summary['p50_ms']:>9.3f} "
+                  f"{summary['p95_ms']:>9.3f} {summary['p99_ms']:>9.3f}")
+
+    print("\nTrazas más lentas:")
+    for trace in snapshot["slowest"]:
+        spans = ", ".join(f"{span['name']} {span['duration_ms']:.2f}" for span in trace["spans"])
+        print(f"  {trace['trace_id']} {trace['attributes'].get('source')} {trace['duration_ms']:.1f} ms: {spans}")
+
+    # Costo de trazar: la misma búsqueda local con NULL_TRACE y con una traza real (en un Tracer aparte)
+    local_questions = [q for q in questions if chatbot.find_local_answer(q)] or questions[:1]
+    scratch = Tracer()
+
+    def per_lookup(traced: bool) -> float:
+        start = time.perf_counter()
+        for _ in range(args.repetitions):
+            for question in local_questions:
+                trace = scratch.start_trace("chat") if traced else NULL_TRACE
+                chatbot.find_local_answer(question, trace)
+                trace.finish()
+        return (time.perf_counter() - start) / (args.repetitions * len(local_questions))
+
+    # Se alternan y se toma el mejor de tres para que el orden no sesgue la comparación
+    rounds = [(per_lookup(False), per_lookup(True)) for _ in range(3)]
+    untraced = min(untraced for untraced, _traced in rounds)
+    traced = min(traced for _untraced, traced in rounds)
+    print(f"\nBúsqueda local: {untraced * 1e6:.1f} µs sin trazar, {traced * 1e6:.1f} µs trazada "
+          f"({(traced - untraced) * 1e6:+.1f} µs por petición)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# src/bench/training_coverage.py
+"""
+Análisis de cobertura fuera de línea del corpus de entrenamiento.
+Puntúa un archivo de preguntas registradas (una por línea) contra
+data/training_data.json con la API por lotes de DataManager e informa qué
+fracción se respondería localmente.
+
+Uso: python -m src.bench.training_coverage preguntas.txt [--umbral 0.8]
+"""
+import argparse
+import logging
+import time
+
+from src.core.data_manager import DataManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cobertura del corpus de entrenamiento.")
+    parser.add_argument("questions_file", help="Archivo de texto con una pregunta por línea.")
+    parser.add_argument("--umbral", type=float, default=None, dest="threshold",
+                        help="Similitud mínima para considerar una pregunta cubierta.")
+    parser.add_argument("--mostrar", type=int, default=10, dest="show",
+                        help="Cantidad de preguntas no cubiertas a mostrar.")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    data_manager = DataManager()
+    threshold = args.threshold if args.threshold is not None else data_manager.training_min_similarity
+
+    with open(args.questions_file, 'r', encoding='utf-8') as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    start = time.perf_counter()
+    matches = data_manager.match_training_batch(questions, top_k=1)
+    elapsed = time.perf_counter() - start
+
+    uncovered = [(q, m[0].similarity if m else 0.0) for q, m in zip(questions, matches)
+                 if not m or m[0].similarity < threshold]
+    covered = len(questions) - len(uncovered)
+    print(f"Preguntas: {len(questions)} en {elapsed * 1000:.1f} ms "
+          f"({len(questions) / elapsed if elapsed else 0:.0f} preguntas/s)")
+    print(f"Cubiertas (similitud >= {threshold:.2f}): {covered} ({covered / max(len(questions), 1):.1%})")
+    if uncovered:
+        print("Ejemplos no cubiertos:")
+        for question, similarity in sorted(uncovered, key=lambda item: item[1])[:args.show]:
+            print(f"  {similarity:.2f}  {question}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# src/core/answer_table.py
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+# Temas de carrera con respuesta precompilada; None es el resumen general de la carrera
+CAREER_TOPICS = ("plan_estudios", "perfil_egresado", "salidas_profesionales", "descripcion", "duracion", None)
+
+
+class Course(NamedTuple):
+    name: str
+    code: str | None = None
+    uc: int | None = None
+
+
+class Semester(NamedTuple):
+    key: str                   # Clave original en el JSON ("1°_semestre", "semestres_intermedios", ...)
+    label: str                 # Etiqueta con la que se muestra en las respuestas
+    courses: tuple[Course, ...]
+    text: str | None = None    # Descripción libre cuando el semestre no trae una lista de asignaturas
+
+
+def _course(entry) -> Course:
+    if isinstance(entry, dict):
+        uc = entry.get("uc")
+        return Course(entry.get("asignatura", "N/A"), entry.get("codigo"), int(uc) if uc is not None else None)
+    return Course(str(entry))
+
+
+def normalize_plan(plan: dict) -> tuple[Semester, ...]:
+    """
+    Convierte las distintas formas de plan_estudios de los JSON (listas de diccionarios,
+    listas de cadenas o texto libre por semestre) en una única representación.
+    """
+    semesters = []
+    for key, courses in plan.items():
+        if isinstance(courses, list) and (all(isinstance(c, dict) for c in courses)
+                                          or all(isinstance(c, str) for c in courses)):
+            semesters.append(Semester(key, f"Semestre {key}", tuple(_course(c) for c in courses)))
+        elif isinstance(courses, str):
+            semesters.append(Semester(key, f"Semestre {key}", (), courses))
+        elif isinstance(courses, list):
+            # Listas mezcladas: se toman las asignaturas de los diccionarios
+            semesters.append(Semester(key, key.replace('_', ' ').title(),
+                                      tuple(_course(c) for c in courses if isinstance(c, dict))))
+        else:
+            semesters.append(Semester(key, f"Semestre {key}", (), "Información no formateada."))
+    return tuple(semesters)
+
+
+def format_plan(semesters: tuple[Semester, ...]) -> str:
+    """Da formato de texto al plan de estudios normalizado, una línea por semestre."""
+    lines = []
+    for semester in semesters:
+        content = semester.text if semester.text is not None else ", ".join(c.name for c in semester.courses)
+        lines.append(f"{semester.label}: {content}")
+    return "\n".join(lines)
+
+
+def render_career_answer(keyword: str, career_info: dict, topic: str | None,
+                         semesters: tuple[Semester, ...] | None = None) -> str:
+    """Construye la respuesta sobre un tema de una carrera (o su resumen si topic es None)."""
+    name = keyword.capitalize()
+    if topic == "plan_estudios":
+        if semesters is None:
+            semesters = normalize_plan(career_info.get("plan_estudios", {}))
+        if semesters:
+            return (f"El plan de estudios de Ingeniería de {name} incluye:\n{format_plan(semesters)}\n"
+                    f"Para más detalles, consulta la sección de la carrera en el portal de la UNEFA.")
+        return f"Información del plan de estudios para Ingeniería de {name} no disponible."
+    if topic == "perfil_egresado":
+        return career_info.get("perfil_egresado", f"Perfil del egresado para Ingeniería de {name} no disponible.")
+    if topic == "salidas_profesionales" and career_info.get("salidas_profesionales"):
+        salidas = ", ".join(career_info["salidas_profesionales"])
+        return f"Algunas salidas profesionales para Ingeniería de {name} incluyen: {salidas}."
+    if topic == "descripcion":
+        return career_info.get("descripcion", f"Descripción para Ingeniería de {name} no disponible.")
+    if topic == "duracion":
+        return f"La duración de la carrera de Ingeniería de {name} es de {career_info.get('duracion', 'N/A')}."
+
+    # Resumen general (también cuando el tema pedido no tiene datos)
+    return (f"Ingeniería de {name}: {career_info.get('descripcion', 'Descripción no disponible.')} "
+            f"Duración: {career_info.get('duracion', 'N/A')}. "
+            f"Puedes preguntar sobre su perfil de egresado, plan de estudios o salidas profesionales.")
+
+
+def compile_answers(carreras_data: dict) -> tuple[Mapping[str, tuple[Semester, ...]],
+                                                    Mapping[tuple[str, str | None], str]]:
+    """
+    Normaliza los planes de estudio y renderiza de antemano la respuesta de cada
+    (carrera, tema). Devuelve ambas tablas como mapeos de solo lectura.
+    """
+    plans = {}
+    answers = {}
+    for keyword, career_info in carreras_data.items():
+        plans[keyword] = normalize_plan(career_info.get("plan_estudios") or {})
+        for topic in CAREER_TOPICS:
+            answers[(keyword, topic)] = render_career_answer(keyword, career_info, topic, plans[keyword])
+    return MappingProxyType(plans), MappingProxyType(answers)
@@ -0,0 +1,105 @@
+# src/core/bm25_index.py
+import logging
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from src.utils.text_normalizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResult(NamedTuple):
+    """Documento encontrado por el índice junto con su puntuación."""
+    doc_id: int
+    score: float       # Puntuación BM25 (sirve para ordenar)
+    confidence: float  # Fracción del peso IDF de la consulta presente en el documento (0..1)
+
+
+class BM25Index:
+    """
+    Índice BM25 sobre una colección pequeña de textos.
+    Los documentos se tokenizan una sola vez al construir el índice y los pesos
+    se guardan en una matriz dispersa por término (formato CSR con arreglos NumPy),
+    de modo que cada consulta se puntúa en una sola pasada vectorizada.
+    """
+
+    def __init__(self, documents: list[str], k1: float = 1.2, b: float = 0.75):
+        self.n_docs = len(documents)
+        self.vocabulary: dict[str, int] = {}
+
+        tokenized_docs = [tokenize(doc) for doc in documents]
+        doc_lengths = np.array([len(tokens) for tokens in tokenized_docs], dtype=np.float64)
+        avg_doc_length = float(doc_lengths.mean()) if self.n_docs and doc_lengths.sum() else 1.0
+
+        # Frecuencias de término por documento: término -> {doc_id: tf}
+        postings: dict[int, dict[int, int]] = {}
+        for doc_id, tokens in enumerate(tokenized_docs):
+            for token in tokens:
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                doc_tf = postings.setdefault(term_id, {})
+                doc_tf[doc_id] = doc_tf.get(doc_id, 0) + 1
+
+        n_terms = len(self.vocabulary)
+        self.idf = np.zeros(n_terms, dtype=np.float64)
+        self.indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        n_entries = sum(len(doc_tf) for doc_tf in postings.values())
+        self.doc_ids = np.empty(n_entries, dtype=np.int32)
+        self.weights = np.empty(n_entries, dtype=np.float64)
+
+        position = 0
+        for term_id in range(n_terms):
+            doc_tf = postings[term_id]
+            self.idf[term_id] = self._idf(len(doc_tf))
+            for doc_id, tf in doc_tf.items():
+                length_norm = 1 - b + b * doc_lengths[doc_id] / avg_doc_length
+                self.doc_ids[position] = doc_id
+                self.weights[position] = self.idf[term_id] * tf * (k1 + 1) / (tf + k1 * length_norm)
+                position += 1
+            self.indptr[term_id + 1] = position
+
+        # Peso de los términos de la consulta que no aparecen en ningún documento
+        self.unknown_term_idf = self._idf(0)
+        logger.info(f"Índice BM25 construido: {self.n_docs} documentos, {n_terms} términos.")
+
+    @classmethod
+    def from_arrays(cls, n_docs: int, vocabulary: list[str], idf: np.ndarray, indptr: np.ndarray,
+                    doc_ids: np.ndarray, weights: np.ndarray) -> "BM25Index":
+        """Reconstruye un índice ya calculado (p. ej. leído de una instantánea) sin volver a tokenizar."""
+        index = cls.__new__(cls)
+        index.n_docs = n_docs
+        index.vocabulary = {term: term_id for term_id, term in enumerate(vocabulary)}
+        index.idf, index.indptr, index.doc_ids, index.weights = idf, indptr, doc_ids, weights
+        index.unknown_term_idf = index._idf(0)
+        return index
+
+    def _idf(self, doc_freq: int) -> float:
+        return math.log(1 + (self.n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, top_k: int = 1) -> list[SearchResult]:
+        """Devuelve los top_k documentos más relevantes para la consulta."""
+        if not self.n_docs:
+            return []
+
+        query_terms = set(tokenize(query))
+        term_ids = [self.vocabulary[t] for t in query_terms if t in self.vocabulary]
+        if not term_ids:
+            return []
+        query_idf_mass = (float(self.idf[term_ids].sum())
+                          + self.unknown_term_idf * (len(query_terms) - len(term_ids)))
+
+        # Posiciones de todas las entradas de los términos de la consulta
+        starts, ends = self.indptr[term_ids], self.indptr[np.array(term_ids) + 1]
+        positions = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        term_of_position = np.repeat(term_ids, ends - starts)
+        matched_docs = self.doc_ids[positions]
+
+        scores = np.bincount(matched_docs, weights=self.weights[positions], minlength=self.n_docs)
+        matched_idf = np.bincount(matched_docs, weights=self.idf[term_of_position], minlength=self.n_docs)
+        confidences = matched_idf / query_idf_mass
+
+        top_k = min(top_k, self.n_docs)
+        best = np.argsort(-scores, kind="stable")[:top_k]
+        return [SearchResult(int(doc_id), float(scores[doc_id]), float(confidences[doc_id]))
+                for doc_id in best if scores[doc_id] > 0]
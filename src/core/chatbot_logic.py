@@ -1,116 +1,174 @@
 # src/core/chatbot_logic.py
 from src.utils.gemini_api import GeminiAPI
 from src.core.data_manager import DataManager
+from src.core.intent_router import IntentRouter
 from src.utils.config import GEMINI_API_KEY
+from src.utils.logger import SampledLogger
+from src.utils.session_manager import DEFAULT_SESSION_ID
+from src.utils.tracing import NULL_TRACE, Trace, tracer
+from typing import Iterator
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Eventos de cada petición: se escribe uno de cada LOG_SAMPLE_EVERY
+sampled_logger = SampledLogger(logger)
 
 class ChatbotLogic:
-    def __init__(self):
-        self.data_manager = DataManager()
-        self.gemini_api = GeminiAPI(GEMINI_API_KEY)
-        self.career_keywords = ["sistemas", "mecanica", "telecomunicaciones", "electrica"]
+    def __init__(self, data_manager: DataManager | None = None, gemini_api=None):
+        # Ambos se pueden inyectar (p. ej. un DataManager compartido o un sustituto local de Gemini)
+        self.data_manager = data_manager or DataManager()
+        self.gemini_api = gemini_api or GeminiAPI(GEMINI_API_KEY)
+        self._build_intent_router(self.data_manager)
+        # Si cambian los datos (p. ej. se agrega una carrera), el índice de intenciones se reconstruye
+        self.data_manager.add_reload_listener(self._build_intent_router)
+        # Las respuestas de Gemini en caché se fundamentaron en los datos anteriores
+        self.data_manager.add_reload_listener(self._clear_response_cache)
 
-    def process_message(self, message: str) -> str:
+    def _build_intent_router(self, data_manager: DataManager):
+        self.intent_router = IntentRouter(data_manager.carreras_data.keys(), data_manager.unefa_info.keys())
+
+    def _clear_response_cache(self, data_manager: DataManager):
+        self.gemini_api.clear_response_cache()
+
+    def process_message(self, message: str, session_id: str = DEFAULT_SESSION_ID,
+                        trace: Trace | None = None) -> str:
         """
         Procesa el mensaje del usuario y devuelve una respuesta.
         Prioriza la información local antes de consultar a Gemini.
+        Si no se pasa una traza, se crea y se cierra aquí; si se pasa, la cierra quien la creó.
+        """
+        owned = trace is None
+        if owned:
+            trace = tracer.start_trace("chat", session_id=session_id)
+        try:
+            local_answer = self.find_local_answer(message, trace)
+            if local_answer:
+                return local_answer
+
+            # 2. Si no se encuentra una respuesta local, consultar a Gemini
+            return self.query_gemini(message, session_id, trace)
+        finally:
+            if owned:
+                trace.finish()
+
+    def process_message_stream(self, message: str, session_id: str = DEFAULT_SESSION_ID,
+                               trace: Trace | None = None) -> Iterator[str]:
+        """
+        Igual que process_message, pero devuelve la respuesta por fragmentos.
+        Las respuestas locales se entregan en un único fragmento; las de Gemini, a medida que llegan.
+        """
+        owned = trace is None
+        if owned:
+            trace = tracer.start_trace("chat", session_id=session_id)
+        try:
+            local_answer = self.find_local_answer(message, trace)
+            if local_answer:
+                yield local_answer
+                return
+
+            yield from self.query_gemini_stream(message, session_id, trace)
+        finally:
+            if owned:
+                trace.finish()
+
+    def query_gemini(self, message: str, session_id: str = DEFAULT_SESSION_ID,
+                     trace: Trace | None = None) -> str:
+        """Consulta directamente a Gemini, sin buscar en los datos locales."""
+        trace = trace or NULL_TRACE
+        sampled_logger.info("Consultando a Gemini API.")
+        return self.gemini_api.send_message(message, session_id=session_id,
+                                            local_context=self._local_context(message, trace), trace=trace)
+
+    def query_gemini_stream(self, message: str, session_id: str = DEFAULT_SESSION_ID,
+                            trace: Trace | None = None) -> Iterator[str]:
+        """Consulta directamente a Gemini y devuelve la respuesta por fragmentos."""
+        trace = trace or NULL_TRACE
+        sampled_logger.info("Consultando a Gemini API (streaming).")
+        yield from self.gemini_api.send_message_stream(message, session_id=session_id,
+                                                       local_context=self._local_context(message, trace),
+                                                       trace=trace)
+
+    def _local_context(self, message: str, trace: Trace = NULL_TRACE) -> str:
+        """Fragmentos de los datos locales que acompañan a la consulta para que Gemini no invente."""
+        with trace.span("context_retrieval"):
+            context = self.data_manager.get_context(message)
+        if context.snippet_ids:
+            sampled_logger.info("Contexto local para Gemini: %d fragmentos, ~%d tokens.",
+                                len(context.snippet_ids), context.tokens)
+        return context.text
+
+    def find_local_answer(self, message: str, trace: Trace | None = None) -> str | None:
+        """
+        Busca una respuesta en los datos locales (FAQs, carreras, UNEFA y datos de entrenamiento).
+        Si se pasa una traza, cada búsqueda queda como un tramo y el origen de la respuesta como atributo.
         """
-        lower_message = message.lower()
+        trace = trace or NULL_TRACE
 
         # 1. Intentar responder con datos locales (FAQs, información de carreras)
-        
+
+        # Consulta sin tildes ni puntuación y con los errores de tipeo corregidos
+        with trace.span("normalize"):
+            query = self.data_manager.normalize_query(message)
+        if query.corrections:
+            trace.annotate(corrections=[f"{original}->{corrected}" for original, corrected in query.corrections])
+
         # Búsqueda por FAQs directas
-        faq_answer = self.data_manager.get_faq_answer(lower_message)
+        with trace.span("faq_lookup"):
+            faq_answer = self.data_manager.get_faq_answer(query.text)
         if faq_answer:
-            logger.info("Respuesta obtenida de FAQs locales.")
+            sampled_logger.info("Respuesta obtenida de FAQs locales.")
+            trace.annotate(source="faq")
             return faq_answer
 
-        # Búsqueda de información de carreras
-        for keyword in self.career_keywords:
-            if keyword in lower_message:
-                career_info = self.data_manager.get_career_info(keyword)
-                if career_info:
-                    if "plan de estudio" in lower_message or "pensum" in lower_message:
-                        plan = career_info.get("plan_estudios", {}) # Asegurarse de que sea un diccionario
-                        if plan:
-                            plan_lines = []
-                            for semester, courses in plan.items():
-                                # Manejar la diferencia en la estructura de 'courses'
-                                # Si 'courses' es una lista de diccionarios (como en sistemas)
-                                if isinstance(courses, list) and all(isinstance(c, dict) for c in courses):
-                                    # Extraer solo el nombre de la asignatura
-                                    course_names = [c.get("asignatura", "N/A") for c in courses]
-                                    plan_lines.append(f"Semestre {semester}: {', '.join(course_names)}")
-                                # Si 'courses' es una lista de cadenas (menos probable con tu estructura actual, pero por seguridad)
-                                elif isinstance(courses, list) and all(isinstance(c, str) for c in courses):
-                                    plan_lines.append(f"Semestre {semester}: {', '.join(courses)}")
-                                # Si 'courses' es una cadena (como en los ejemplos simplificados)
-                                elif isinstance(courses, str):
-                                    plan_lines.append(f"Semestre {semester}: {courses}")
-                                # Si es un diccionario con nombres de semestres como claves (ej. "semestres_intermedios")
-                                elif isinstance(courses, list): # Esto cubre los casos de ejemplo con listas de diccionarios simples
-                                    course_names = [c.get("asignatura", "N/A") for c in courses]
-                                    plan_lines.append(f"{semester.replace('_', ' ').title()}: {', '.join(course_names)}")
-                                else:
-                                    plan_lines.append(f"Semestre {semester}: Información no formateada.")
-                            
-                            plan_str = "\n".join(plan_lines)
-                            logger.info(f"Respuesta obtenida del plan de estudios de {keyword}.")
-                            return f"El plan de estudios de Ingeniería de {keyword.capitalize()} incluye:\n{plan_str}\nPara más detalles, consulta la sección de la carrera en el portal de la UNEFA."
-                        else:
-                            return f"Información del plan de estudios para Ingeniería de {keyword.capitalize()} no disponible."
-                    elif "perfil" in lower_message or "egresado" in lower_message:
-                        logger.info(f"Respuesta obtenida del perfil de {keyword}.")
-                        return career_info.get("perfil_egresado", f"Perfil del egresado para Ingeniería de {keyword.capitalize()} no disponible.")
-                    elif "salidas profesionales" in lower_message or "campo laboral" in lower_message:
-                        salidas = ", ".join(career_info.get("salidas_profesionales", []))
-                        if salidas:
-                            logger.info(f"Respuesta obtenida de salidas profesionales de {keyword}.")
-                            return f"Algunas salidas profesionales para Ingeniería de {keyword.capitalize()} incluyen: {salidas}."
-                    elif "descripcion" in lower_message or "que es" in lower_message:
-                        logger.info(f"Respuesta obtenida de descripción de {keyword}.")
-                        return career_info.get("descripcion", f"Descripción para Ingeniería de {keyword.capitalize()} no disponible.")
-                    elif "duracion" in lower_message:
-                        logger.info(f"Respuesta obtenida de duración de {keyword}.")
-                        return f"La duración de la carrera de Ingeniería de {keyword.capitalize()} es de {career_info.get('duracion', 'N/A')}."
-                    
-                    # Si solo mencionan la carrera, dar un resumen general
-                    logger.info(f"Respuesta general sobre la carrera {keyword}.")
-                    return (f"Ingeniería de {keyword.capitalize()}: {career_info.get('descripcion', 'Descripción no disponible.')} "
-                            f"Duración: {career_info.get('duracion', 'N/A')}. "
-                            f"Puedes preguntar sobre su perfil de egresado, plan de estudios o salidas profesionales.")
-
-        # Búsqueda de información general de UNEFA
-        if "contacto" in lower_message or "telefono" in lower_message or "ubicacion" in lower_message:
-            info = self.data_manager.get_unefa_general_info("contacto")
-            if info:
-                logger.info("Respuesta obtenida de info general UNEFA.")
-                return info
-        elif "mision" in lower_message:
-            info = self.data_manager.get_unefa_general_info("mision")
-            if info:
-                logger.info("Respuesta obtenida de la misión de UNEFA.")
-                return info
-        elif "vision" in lower_message:
-            info = self.data_manager.get_unefa_general_info("vision")
-            if info:
-                logger.info("Respuesta obtenida de la visión de UNEFA.")
-                return info
-        elif "nombre de la institucion" in lower_message or "nombre de la universidad" in lower_message:
-            info = self.data_manager.get_unefa_general_info("nombre_institucion")
-            if info:
-                logger.info("Respuesta obtenida del nombre de la institución.")
-                return info
-
-
-        # 2. Si no se encuentra una respuesta local, consultar a Gemini
-        logger.info("Consultando a Gemini API.")
-        return self.gemini_api.send_message(message)
-
-    def start_new_chat_session(self):
-        """Reinicia la sesión de chat de Gemini."""
-        self.gemini_api.start_new_chat()
+        # Preguntas sobre asignaturas, semestres y unidades de crédito
+        with trace.span("course_lookup"):
+            course_answer = self.data_manager.get_course_answer(query.text)
+        if course_answer:
+            sampled_logger.info("Respuesta obtenida del índice de asignaturas.")
+            trace.annotate(source="course")
+            return course_answer
+
+        # Búsqueda de información de carreras y de la UNEFA mediante el índice de intenciones
+        with trace.span("intent_routing"):
+            intent = self.intent_router.route_tokens(query.tokens)
+        if intent:
+            with trace.span("local_lookup"):
+                if intent.career:
+                    answer = self._answer_career(intent.career, intent.topic)
+                else:
+                    answer = self._answer_unefa(intent.topic)
+            if answer:
+                trace.annotate(source="career" if intent.career else "unefa", career=intent.career, topic=intent.topic)
+                return answer
 
+        # Búsqueda de preguntas parecidas en los datos de entrenamiento
+        with trace.span("training_lookup"):
+            training_answer = self.data_manager.get_training_answer(query.text)
+        if training_answer:
+            sampled_logger.info("Respuesta obtenida de los datos de entrenamiento.")
+            trace.annotate(source="training")
+            return training_answer
+
+        return None
+
+    def _answer_career(self, keyword: str, topic: str | None) -> str | None:
+        """Devuelve la respuesta precompilada sobre un tema de una carrera."""
+        answer = self.data_manager.get_career_answer(keyword, topic)
+        if answer:
+            sampled_logger.info("Respuesta precompilada de %s (%s).", keyword, topic or 'resumen general')
+        return answer
+
+    def _answer_unefa(self, topic: str) -> str | None:
+        """Construye la respuesta sobre un tema de información general de la UNEFA."""
+        info = self.data_manager.get_unefa_general_info(topic)
+        if not info:
+            return None
+        # Algunos temas (como 'contacto') se guardan como diccionarios
+        if isinstance(info, dict):
+            info = "\n".join(str(value) for value in info.values())
+        sampled_logger.info("Respuesta obtenida de info general UNEFA (%s).", topic)
+        return info
+
+    def start_new_chat_session(self, session_id: str = DEFAULT_SESSION_ID):
+        """Reinicia la sesión de chat de Gemini."""
+        self.gemini_api.start_new_chat(session_id)
@@ -0,0 +1,147 @@
+# src/core/context_builder.py
+import logging
+from typing import NamedTuple
+
+from src.core.bm25_index import BM25Index
+from src.utils.session_manager import estimate_tokens
+from src.utils.text_normalizer import content_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class Snippet(NamedTuple):
+    """Fragmento de los datos locales que se puede incluir en una consulta a Gemini."""
+    source: str  # "carrera", "faq" o "unefa"
+    career: str  # Clave de la carrera ("sistemas", ...) o "" si no pertenece a ninguna
+    title: str
+    text: str
+    tokens: int
+
+
+class RetrievedContext(NamedTuple):
+    """Contexto elegido para una consulta."""
+    text: str
+    snippet_ids: list[int]
+    tokens: int
+
+
+EMPTY_CONTEXT = RetrievedContext("", [], 0)
+
+# Los semestres se guardan como "1°_semestre"; las preguntas suelen escribirlos con palabras
+_ORDINALS = {"1": "primer", "2": "segundo", "3": "tercer", "4": "cuarto", "5": "quinto", "6": "sexto",
+             "7": "séptimo", "8": "octavo", "9": "noveno", "10": "décimo"}
+
+
+def _as_text(value) -> str:
+    """Convierte un valor de los JSON (cadena, lista o diccionario) en texto plano."""
+    if isinstance(value, dict):
+        return "; ".join(_as_text(v) for v in value.values())
+    if isinstance(value, list):
+        return ", ".join(_as_text(v) for v in value)
+    return str(value)
+
+
+def _course_text(course) -> str:
+    if not isinstance(course, dict):
+        return str(course)
+    details = [str(course[key]) for key in ("codigo",) if course.get(key)]
+    if course.get("uc"):
+        details.append(f"{course['uc']} UC")
+    name = course.get("asignatura", "N/A")
+    return f"{name} ({', '.join(details)})" if details else name
+
+
+def collect_snippets(carreras_data: dict, faqs_data: dict, unefa_info: dict) -> list[Snippet]:
+    """
+    Divide los datos locales en fragmentos cortos: un campo por carrera (descripción,
+    perfil, salidas, duración) y un fragmento por semestre del plan de estudios, una
+    pregunta frecuente por fragmento y un tema de la UNEFA por fragmento.
+    """
+    snippets = []
+
+    def add(source: str, title: str, text: str, career: str = ""):
+        text = f"{title}: {text}"
+        snippets.append(Snippet(source, career, title, text, estimate_tokens(text)))
+
+    for keyword, info in carreras_data.items():
+        career = info.get("nombre") or f"Ingeniería de {keyword.capitalize()}"
+        for field, label in (("descripcion", "descripción"), ("perfil_egresado", "perfil del egresado"),
+                             ("salidas_profesionales", "salidas profesionales")):
+            if info.get(field):
+                add("carrera", f"{career}, {label}", _as_text(info[field]), keyword)
+        general = [f"{label} {info[field]}" for field, label in
+                   (("duracion", "duración"), ("regimen", "régimen"), ("unidades_credito_totales", "UC totales"),
+                    ("vigencia_pensum", "pensum vigente desde")) if info.get(field)]
+        if general:
+            add("carrera", f"{career}, duración", "; ".join(general), keyword)
+        plan = info.get("plan_estudios", {})
+        if isinstance(plan, dict):
+            for semester, courses in plan.items():
+                semester_name = semester.replace("_", " ")
+                number = semester.split("°")[0]
+                if number in _ORDINALS:
+                    semester_name += f" ({_ORDINALS[number]} semestre)"
+                title = f"{career}, plan de estudios, materias del {semester_name}"
+                if isinstance(courses, list):
+                    add("carrera", title, ", ".join(_course_text(c) for c in courses), keyword)
+                else:
+                    add("carrera", title, _as_text(courses), keyword)
+
+    for qa in faqs_data.get("preguntas_frecuentes", []):
+        add("faq", qa["pregunta"], qa["respuesta"])
+
+    for topic, value in unefa_info.items():
+        add("unefa", f"UNEFA, {topic.replace('_', ' ')}", _as_text(value))
+
+    return snippets
+
+
+class ContextBuilder:
+    """
+    Selecciona los fragmentos de datos locales más relevantes para una pregunta que
+    se enviará a Gemini, sin superar un presupuesto de tokens. Los fragmentos se
+    indexan una sola vez con BM25 (título y texto); en cada consulta, sin palabras
+    vacías, se toman los top_k mejor puntuados, descartando los que cubren poco de
+    la pregunta, los que puntúan muy por debajo del mejor, los de otras carreras
+    cuando la pregunta nombra una y los que no caben en lo que queda del presupuesto.
+    """
+
+    def __init__(self, snippets: list[Snippet], max_tokens: int = 300, top_k: int = 4,
+                 min_confidence: float = 0.3, min_relative_score: float = 0.35, index: BM25Index | None = None):
+        self.snippets = snippets
+        self.max_tokens = max_tokens
+        self.top_k = top_k
+        self.min_confidence = min_confidence
+        self.min_relative_score = min_relative_score
+        # 'index' permite reutilizar un índice ya construido sobre estos mismos fragmentos
+        self.index = index or BM25Index([snippet.text for snippet in snippets])
+        self.careers = {snippet.career for snippet in snippets if snippet.career}
+
+    def build(self, question: str, max_tokens: int | None = None) -> RetrievedContext:
+        """Devuelve el contexto para la pregunta (vacío si no hay fragmentos relevantes o el presupuesto es 0)."""
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        if budget <= 0:
+            return EMPTY_CONTEXT
+        # Se piden candidatos de más para poder saltar los que no caben en el presupuesto
+        tokens = content_tokens(question)
+        mentioned_careers = self.careers.intersection(tokens)
+        results = [result for result in self.index.search(" ".join(tokens), top_k=self.top_k * 3)
+                   if result.confidence >= self.min_confidence
+                   and (not mentioned_careers or self.snippets[result.doc_id].career in mentioned_careers | {""})]
+        if not results:
+            return EMPTY_CONTEXT
+
+        min_score = results[0].score * self.min_relative_score
+        chosen, used = [], 0
+        for result in results:
+            if len(chosen) == self.top_k or result.score < min_score:
+                break
+            snippet = self.snippets[result.doc_id]
+            if used + snippet.tokens > budget:
+                continue
+            chosen.append(result.doc_id)
+            used += snippet.tokens
+        if not chosen:
+            return EMPTY_CONTEXT
+        text = "\n".join(f"- {self.snippets[doc_id].text}" for doc_id in chosen)
+        return RetrievedContext(text, chosen, used)
@@ -0,0 +1,280 @@
+# src/core/course_index.py
+import logging
+import re
+from typing import Mapping, NamedTuple
+
+from src.core.answer_table import Course, Semester
+from src.utils.text_normalizer import STOP_WORDS, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Números romanos de los nombres de asignatura ("Matemática II"); se comparan como dígitos
+_ROMAN = {"i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8", "ix": "9",
+          "x": "10"}
+
+# Ordinales con los que se suele nombrar un semestre ("tercer semestre", "3er semestre", "3° semestre")
+_ORDINAL_WORDS = {"primer": 1, "primero": 1, "segundo": 2, "tercer": 3, "tercero": 3, "cuarto": 4, "quinto": 5,
+                  "sexto": 6, "septimo": 7, "setimo": 7, "octavo": 8, "noveno": 9, "decimo": 10}
+_ORDINAL_RE = re.compile(r"^(\d{1,2})(?:o|er|ro|do|to|mo|vo|no)?$")
+_SEMESTER_KEY_RE = re.compile(r"^(\d{1,2})")
+# Códigos de asignatura: "MAT-21215" llega normalizado como "mat 21215" (o "mat21215" si se escribió junto)
+_CODE_RE = re.compile(r"^([a-z]{3})(\d{5})$")
+
+# Palabras que indican que la pregunta es sobre asignaturas, semestres o unidades de crédito
+COURSE_CUES = frozenset({"semestre", "semestres", "materia", "materias", "asignatura", "asignaturas", "curso",
+                         "cursos", "uc", "credito", "creditos", "codigo", "ve", "ven", "veo", "dicta", "dictan",
+                         "cursa", "cursan"})
+_CREDIT_CUES = frozenset({"uc", "credito", "creditos"})
+# Palabras de una pregunta por el significado de las UC ("¿qué significa UC?", "¿qué es una unidad de crédito?")
+_DEFINITION_WORDS = frozenset({"significa", "significan", "significado", "definicion", "quiere", "decir",
+                               "unidad", "unidades"})
+CREDIT_DEFINITION = ("Las unidades de crédito (UC) miden la carga académica de una asignatura, en general según "
+                     "sus horas de clase por semana. Cada asignatura del plan de estudios tiene sus UC y, para "
+                     "graduarse, hay que aprobar el total de UC de la carrera. Puedes preguntarme, por ejemplo, "
+                     "cuántas UC tiene un semestre o una carrera.")
+
+
+class CourseEntry(NamedTuple):
+    """Una asignatura dentro del plan de estudios de una carrera."""
+    career: str
+    semester: int | None     # Número de semestre, o None en bloques como "semestres_intermedios"
+    semester_label: str      # "3° semestre", "semestres intermedios"
+    course: Course
+
+
+def _match_key(name: str) -> tuple[str, ...]:
+    """Tokens de un nombre de asignatura sin palabras vacías y con los números romanos como dígitos."""
+    return tuple(_ROMAN.get(token, token) for token in tokenize(name) if token not in STOP_WORDS)
+
+
+def _semester_number(key: str) -> int | None:
+    match = _SEMESTER_KEY_RE.match(key)
+    return int(match.group(1)) if match else None
+
+
+def _career_name(keyword: str) -> str:
+    return f"Ingeniería de {keyword.capitalize()}"
+
+
+def _career_names(keywords: list[str]) -> str:
+    names = [_career_name(keyword) for keyword in keywords]
+    return f"{', '.join(names[:-1])} y {names[-1]}" if len(names) > 1 else names[0]
+
+
+def _course_details(course: Course) -> str:
+    details = [detail for detail in (course.code, f"{course.uc} UC" if course.uc is not None else None) if detail]
+    return f"{course.name} ({', '.join(details)})" if details else course.name
+
+
+class CourseIndex:
+    """
+    Índice de las asignaturas de todas las carreras, construido una vez por versión de los datos.
+    Resuelve en tiempo constante (búsquedas en diccionarios) en qué semestre y carrera se ve una
+    asignatura, por su nombre completo, por el comienzo de su nombre ("Matemática" encuentra
+    Matemática I, II y III) o por su código, y las unidades de crédito (UC) de cada semestre y de
+    cada carrera, sumadas de antemano.
+    """
+
+    def __init__(self, study_plans: Mapping[str, tuple[Semester, ...]], carreras_data: Mapping[str, dict]):
+        self._careers = set(study_plans)
+        self._by_code: dict[str, list[CourseEntry]] = {}
+        # Nombre completo o comienzo del nombre (tokens) -> asignaturas
+        self._by_name: dict[tuple[str, ...], list[CourseEntry]] = {}
+        self._by_prefix: dict[tuple[str, ...], list[CourseEntry]] = {}
+        self._max_name_length = 0
+        # (carrera, semestre) -> entradas del semestre y su total de UC (None si falta la UC de alguna)
+        self._semesters: dict[tuple[str, int], tuple[list[CourseEntry], int | None]] = {}
+        # Carrera -> (UC sumadas de las asignaturas o None, total declarado en el JSON o None)
+        self._career_credits: dict[str, tuple[int | None, str | None]] = {}
+
+        for career, semesters in study_plans.items():
+            career_total = 0 if semesters else None
+            for semester in semesters:
+                number = _semester_number(semester.key)
+                label = f"{number}° semestre" if number else semester.key.replace("_", " ")
+                entries = [CourseEntry(career, number, label, course) for course in semester.courses]
+                for entry in entries:
+                    self._add(entry)
+                credits = [entry.course.uc for entry in entries]
+                semester_total = sum(credits) if entries and None not in credits else None
+                if number is not None:
+                    self._semesters[(career, number)] = (entries, semester_total)
+                career_total = career_total + semester_total if None not in (career_total, semester_total) else None
+            declared = (carreras_data.get(career) or {}).get("unidades_credito_totales")
+            self._career_credits[career] = (career_total, str(declared) if declared else None)
+
+        logger.info(f"Índice de asignaturas construido con {len(self._by_name)} nombres "
+                    f"y {len(self._by_code)} códigos.")
+
+    def _add(self, entry: CourseEntry):
+        if entry.course.code:
+            code = entry.course.code.upper()
+            self._by_code.setdefault(code, []).append(entry)
+        key = _match_key(entry.course.name)
+        if not key:
+            return
+        self._by_name.setdefault(key, []).append(entry)
+        self._max_name_length = max(self._max_name_length, len(key))
+        for length in range(1, len(key)):
+            prefix = key[:length]
+            # Un nombre de carrera suelto no es el comienzo de una asignatura ("mecanica", "sistemas")
+            if length == 1 and (prefix[0] in self._careers or prefix[0].isdigit()):
+                continue
+            self._by_prefix.setdefault(prefix, []).append(entry)
+
+    def vocabulary(self) -> set[str]:
+        """Palabras que el índice reconoce, para que el corrector de errores de tipeo no las altere."""
+        words = set(COURSE_CUES) | set(_ORDINAL_WORDS) | _DEFINITION_WORDS
+        for key in self._by_name:
+            words.update(token for token in key if not token.isdigit())
+        return words
+
+    # --- Consultas ---
+
+    def find_code(self, code: str) -> list[CourseEntry]:
+        return self._by_code.get(code.upper().replace(" ", "-"), [])
+
+    def semester_credits(self, career: str, semester: int) -> tuple[list[CourseEntry], int | None] | None:
+        return self._semesters.get((career, semester))
+
+    def career_credits(self, career: str) -> tuple[int | None, str | None] | None:
+        return self._career_credits.get(career)
+
+    def answer(self, query: str) -> str | None:
+        """
+        Responde preguntas sobre asignaturas, semestres o unidades de crédito a partir de la
+        consulta normalizada (sin tildes ni puntuación). Devuelve None si no es una de ellas.
+        """
+        tokens = [_ROMAN.get(token, token) for token in query.split() if token not in STOP_WORDS]
+        if not tokens:
+            return None
+
+        code_entries = self._match_code(tokens)
+        if code_entries:
+            return self._answer_code(code_entries)
+
+        has_cue = any(token in COURSE_CUES for token in tokens)
+        start, end, entries, full_name = self._match_name(tokens)
+        careers = [token for i, token in enumerate(tokens) if token in self._careers and not start <= i < end]
+        if entries and (has_cue or (full_name and end - start > 1)):
+            return self._answer_courses(entries, careers)
+        if not has_cue:
+            return None
+
+        semester = self._match_semester(tokens)
+        if semester is not None:
+            return self._answer_semester(semester, careers, credits_only=bool(_CREDIT_CUES.intersection(tokens)))
+        if _CREDIT_CUES.intersection(tokens):
+            if _DEFINITION_WORDS.union(_CREDIT_CUES).issuperset(tokens):
+                # Pregunta qué son las UC, no cuántas tiene alguna carrera
+                return CREDIT_DEFINITION
+            return self._answer_career_credits(careers)
+        return None
+
+    def _match_code(self, tokens: list[str]) -> list[CourseEntry]:
+        for i, token in enumerate(tokens):
+            match = _CODE_RE.match(token)
+            if match:
+                code = f"{match.group(1)}-{match.group(2)}"
+            elif len(token) == 3 and token.isalpha() and i + 1 < len(tokens) and len(tokens[i + 1]) == 5 \
+                    and tokens[i + 1].isdigit():
+                code = f"{token}-{tokens[i + 1]}"
+            else:
+                continue
+            entries = self.find_code(code)
+            if entries:
+                return entries
+        return []
+
+    def _match_name(self, tokens: list[str]) -> tuple[int, int, list[CourseEntry], bool]:
+        """El nombre (o comienzo de nombre) de asignatura más largo de la consulta: (inicio, fin, entradas, completo)."""
+        best = (0, 0, [], False)
+        for i in range(len(tokens)):
+            for length in range(min(self._max_name_length, len(tokens) - i), 0, -1):
+                if length <= best[1] - best[0]:
+                    break
+                key = tuple(tokens[i:i + length])
+                entries = self._by_name.get(key)
+                if entries:
+                    best = (i, i + length, entries, True)
+                    break
+                entries = self._by_prefix.get(key)
+                if entries:
+                    best = (i, i + length, entries, False)
+                    break
+        return best
+
+    @staticmethod
+    def _match_semester(tokens: list[str]) -> int | None:
+        for i, token in enumerate(tokens):
+            if token not in ("semestre", "semestres"):
+                continue
+            for neighbor in (tokens[i - 1] if i > 0 else None, tokens[i + 1] if i + 1 < len(tokens) else None):
+                if neighbor is None:
+                    continue
+                if neighbor in _ORDINAL_WORDS:
+                    return _ORDINAL_WORDS[neighbor]
+                match = _ORDINAL_RE.match(neighbor)
+                if match:
+                    return int(match.group(1))
+        return None
+
+    # --- Respuestas ---
+
+    @staticmethod
+    def _answer_code(entries: list[CourseEntry]) -> str:
+        course = entries[0].course
+        places = "; ".join(f"{entry.semester_label} de {_career_name(entry.career)}" for entry in entries)
+        uc = f" ({course.uc} UC)" if course.uc is not None else ""
+        return f"{course.code} es {course.name}{uc}, del {places}."
+
+    @staticmethod
+    def _answer_courses(entries: list[CourseEntry], careers: list[str]) -> str:
+        if careers:
+            entries = [entry for entry in entries if entry.career in careers] or entries
+        if len(entries) == 1:
+            entry = entries[0]
+            return f"{_course_details(entry.course)} se ve en el {entry.semester_label} de {_career_name(entry.career)}."
+        lines = [f"- {_course_details(entry.course)}: {entry.semester_label} de {_career_name(entry.career)}"
+                 for entry in entries]
+        return "Estas asignaturas coinciden con tu consulta:\n" + "\n".join(lines)
+
+    def _answer_semester(self, semester: int, careers: list[str], credits_only: bool) -> str | None:
+        """
+        Asignaturas (o UC) de un semestre. Las carreras nombradas en la consulta sin esos datos se
+        informan como tales; sin carrera, se responde con las que los tienen y se nombran las demás.
+        """
+        lines, missing = [], []
+        for career in careers or sorted(self._careers):
+            found = self._semesters.get((career, semester))
+            entries, total = found if found else ([], None)
+            if not entries or (credits_only and total is None):
+                missing.append(career)
+                continue
+            header = f"El {semester}° semestre de {_career_name(career)}"
+            if credits_only:
+                courses = ", ".join(f"{entry.course.name} ({entry.course.uc})" for entry in entries)
+                lines.append(f"{header} tiene {total} UC: {courses}.")
+            else:
+                courses = ", ".join(_course_details(entry.course) for entry in entries)
+                suffix = f" ({total} UC en total)" if total is not None else ""
+                lines.append(f"{header} incluye: {courses}{suffix}.")
+        if missing and (careers or lines):
+            what = "las UC" if credits_only else "las asignaturas"
+            lines.append(f"No tengo {what} del {semester}° semestre de {_career_names(missing)} en los datos locales.")
+        return "\n".join(lines) or None
+
+    def _answer_career_credits(self, careers: list[str]) -> str | None:
+        lines, missing = [], []
+        for career in careers or sorted(self._careers):
+            total, declared = self._career_credits.get(career, (None, None))
+            if total is not None:
+                line = f"Las asignaturas del plan de estudios de {_career_name(career)} suman {total} UC"
+                lines.append(line + (f" (total declarado de la carrera: {declared})." if declared else "."))
+            elif declared:
+                lines.append(f"Unidades de crédito de {_career_name(career)}: {declared}.")
+            else:
+                missing.append(career)
+        if missing:
+            lines.append(f"No tengo las unidades de crédito de {_career_names(missing)} en los datos locales.")
+        return "\n".join(lines) or None
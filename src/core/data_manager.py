@@ -1,73 +1,447 @@
 # src/core/data_manager.py
+import copy
 import json
 import os
 import logging
+import threading
+import time
+from collections import Counter
+from types import MappingProxyType
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from src.core.answer_table import compile_answers, normalize_plan
+from src.core.bm25_index import BM25Index
+from src.core.context_builder import ContextBuilder, RetrievedContext, collect_snippets
+from src.core.course_index import CourseIndex
+from src.core.intent_router import CAREER_TOPIC_PHRASES, UNEFA_TOPIC_PHRASES
+from src.core.kb_snapshot import content_hash, read_snapshot
+from src.core.ngram_index import NGramVectorIndex, Neighbor
+from src.utils.config import (FAQ_MIN_CONFIDENCE, FAQ_MIN_COVERAGE, TRAINING_MIN_SIMILARITY, CONTEXT_MAX_TOKENS,
+                              CONTEXT_TOP_K, KB_SNAPSHOT_FILE, TYPO_MAX_DISTANCE)
+from src.utils.logger import SampledLogger
+from src.utils.text_normalizer import NormalizedQuery, QueryNormalizer, content_tokens, tokenize
+from src.utils.tracing import tracer
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Eventos de cada petición: se escribe uno de cada LOG_SAMPLE_EVERY
+sampled_logger = SampledLogger(logger)
 
-class DataManager:
-    def __init__(self, data_path='data'):
-        self.data_path = data_path
+# Tipos de archivo de data/ y lo que hay que reconstruir cuando cambia cada uno
+_CARRERA = "carrera"
+_FAQS = "faqs"
+_UNEFA = "unefa"
+_TRAINING = "training"
+_ALL_KINDS = frozenset({_CARRERA, _FAQS, _UNEFA, _TRAINING})
+# Errores de un archivo que no se puede leer o cuyo JSON no tiene la forma esperada (una lista
+# donde va un objeto, un 'uc' no numérico...): aparecen al leerlo o al construir los índices
+_DATA_ERRORS = (OSError, ValueError, TypeError, KeyError, AttributeError, IndexError)
+
+# Peso extra de las palabras que reconoce el enrutador de intenciones (carreras y temas), para que
+# ganen los empates al corregir errores de tipeo ('mecanca' -> 'mecanica')
+_ROUTING_WORD_WEIGHT = 1000
+
+
+class ReloadReport(NamedTuple):
+    """Resultado de una recarga de los datos locales."""
+    changed_files: list[str]
+    rebuilt: list[str]      # Índices reconstruidos
+    duration: float         # Segundos
+    error: str | None       # Si no es None, se siguió usando la versión anterior de los datos
+
+
+class DataSnapshot:
+    """
+    Datos cargados de data/ junto con los índices y respuestas que se derivan de ellos.
+    Una vez publicado no se modifica: cada recarga construye otro y lo intercambia.
+    """
+
+    def __init__(self):
         self.carreras_data = {}
         self.faqs_data = {}
         self.unefa_info = {}
-        self._load_all_data()
+        self.training_data = []
+        self.file_stamps: dict[str, tuple[int, int]] = {}  # Ruta -> (mtime_ns, tamaño) al cargarse
+        self.faq_entries = []
+        self.faq_terms: list[frozenset[str]] = []  # Palabras con contenido de cada pregunta de las FAQs
+        self.faq_index: BM25Index | None = None
+        self.training_index: NGramVectorIndex | None = None
+        self.context_builder: ContextBuilder | None = None
+        self.study_plans = MappingProxyType({})
+        self.career_answers = MappingProxyType({})
+        self.course_index: CourseIndex | None = None
+        self.query_normalizer: QueryNormalizer | None = None
+
+    def copy(self) -> "DataSnapshot":
+        """Copia superficial: comparte los índices que no se vayan a reconstruir."""
+        snapshot = copy.copy(self)
+        snapshot.carreras_data = dict(self.carreras_data)
+        snapshot.file_stamps = dict(self.file_stamps)
+        return snapshot
+
+
+class DataManager:
+    def __init__(self, data_path='data', faq_min_confidence: float = FAQ_MIN_CONFIDENCE,
+                 faq_min_coverage: float = FAQ_MIN_COVERAGE, training_min_similarity: float = TRAINING_MIN_SIMILARITY,
+                 context_max_tokens: int = CONTEXT_MAX_TOKENS, context_top_k: int = CONTEXT_TOP_K,
+                 snapshot_file: str = KB_SNAPSHOT_FILE, typo_max_distance: int = TYPO_MAX_DISTANCE):
+        self.data_path = data_path
+        # Instantánea binaria opcional (ver src/core/kb_snapshot.py); "" la desactiva
+        self.snapshot_path = os.path.join(data_path, snapshot_file) if snapshot_file else None
+        self.faq_min_confidence = faq_min_confidence
+        self.faq_min_coverage = faq_min_coverage
+        self.training_min_similarity = training_min_similarity
+        self.context_max_tokens = context_max_tokens
+        self.context_top_k = context_top_k
+        self.typo_max_distance = typo_max_distance
+        self._reload_listeners: list[Callable[["DataManager"], None]] = []
+        self._reload_lock = threading.Lock()
+        self.last_reload: ReloadReport | None = None
+        self._snapshot = self._load_all_data()
+
+    @property
+    def snapshot(self) -> DataSnapshot:
+        """Versión publicada de los datos y sus índices."""
+        return self._snapshot
+
+    # Los datos e índices se leen siempre de la versión publicada. Los métodos de consulta
+    # toman la referencia una sola vez, así una recarga en curso nunca mezcla versiones.
+    carreras_data = property(lambda self: self._snapshot.carreras_data)
+    faqs_data = property(lambda self: self._snapshot.faqs_data)
+    unefa_info = property(lambda self: self._snapshot.unefa_info)
+    training_data = property(lambda self: self._snapshot.training_data)
+    faq_entries = property(lambda self: self._snapshot.faq_entries)
+    faq_index = property(lambda self: self._snapshot.faq_index)
+    training_index = property(lambda self: self._snapshot.training_index)
+    context_builder = property(lambda self: self._snapshot.context_builder)
+    study_plans = property(lambda self: self._snapshot.study_plans)
+    career_answers = property(lambda self: self._snapshot.career_answers)
+    course_index = property(lambda self: self._snapshot.course_index)
+    query_normalizer = property(lambda self: self._snapshot.query_normalizer)
 
-    def _load_all_data(self):
-        """Carga toda la información desde los archivos JSON."""
-        # Cargar información de carreras
+    # --- Carga ---
+
+    def data_files(self) -> dict[str, tuple[int, int]]:
+        """Archivos de datos presentes en disco con su (mtime_ns, tamaño)."""
+        paths = [os.path.join(self.data_path, name) for name in ('faqs.json', 'unefa_info.json', 'training_data.json')]
         carreras_dir = os.path.join(self.data_path, 'carreras')
-        if os.path.exists(carreras_dir):
-            for filename in os.listdir(carreras_dir):
-                if filename.endswith('.json'):
-                    career_name = filename.replace('ingenieria_', '').replace('.json', '')
-                    filepath = os.path.join(carreras_dir, filename)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            self.carreras_data[career_name] = json.load(f)
-                        logger.info(f"Cargada información para {career_name}.")
-                    except Exception as e:
-                        logger.error(f"Error al cargar {filepath}: {e}")
+        if os.path.isdir(carreras_dir):
+            paths += [os.path.join(carreras_dir, name) for name in os.listdir(carreras_dir) if name.endswith('.json')]
+        stamps = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def _file_kind(self, path: str) -> tuple[str, str | None]:
+        """Tipo de un archivo de datos y, para las carreras, su clave ('sistemas', ...)."""
+        filename = os.path.basename(path)
+        if os.path.basename(os.path.dirname(path)) == 'carreras':
+            return _CARRERA, filename.replace('ingenieria_', '').replace('.json', '')
+        return {'faqs.json': _FAQS, 'unefa_info.json': _UNEFA, 'training_data.json': _TRAINING}[filename], None
+
+    def _apply_file(self, snapshot: DataSnapshot, path: str, exists: bool = True) -> str:
+        """
+        Lee un archivo (o aplica su eliminación) sobre el snapshot y devuelve su tipo.
+        Lanza OSError o ValueError si el archivo no se puede leer o no es JSON válido; si el
+        JSON no tiene la forma esperada, el error aparece al construir los índices.
+        """
+        kind, career_name = self._file_kind(path)
+        data = None
+        if exists:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if kind == _CARRERA:
+            if data is None:
+                snapshot.carreras_data.pop(career_name, None)
+            else:
+                snapshot.carreras_data[career_name] = data
+        elif kind == _FAQS:
+            snapshot.faqs_data = data if data is not None else {}
+        elif kind == _UNEFA:
+            snapshot.unefa_info = data if data is not None else {}
         else:
+            snapshot.training_data = data if data is not None else []
+        return kind
+
+    def _load_all_data(self) -> DataSnapshot:
+        """
+        Carga toda la información y sus índices: desde la instantánea binaria si existe y
+        corresponde al contenido actual de data/, o si no desde los archivos JSON.
+        """
+        snapshot = DataSnapshot()
+        snapshot.file_stamps = self.data_files()
+        if self.snapshot_path and self._load_binary_snapshot(snapshot):
+            return snapshot
+
+        carreras_dir = os.path.join(self.data_path, 'carreras')
+        if not os.path.exists(carreras_dir):
             logger.warning(f"Directorio de carreras no encontrado: {carreras_dir}")
+        for name in ('faqs.json', 'unefa_info.json', 'training_data.json'):
+            path = os.path.join(self.data_path, name)
+            if path not in snapshot.file_stamps:
+                logger.warning(f"Archivo de datos no encontrado: {path}")
 
-        # Cargar FAQs generales
-        faqs_path = os.path.join(self.data_path, 'faqs.json')
-        if os.path.exists(faqs_path):
+        loaded = []
+        for path in sorted(snapshot.file_stamps):
             try:
-                with open(faqs_path, 'r', encoding='utf-8') as f:
-                    self.faqs_data = json.load(f)
-                logger.info("Cargadas FAQs generales.")
-            except Exception as e:
-                logger.error(f"Error al cargar {faqs_path}: {e}")
-        else:
-            logger.warning(f"Archivo de FAQs no encontrado: {faqs_path}")
+                self._apply_file(snapshot, path)
+                loaded.append(path)
+                logger.info(f"Cargado {path}.")
+            except _DATA_ERRORS as e:
+                # En la carga inicial un archivo dañado no impide usar el resto
+                logger.error(f"Error al cargar {path}: {e}")
+        logger.info(f"Cargadas {len(snapshot.carreras_data)} carreras y "
+                    f"{len(snapshot.training_data)} ejemplos de entrenamiento.")
+        try:
+            self._build_indexes(snapshot, _ALL_KINDS)
+        except _DATA_ERRORS as e:
+            # Algún archivo tiene datos con una forma inesperada: se descartan los que fallan solos
+            logger.error(f"Error al construir los índices: {e}. Se descartan los archivos con datos inválidos.")
+            for path in self._invalid_files(loaded):
+                self._apply_file(snapshot, path, exists=False)
+            try:
+                self._build_indexes(snapshot, _ALL_KINDS)
+            except _DATA_ERRORS as e:
+                logger.error(f"Error al construir los índices: {e}. Se arranca sin datos locales.")
+                stamps, snapshot = snapshot.file_stamps, DataSnapshot()
+                snapshot.file_stamps = stamps
+                self._build_indexes(snapshot, _ALL_KINDS)
+        return snapshot
 
-        # Cargar información general de la UNEFA
-        unefa_info_path = os.path.join(self.data_path, 'unefa_info.json')
-        if os.path.exists(unefa_info_path):
+    def _invalid_files(self, paths: list[str]) -> list[str]:
+        """Archivos con los que, cargados solos, no se pueden construir los índices."""
+        invalid = []
+        for path in paths:
+            alone = DataSnapshot()
             try:
-                with open(unefa_info_path, 'r', encoding='utf-8') as f:
-                    self.unefa_info = json.load(f)
-                logger.info("Cargada información general de la UNEFA.")
-            except Exception as e:
-                logger.error(f"Error al cargar {unefa_info_path}: {e}")
-        else:
-            logger.warning(f"Archivo de información de UNEFA no encontrado: {unefa_info_path}")
+                self._apply_file(alone, path)
+                self._build_indexes(alone, _ALL_KINDS)
+            except _DATA_ERRORS as e:
+                logger.error(f"Datos inválidos en {path}: {e}")
+                invalid.append(path)
+        return invalid
+
+    def _load_binary_snapshot(self, snapshot: DataSnapshot) -> bool:
+        """Rellena el snapshot desde la instantánea binaria. Devuelve False si no existe o está desactualizada."""
+        start = time.perf_counter()
+        try:
+            contents = read_snapshot(self.snapshot_path, content_hash(list(snapshot.file_stamps), self.data_path))
+        except OSError as e:
+            logger.warning(f"No se pudo leer la instantánea {self.snapshot_path}: {e}")
+            return False
+        if contents is None:
+            return False
+
+        snapshot.carreras_data = contents.carreras_data
+        snapshot.faqs_data = contents.faqs_data
+        snapshot.unefa_info = contents.unefa_info
+        snapshot.training_data = contents.training_data
+        snapshot.faq_entries = snapshot.faqs_data.get("preguntas_frecuentes", [])
+        snapshot.faq_terms = [frozenset(content_tokens(qa["pregunta"])) for qa in snapshot.faq_entries]
+        snapshot.faq_index = contents.faq_index
+        snapshot.training_index = contents.training_index
+        snapshot.context_builder = ContextBuilder(contents.snippets, max_tokens=self.context_max_tokens,
+                                                  top_k=self.context_top_k, index=contents.context_index)
+        snapshot.study_plans = MappingProxyType({keyword: normalize_plan(info.get("plan_estudios") or {})
+                                                 for keyword, info in snapshot.carreras_data.items()})
+        snapshot.career_answers = MappingProxyType(contents.career_answers)
+        snapshot.course_index = CourseIndex(snapshot.study_plans, snapshot.carreras_data)
+        self._build_query_normalizer(snapshot)
+        logger.info(f"Base de conocimiento cargada desde {self.snapshot_path} "
+                    f"en {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return True
+
+    def _build_indexes(self, snapshot: DataSnapshot, changed_kinds: set[str]) -> list[str]:
+        """Reconstruye solo lo que depende de los tipos de archivo modificados. Devuelve lo reconstruido."""
+        rebuilt = []
+        if _FAQS in changed_kinds:
+            self._build_faq_index(snapshot)
+            rebuilt.append("faq")
+        if _TRAINING in changed_kinds:
+            self._build_training_index(snapshot)
+            rebuilt.append("entrenamiento")
+        if changed_kinds & {_CARRERA, _FAQS, _UNEFA}:
+            self._build_context_index(snapshot)
+            rebuilt.append("contexto")
+        if _CARRERA in changed_kinds:
+            self._compile_career_answers(snapshot)
+            rebuilt.append("respuestas")
+        if changed_kinds:
+            # El vocabulario sale de todos los tipos de archivo
+            self._build_query_normalizer(snapshot)
+            rebuilt.append("normalizacion")
+        return rebuilt
+
+    def _build_faq_index(self, snapshot: DataSnapshot):
+        """Indexa las preguntas de las FAQs para la búsqueda por relevancia."""
+        snapshot.faq_entries = snapshot.faqs_data.get("preguntas_frecuentes", [])
+        snapshot.faq_terms = [frozenset(content_tokens(qa["pregunta"])) for qa in snapshot.faq_entries]
+        snapshot.faq_index = BM25Index([qa["pregunta"] for qa in snapshot.faq_entries])
+
+    def _build_training_index(self, snapshot: DataSnapshot):
+        """Indexa los prompts de entrenamiento para la búsqueda de vecinos más cercanos."""
+        snapshot.training_index = NGramVectorIndex([pair["prompt"] for pair in snapshot.training_data])
+
+    def _build_context_index(self, snapshot: DataSnapshot):
+        """Indexa fragmentos de carreras, FAQs e información de la UNEFA para dar contexto a Gemini."""
+        snippets = collect_snippets(snapshot.carreras_data, snapshot.faqs_data, snapshot.unefa_info)
+        snapshot.context_builder = ContextBuilder(snippets, max_tokens=self.context_max_tokens,
+                                                  top_k=self.context_top_k)
+
+    def _compile_career_answers(self, snapshot: DataSnapshot):
+        """Normaliza los planes de estudio y renderiza de antemano las respuestas de cada (carrera, tema)."""
+        snapshot.study_plans, snapshot.career_answers = compile_answers(snapshot.carreras_data)
+        snapshot.course_index = CourseIndex(snapshot.study_plans, snapshot.carreras_data)
+        logger.info(f"Precompiladas {len(snapshot.career_answers)} respuestas de carreras.")
+
+    def _build_query_normalizer(self, snapshot: DataSnapshot):
+        """
+        Construye el corrector de consultas con el vocabulario del dominio: los términos de los
+        índices de FAQs y de contexto (con su número de documentos), los prompts de entrenamiento,
+        las carreras y frases de intención y las palabras de las asignaturas y semestres.
+        """
+        start = time.perf_counter()
+        vocabulary = Counter()
+        for index in (snapshot.faq_index, snapshot.context_builder.index):
+            document_counts = np.diff(index.indptr)
+            for term, term_id in index.vocabulary.items():
+                vocabulary[term] += int(document_counts[term_id])
+        for pair in snapshot.training_data:
+            vocabulary.update(tokenize(pair["prompt"]))
+        routing_phrases = [*snapshot.carreras_data, *snapshot.unefa_info, *snapshot.course_index.vocabulary()]
+        for phrases_by_topic in (CAREER_TOPIC_PHRASES, UNEFA_TOPIC_PHRASES):
+            for phrases in phrases_by_topic.values():
+                routing_phrases.extend(phrases)
+        for phrase in routing_phrases:
+            for token in tokenize(phrase):
+                vocabulary[token] += _ROUTING_WORD_WEIGHT
+        snapshot.query_normalizer = QueryNormalizer(dict(vocabulary), self.typo_max_distance)
+        logger.info(f"Normalizador de consultas construido con {len(vocabulary)} palabras "
+                    f"en {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+    # --- Recarga ---
+
+    def reload(self, full: bool = False) -> ReloadReport:
+        """
+        Vuelve a leer los archivos de data/ que cambiaron desde la última carga (todos si
+        full es True), reconstruye solo los índices afectados y publica la nueva versión
+        de una sola vez. Si algún archivo no se puede leer o sus datos no tienen la forma
+        esperada, se sigue usando la anterior.
+        Tras publicar, avisa a los suscriptores registrados con add_reload_listener.
+        """
+        start = time.perf_counter()
+        with self._reload_lock:
+            current = self._snapshot
+            stamps = self.data_files()
+            changed = sorted(path for path in set(stamps) | set(current.file_stamps)
+                             if full or stamps.get(path) != current.file_stamps.get(path))
+            if not changed:
+                return ReloadReport([], [], time.perf_counter() - start, None)
+
+            # La nueva versión se construye aparte; si algo falla, se descarta entera
+            snapshot = current.copy()
+            changed_kinds = set()
+            step = None
+            try:
+                for step in changed:
+                    changed_kinds.add(self._apply_file(snapshot, step, exists=step in stamps))
+                step = "índices"
+                snapshot.file_stamps = stamps
+                rebuilt = self._build_indexes(snapshot, changed_kinds)
+            except _DATA_ERRORS as e:
+                report = ReloadReport(changed, [], time.perf_counter() - start, f"{step}: {e}")
+                self.last_reload = report
+                logger.error(f"No se pudo recargar ({step}): {e}. Se siguen usando los datos anteriores.")
+                return report
+            # Intercambio atómico: las consultas ven la versión anterior o la nueva, nunca una mezcla
+            self._snapshot = snapshot
+
+        report = ReloadReport(changed, rebuilt, time.perf_counter() - start, None)
+        self.last_reload = report
+        tracer.observe("data_reload", report.duration)
+        logger.info(f"Datos locales recargados en {report.duration * 1000:.1f} ms "
+                    f"({len(changed)} archivos; reconstruido: {', '.join(rebuilt)}).")
+        for listener in self._reload_listeners:
+            listener(self)
+        return report
+
+    def add_reload_listener(self, listener: Callable[["DataManager"], None]):
+        """Registra una función que se llamará tras cada recarga de los datos."""
+        self._reload_listeners.append(listener)
+
+    # --- Consultas ---
 
     def get_career_info(self, career_name: str) -> dict:
         """Obtiene la información de una carrera específica."""
-        return self.carreras_data.get(career_name.lower(), {})
+        return self._snapshot.carreras_data.get(career_name.lower(), {})
+
+    def get_career_answer(self, career_name: str, topic: str | None = None) -> str | None:
+        """Respuesta precompilada sobre un tema de una carrera; el resumen general si el tema no tiene una."""
+        career_answers = self._snapshot.career_answers
+        career_name = career_name.lower()
+        return career_answers.get((career_name, topic)) or career_answers.get((career_name, None))
+
+    def warm_up(self):
+        """Construye por adelantado lo que se crea con la primera consulta (el índice del corrector de tipeo)."""
+        self._snapshot.query_normalizer.corrector.warm_up()
+
+    def normalize_query(self, question: str) -> NormalizedQuery:
+        """Pliega tildes, quita la puntuación y corrige errores de tipeo contra el vocabulario de los datos."""
+        return self._snapshot.query_normalizer.normalize(question)
+
+    def get_course_answer(self, question: str) -> str | None:
+        """
+        Respuesta exacta a preguntas sobre asignaturas (semestre y carrera por nombre o código) y
+        unidades de crédito de un semestre o de una carrera. 'question' debe venir normalizada.
+        """
+        return self._snapshot.course_index.answer(question)
 
     def get_faq_answer(self, question: str) -> str | None:
-        """Busca una respuesta a una pregunta frecuente."""
-        # Simple búsqueda por coincidencias, se podría mejorar con algoritmos de similitud.
-        for qa in self.faqs_data.get("preguntas_frecuentes", []):
-            if question.lower() in qa["pregunta"].lower():
-                return qa["respuesta"]
-        return None
+        """
+        Busca la pregunta frecuente más parecida a la consulta.
+        Solo devuelve su respuesta si la confianza supera el umbral configurado y la pregunta de
+        la FAQ contiene suficientes palabras con contenido de la consulta: una palabra rara en
+        común ("biblioteca") no basta si la consulta pregunta por otra cosa ("horario").
+        """
+        snapshot = self._snapshot
+        results = snapshot.faq_index.search(question, top_k=1)
+        if not results or results[0].confidence < self.faq_min_confidence:
+            return None
+        best = results[0]
+        terms = set(content_tokens(question))
+        coverage = len(terms & snapshot.faq_terms[best.doc_id]) / len(terms) if terms else 0.0
+        if coverage < self.faq_min_coverage:
+            return None
+        sampled_logger.info("FAQ encontrada (puntuación %.2f, confianza %.2f, cobertura %.2f).",
+                            best.score, best.confidence, coverage)
+        return snapshot.faq_entries[best.doc_id]["respuesta"]
 
     def get_unefa_general_info(self, topic: str) -> str | None:
         """Obtiene información general de la UNEFA por tema."""
-        return self.unefa_info.get(topic.lower(), None)
\ No newline at end of file
+        return self._snapshot.unefa_info.get(topic.lower(), None)
+
+    def get_training_answer(self, question: str) -> str | None:
+        """Devuelve la respuesta del ejemplo de entrenamiento más parecido, si es suficientemente similar."""
+        snapshot = self._snapshot
+        neighbors = snapshot.training_index.search(question, top_k=1)
+        if neighbors and neighbors[0].similarity >= self.training_min_similarity:
+            best = neighbors[0]
+            sampled_logger.info("Ejemplo de entrenamiento encontrado (similitud %.2f).", best.similarity)
+            return snapshot.training_data[best.doc_id]["completion"]
+        return None
+
+    def match_training_batch(self, questions: list[str], top_k: int = 1) -> list[list[Neighbor]]:
+        """
+        Busca los ejemplos de entrenamiento más cercanos para muchas preguntas a la vez.
+        Pensado para analizar fuera de línea la cobertura de preguntas registradas.
+        """
+        return self._snapshot.training_index.search_batch(questions, top_k)
+
+    def get_context(self, question: str, max_tokens: int | None = None) -> RetrievedContext:
+        """Fragmentos de los datos locales relevantes para la pregunta, dentro del presupuesto de tokens."""
+        return self._snapshot.context_builder.build(question, max_tokens)
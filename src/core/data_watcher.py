@@ -0,0 +1,52 @@
+# src/core/data_watcher.py
+import logging
+import threading
+
+from src.core.data_manager import DataManager, ReloadReport
+
+logger = logging.getLogger(__name__)
+
+
+class DataWatcher:
+    """
+    Vigila los archivos de data/ y data/carreras/ consultando su fecha de modificación
+    y tamaño cada 'interval_seconds'. Cuando algo cambia, recarga los datos desde su
+    propio hilo, de modo que las consultas siguen atendiéndose con la versión anterior
+    hasta que la nueva está lista.
+    """
+
+    def __init__(self, data_manager: DataManager, interval_seconds: float = 2.0):
+        self.data_manager = data_manager
+        self.interval_seconds = interval_seconds
+        self._last_seen = data_manager.data_files()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> ReloadReport | None:
+        """Comprueba una vez si hay cambios y, si los hay, recarga. Devuelve el resultado de la recarga."""
+        stamps = self.data_manager.data_files()
+        if stamps == self._last_seen:
+            return None
+        # Se recuerda lo visto aunque la recarga falle, para no reintentar un archivo dañado
+        # en cada sondeo; se volverá a intentar cuando el archivo cambie de nuevo.
+        self._last_seen = stamps
+        return self.data_manager.reload()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error al vigilar los archivos de datos: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"Vigilando {self.data_manager.data_path} cada {self.interval_seconds:g} s.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 1)
+            self._thread = None
@@ -0,0 +1,113 @@
+# src/core/intent_router.py
+import logging
+from typing import NamedTuple, Iterable
+
+from src.utils.text_normalizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Frases que identifican cada tema de una carrera. El orden define la prioridad
+# cuando un mensaje menciona varios temas a la vez.
+CAREER_TOPIC_PHRASES = {
+    "plan_estudios": ["plan de estudio", "plan de estudios", "pensum"],
+    "perfil_egresado": ["perfil", "egresado"],
+    "salidas_profesionales": ["salidas profesionales", "campo laboral"],
+    "descripcion": ["descripcion", "que es"],
+    "duracion": ["duracion"],
+}
+
+# Frases que identifican cada tema de información general de la UNEFA.
+UNEFA_TOPIC_PHRASES = {
+    "contacto": ["contacto", "telefono", "ubicacion"],
+    "mision": ["mision"],
+    "vision": ["vision"],
+    "nombre_institucion": ["nombre de la institucion", "nombre de la universidad"],
+}
+
+# Tipos de entrada del índice
+_CAREER = 0
+_CAREER_TOPIC = 1
+_UNEFA_TOPIC = 2
+
+
+class Intent(NamedTuple):
+    """Resultado del enrutamiento: carrera y/o tema detectados en el mensaje."""
+    career: str | None
+    topic: str | None
+
+
+class IntentRouter:
+    """
+    Enrutador de intenciones basado en un índice invertido token -> intención.
+    El índice se construye una sola vez y cada mensaje se resuelve con una
+    única pasada sobre sus tokens, sin importar cuántas carreras o temas existan.
+    Frases y mensajes se comparan sin tildes ("Mecánica" encuentra "mecanica").
+    Con pocas carreras, tokenizar el mensaje cuesta más que la propia búsqueda: quien ya
+    tiene los tokens (como ChatbotLogic, tras normalizar la consulta) usa route_tokens().
+    """
+
+    def __init__(self, careers: Iterable[str], unefa_topics: Iterable[str]):
+        # Primer token de la frase -> [(resto de tokens de la frase, entrada)]
+        self._index: dict[str, list[tuple[tuple[str, ...], tuple[int, str, int]]]] = {}
+
+        for career in careers:
+            self._add_phrase(career, (_CAREER, career, 0))
+
+        for priority, (topic, phrases) in enumerate(CAREER_TOPIC_PHRASES.items()):
+            for phrase in phrases:
+                self._add_phrase(phrase, (_CAREER_TOPIC, topic, priority))
+
+        available_unefa_topics = set(unefa_topics)
+        for priority, (topic, phrases) in enumerate(UNEFA_TOPIC_PHRASES.items()):
+            if topic not in available_unefa_topics:
+                continue
+            for phrase in phrases:
+                self._add_phrase(phrase, (_UNEFA_TOPIC, topic, priority))
+
+        n_phrases = sum(len(candidates) for candidates in self._index.values())
+        logger.info(f"Índice de intenciones construido con {n_phrases} frases.")
+
+    def _add_phrase(self, phrase: str, entry: tuple[int, str, int]):
+        """Registra una frase (secuencia de tokens) en el índice."""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        self._index.setdefault(tokens[0], []).append((tuple(tokens[1:]), entry))
+
+    def route(self, message: str) -> Intent | None:
+        """
+        Detecta la carrera y el tema de un mensaje.
+        Devuelve None si el mensaje no corresponde a ninguna intención local.
+        """
+        return self.route_tokens(tuple(tokenize(message)))
+
+    def route_tokens(self, tokens: tuple[str, ...]) -> Intent | None:
+        """Como route(), con el mensaje ya tokenizado (p. ej. NormalizedQuery.tokens)."""
+        index = self._index
+
+        career = None
+        career_topic, career_topic_priority = None, len(CAREER_TOPIC_PHRASES)
+        unefa_topic, unefa_topic_priority = None, len(UNEFA_TOPIC_PHRASES)
+
+        for i, token in enumerate(tokens):
+            candidates = index.get(token)
+            if candidates is None:
+                continue
+            for rest, (kind, value, priority) in candidates:
+                if rest and tokens[i + 1:i + 1 + len(rest)] != rest:
+                    continue
+                if kind == _CAREER:
+                    # La primera carrera mencionada en el mensaje es la que se usa
+                    if career is None:
+                        career = value
+                elif kind == _CAREER_TOPIC:
+                    if priority < career_topic_priority:
+                        career_topic, career_topic_priority = value, priority
+                elif priority < unefa_topic_priority:
+                    unefa_topic, unefa_topic_priority = value, priority
+
+        if career is not None:
+            return Intent(career, career_topic)
+        if unefa_topic is not None:
+            return Intent(None, unefa_topic)
+        return None
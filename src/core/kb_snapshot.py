@@ -0,0 +1,207 @@
+# src/core/kb_snapshot.py
+"""
+Instantánea binaria de la base de conocimiento (data/ y sus índices derivados).
+
+El archivo tiene un prefijo fijo (firma, versión del formato y tamaño de la cabecera),
+una cabecera JSON con los datos y la tabla de cadenas (vocabularios, fragmentos y
+respuestas precompiladas) y, alineados a 64 bytes, los arreglos NumPy de los índices.
+DataManager la abre con mmap, de modo que los arreglos no se copian ni se recalculan;
+si la huella del contenido de data/ (y de cómo se derivan los índices) no coincide, vuelve
+a cargar los JSON.
+
+Construcción: python -m src.core.kb_snapshot [--data data]
+"""
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from src.core import answer_table, bm25_index, context_builder, ngram_index
+from src.core.bm25_index import BM25Index
+from src.core.context_builder import Snippet
+from src.core.ngram_index import NGramVectorIndex
+from src.utils import text_normalizer
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IKBSNAP\0"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sII")  # firma, versión, longitud de la cabecera JSON
+_ALIGNMENT = 64
+# Versión de cómo se derivan los índices y las respuestas guardadas. Entra en la huella junto con
+# el código de los módulos que los construyen (tokenizador, BM25 con su k1 y b, n-gramas con su
+# número de dimensiones, fragmentos de contexto y formato de las respuestas), así que cambiar ese
+# código ya invalida las instantáneas; se sube si la derivación cambia por otro motivo.
+DERIVATION_VERSION = 1
+_DERIVATION_MODULES = (text_normalizer, bm25_index, ngram_index, context_builder, answer_table)
+
+
+class SnapshotContents(NamedTuple):
+    """Lo que se lee de una instantánea: datos originales e índices listos para usar."""
+    carreras_data: dict
+    faqs_data: dict
+    unefa_info: dict
+    training_data: list
+    faq_index: BM25Index
+    training_index: NGramVectorIndex
+    snippets: list[Snippet]
+    context_index: BM25Index
+    career_answers: dict[tuple[str, str | None], str]
+
+
+@functools.cache
+def derivation_hash() -> bytes:
+    """Huella de DERIVATION_VERSION y del código de los módulos que construyen los índices y respuestas."""
+    digest = hashlib.sha256(f"d{DERIVATION_VERSION}".encode("ascii"))
+    for module in _DERIVATION_MODULES:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def content_hash(paths: list[str], data_path: str) -> str:
+    """
+    Huella SHA-256 del contenido de los archivos de datos (y de sus rutas relativas), del
+    formato y de la derivación de los índices.
+    """
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}".encode("ascii"))
+    digest.update(derivation_hash())
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, data_path).replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _bm25_arrays(prefix: str, index: BM25Index) -> dict[str, np.ndarray]:
+    return {f"{prefix}.idf": index.idf, f"{prefix}.indptr": index.indptr,
+            f"{prefix}.doc_ids": index.doc_ids, f"{prefix}.weights": index.weights}
+
+
+def _bm25_from(prefix: str, header: dict, arrays: dict[str, np.ndarray]) -> BM25Index:
+    return BM25Index.from_arrays(header[f"{prefix}_n_docs"], header[f"{prefix}_vocabulary"],
+                                 arrays[f"{prefix}.idf"], arrays[f"{prefix}.indptr"],
+                                 arrays[f"{prefix}.doc_ids"], arrays[f"{prefix}.weights"])
+
+
+def write_snapshot(path: str, snapshot, data_hash: str):
+    """
+    Escribe la instantánea de un DataSnapshot ya construido. Se escribe en un archivo
+    temporal y se renombra, para que un proceso que la esté abriendo nunca vea un archivo a medias.
+    """
+    context_builder = snapshot.context_builder
+    arrays = {**_bm25_arrays("faq", snapshot.faq_index), **_bm25_arrays("context", context_builder.index),
+              "training.matrix": snapshot.training_index.matrix}
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _align(offset + array.nbytes)
+
+    by_term_id = lambda vocabulary: sorted(vocabulary, key=vocabulary.get)
+    header = {
+        "content_hash": data_hash,
+        "created_at": time.time(),
+        "data": {"carreras": snapshot.carreras_data, "faqs": snapshot.faqs_data,
+                 "unefa_info": snapshot.unefa_info, "training": snapshot.training_data},
+        "faq_n_docs": snapshot.faq_index.n_docs,
+        "faq_vocabulary": by_term_id(snapshot.faq_index.vocabulary),
+        "context_n_docs": context_builder.index.n_docs,
+        "context_vocabulary": by_term_id(context_builder.index.vocabulary),
+        "ngram_size": snapshot.training_index.ngram_size,
+        "snippets": [list(s) for s in context_builder.snippets],
+        "career_answers": [[career, topic, text] for (career, topic), text in snapshot.career_answers.items()],
+        "arrays": layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str, expected_hash: str) -> SnapshotContents | None:
+    """
+    Abre la instantánea con mmap. Devuelve None si no existe, tiene otro formato o
+    se construyó con otro contenido de data/ (en ese caso hay que cargar los JSON).
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, header_len = _PREFIX.unpack_from(mapped, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            logger.warning(f"Instantánea {path} con formato desconocido; se ignora.")
+            return None
+        header = json.loads(mapped[_PREFIX.size:_PREFIX.size + header_len])
+        if header["content_hash"] != expected_hash:
+            logger.info(f"Instantánea {path} desactualizada respecto a data/; se cargan los JSON.")
+            return None
+
+        data_start = _align(_PREFIX.size + header_len)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            arrays[name] = np.frombuffer(mapped, dtype=np.dtype(spec["dtype"]), count=math.prod(shape),
+                                         offset=data_start + spec["offset"]).reshape(shape)
+    except (struct.error, ValueError, KeyError) as e:
+        logger.warning(f"Instantánea {path} dañada ({e}); se cargan los JSON.")
+        return None
+
+    data = header["data"]
+    snippets = [Snippet(*fields) for fields in header["snippets"]]
+    return SnapshotContents(
+        carreras_data=data["carreras"], faqs_data=data["faqs"], unefa_info=data["unefa_info"],
+        training_data=data["training"],
+        faq_index=_bm25_from("faq", header, arrays),
+        training_index=NGramVectorIndex.from_matrix(arrays["training.matrix"], header["ngram_size"]),
+        snippets=snippets,
+        context_index=_bm25_from("context", header, arrays),
+        career_answers={(career, topic): text for career, topic, text in header["career_answers"]},
+    )
+
+
+def main():
+    from src.core.data_manager import DataManager
+    from src.utils.config import KB_SNAPSHOT_FILE
+
+    parser = argparse.ArgumentParser(description="Construye la instantánea binaria de la base de conocimiento.")
+    parser.add_argument("--data", default="data", help="Directorio de datos.")
+    parser.add_argument("--salida", default=None, dest="output",
+                        help="Archivo de salida (por defecto, KB_SNAPSHOT_FILE dentro de --data).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data_manager = DataManager(args.data, snapshot_file="")
+    output = args.output or os.path.join(args.data, KB_SNAPSHOT_FILE or "kb_snapshot.bin")
+    data_hash = content_hash(list(data_manager.data_files()), args.data)
+    write_snapshot(output, data_manager.snapshot, data_hash)
+    print(f"Instantánea escrita en {output} ({os.path.getsize(output) / 1024:.1f} KiB) "
+          f"en {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+
+if __name__ == "__main__":
+    main()
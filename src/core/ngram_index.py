@@ -0,0 +1,96 @@
+# src/core/ngram_index.py
+import logging
+import zlib
+from typing import NamedTuple
+
+import numpy as np
+
+from src.utils.text_normalizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class Neighbor(NamedTuple):
+    """Documento cercano a una consulta y su similitud coseno (0..1)."""
+    doc_id: int
+    similarity: float
+
+
+def _hash_ngram(ngram: str, n_features: int) -> int:
+    # crc32 es estable entre ejecuciones (a diferencia de hash() con cadenas)
+    return zlib.crc32(ngram.encode("utf-8")) % n_features
+
+
+class NGramVectorIndex:
+    """
+    Índice de vecinos más cercanos sobre vectores de n-gramas de caracteres.
+    Cada texto se convierte en un vector de dimensión fija mediante hashing de sus
+    n-gramas; los vectores normalizados se guardan en una matriz NumPy contigua y
+    la similitud coseno con todos los documentos se obtiene con un solo producto
+    matriz-vector.
+    """
+
+    def __init__(self, documents: list[str], ngram_size: int = 3, n_features: int = 4096):
+        self.ngram_size = ngram_size
+        self.n_features = n_features
+        self.matrix = self.vectorize_batch(documents)
+        logger.info(f"Índice de n-gramas construido: {len(documents)} documentos, {n_features} dimensiones.")
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, ngram_size: int = 3) -> "NGramVectorIndex":
+        """Reconstruye un índice a partir de su matriz ya calculada (p. ej. leída de una instantánea)."""
+        index = cls.__new__(cls)
+        index.ngram_size = ngram_size
+        index.n_features = matrix.shape[1]
+        index.matrix = matrix
+        return index
+
+    def _ngrams(self, text: str) -> list[str]:
+        """Extrae los n-gramas de caracteres de cada palabra (con bordes marcados)."""
+        ngrams = []
+        n = self.ngram_size
+        for token in tokenize(text):
+            padded = f" {token} "
+            if len(padded) <= n:
+                ngrams.append(padded)
+            else:
+                ngrams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return ngrams
+
+    def vectorize_batch(self, texts: list[str]) -> np.ndarray:
+        """Convierte una lista de textos en una matriz (textos x dimensiones) de filas normalizadas."""
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for ngram in self._ngrams(text):
+                matrix[row, _hash_ngram(ngram, self.n_features)] += 1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def search(self, query: str, top_k: int = 1) -> list[Neighbor]:
+        """Devuelve los top_k documentos más similares a la consulta."""
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries: list[str], top_k: int = 1, chunk_size: int = 1024) -> list[list[Neighbor]]:
+        """
+        Busca los top_k vecinos de muchas consultas a la vez.
+        Las consultas se procesan por bloques con un producto de matrices por bloque.
+        """
+        n_docs = self.matrix.shape[0]
+        if not n_docs:
+            return [[] for _ in queries]
+        top_k = min(top_k, n_docs)
+
+        results = []
+        for start in range(0, len(queries), chunk_size):
+            query_matrix = self.vectorize_batch(queries[start:start + chunk_size])
+            similarities = query_matrix @ self.matrix.T
+            # Selección parcial de los top_k y luego orden solo entre ellos
+            candidates = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+            candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind="stable")
+            best = np.take_along_axis(candidates, order, axis=1)
+            best_scores = np.take_along_axis(candidate_scores, order, axis=1)
+            for doc_ids, scores in zip(best, best_scores):
+                results.append([Neighbor(int(d), float(s)) for d, s in zip(doc_ids, scores) if s > 0])
+        return results
@@ -0,0 +1,167 @@
+# src/gui/animation.py
+"""
+Planificador único de las animaciones de la interfaz.
+
+Un solo temporizador after() avanza, a una frecuencia fija, todas las animaciones activas
+en una pasada y después ejecuta una vez por cuadro los callbacks de geometría pedidos con
+request_layout (varias animaciones que mueven burbujas provocan un único reacomodo). Con
+movimiento reducido las animaciones saltan directamente a su estado final y el temporizador
+no llega a arrancar. Cada cuadro registra cuánto tardaron las animaciones y el reacomodo.
+"""
+import time
+from collections import deque
+from typing import Callable, Hashable, NamedTuple
+
+FRAME_RATE = 30
+# Cuadros recientes que se conservan para las estadísticas
+FRAME_HISTORY = 120
+
+
+class FrameStats(NamedTuple):
+    frames: int           # Cuadros ejecutados desde el inicio
+    active: int           # Animaciones en curso
+    avg_tick_ms: float    # Duración media de un cuadro (animaciones + reacomodo), cuadros recientes
+    max_tick_ms: float
+    avg_layout_ms: float  # Parte del cuadro dedicada a los callbacks de geometría
+    max_layout_ms: float
+
+
+class Animation:
+    """Animación que avanza según el tiempo transcurrido desde que empezó."""
+
+    def step(self, elapsed: float) -> bool:
+        """Aplica el estado en 'elapsed' segundos. Devuelve False cuando terminó."""
+        raise NotImplementedError
+
+    def finish(self):
+        """Aplica el estado final (movimiento reducido o cancelación)."""
+        raise NotImplementedError
+
+
+class Tween(Animation):
+    """Interpola linealmente un valor de 'start' a 'end' en 'duration' segundos."""
+
+    def __init__(self, start: float, end: float, duration: float, apply: Callable[[float], None]):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.apply = apply
+
+    def step(self, elapsed: float) -> bool:
+        progress = min(1.0, elapsed / self.duration) if self.duration > 0 else 1.0
+        self.apply(self.start + (self.end - self.start) * progress)
+        return progress < 1.0
+
+    def finish(self):
+        self.apply(self.end)
+
+
+class Cycle(Animation):
+    """Recorre los índices 0..count-1 cada 'period' segundos hasta que se cancela; en reposo aplica None."""
+
+    def __init__(self, count: int, period: float, apply: Callable[[int | None], None]):
+        self.count = count
+        self.period = period
+        self.apply = apply
+        self._current = None
+
+    def step(self, elapsed: float) -> bool:
+        index = int(elapsed / self.period) % self.count
+        if index != self._current:
+            self._current = index
+            self.apply(index)
+        return True
+
+    def finish(self):
+        self._current = None
+        self.apply(None)
+
+
+class AnimationScheduler:
+    """Avanza todas las animaciones activas con un único temporizador de Tk."""
+
+    def __init__(self, root, frame_rate: int = FRAME_RATE, reduced_motion: bool = False):
+        self.root = root
+        self.frame_ms = max(1, round(1000 / frame_rate))
+        self.reduced_motion = reduced_motion
+        self.frames = 0
+        self._animations: dict[Hashable, tuple[Animation, float]] = {}
+        self._layout_callbacks: dict[Callable[[], None], None] = {}  # Conjunto ordenado
+        self._frame_times: deque[tuple[float, float]] = deque(maxlen=FRAME_HISTORY)
+        self._job = None
+        self._in_tick = False  # Lo pedido durante un cuadro se atiende en ese mismo cuadro
+
+    def start(self, key: Hashable, animation: Animation):
+        """Inicia la animación (reemplaza la que tuviera la misma clave) y aplica su estado inicial."""
+        self._animations.pop(key, None)
+        if self.reduced_motion:
+            animation.finish()
+            return
+        if animation.step(0.0):
+            self._animations[key] = (animation, time.perf_counter())
+            self._ensure_ticking()
+
+    def cancel(self, key: Hashable, finish: bool = True):
+        """Detiene la animación; con finish=True se aplica su estado final."""
+        entry = self._animations.pop(key, None)
+        if entry is not None and finish:
+            entry[0].finish()
+
+    def is_active(self, key: Hashable) -> bool:
+        return key in self._animations
+
+    def request_layout(self, callback: Callable[[], None]):
+        """Pide ejecutar 'callback' al final del cuadro actual o del siguiente (una sola vez por cuadro)."""
+        if self.reduced_motion and not self._in_tick:
+            callback()  # Sin animaciones no hay cuadros con los que agrupar
+            return
+        self._layout_callbacks[callback] = None
+        self._ensure_ticking()
+
+    def set_reduced_motion(self, enabled: bool):
+        """Activa o desactiva el movimiento reducido; al activarlo, las animaciones en curso terminan ya."""
+        self.reduced_motion = enabled
+        if enabled:
+            for key in list(self._animations):
+                self.cancel(key)
+
+    def stop(self):
+        """Cancela el temporizador (al cerrar la ventana)."""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._animations.clear()
+        self._layout_callbacks.clear()
+
+    def stats(self) -> FrameStats:
+        ticks = [tick for tick, _layout in self._frame_times] or [0.0]
+        layouts = [layout for _tick, layout in self._frame_times] or [0.0]
+        return FrameStats(self.frames, len(self._animations), sum(ticks) / len(ticks), max(ticks),
+                          sum(layouts) / len(layouts), max(layouts))
+
+    def _ensure_ticking(self):
+        if self._job is None and not self._in_tick:
+            self._job = self.root.after(self.frame_ms, self._tick)
+
+    def _tick(self):
+        self._job = None
+        self._in_tick = True
+        start = time.perf_counter()
+        try:
+            for key, (animation, started) in list(self._animations.items()):
+                if not animation.step(start - started):
+                    self._animations.pop(key, None)
+
+            layout_start = time.perf_counter()
+            callbacks = list(self._layout_callbacks)
+            self._layout_callbacks.clear()
+            for callback in callbacks:
+                callback()
+        finally:
+            self._in_tick = False
+        end = time.perf_counter()
+
+        self.frames += 1
+        self._frame_times.append(((end - start) * 1000, (end - layout_start) * 1000))
+        if self._animations or self._layout_callbacks:
+            self._ensure_ticking()
@@ -1,28 +1,33 @@
 # src/gui/chat_bubble.py
 import tkinter as tk
-from PIL import Image, ImageTk
 import textwrap
 import customtkinter as ctk
 
+from src.gui.animation import Tween
+from src.gui.image_cache import image_cache
+from src.gui.theme import current_palette
+
+# Tamaño con el que se muestran los avatares
+AVATAR_SIZE = (60, 60)
+# Duración (s) del deslizamiento de entrada de una burbuja nueva
+SLIDE_DURATION = 1.7
+
 class ChatBubble(ctk.CTkFrame):
-    def __init__(self, parent, text, is_user, avatar_path=None, chat_area_bg="#F8F8F8", *args, **kwargs):
+    def __init__(self, parent, text, is_user, avatar_path=None, chat_area_bg="#F8F8F8", auto_pack=True,
+                 *args, **kwargs):
+        # auto_pack=False: la burbuja no se empaqueta en 'parent' (la coloca otro gestor, p. ej. VirtualChatView)
         super().__init__(parent, fg_color=chat_area_bg, *args, **kwargs)
+        self.auto_pack = auto_pack
 
         self.is_user = is_user
+        self.text = text
         self.chat_area_bg = chat_area_bg # Guardar para futuras actualizaciones de tema
 
-        # Colores de la burbuja y texto para modo CLARO y OSCURO
-        self.bubble_light_user_color = "#DCF8C6"  # Verde claro para usuario (modo claro)
-        self.bubble_dark_user_color = "#004D40"   # Verde oscuro para usuario (modo oscuro, un tono más profundo)
-        self.bubble_light_bot_color = "#E0E0E0"   # Gris claro para bot (modo claro)
-        self.bubble_dark_bot_color = "#424242"    # Gris oscuro para bot (modo oscuro, un tono más oscuro)
-        
-        self.text_light_color = "black"
-        self.text_dark_color = "white"
-
-        # Determinar colores iniciales de la burbuja y texto
-        current_mode = ctk.get_appearance_mode()
-        self._set_bubble_colors(current_mode)
+        # Colores iniciales de la burbuja y el texto según los tokens del modo actual (ver src/gui/theme.py)
+        self.bubble_token = "bubble_user" if is_user else "bubble_bot"
+        palette = current_palette()
+        self.current_bubble_color = palette[self.bubble_token]
+        self.current_text_color = palette["bubble_text"]
 
         self.bubble_frame = ctk.CTkFrame(self, fg_color=self.current_bubble_color, corner_radius=12)
         
@@ -37,18 +42,10 @@ class ChatBubble(ctk.CTkFrame):
         )
         self.message_label.pack(side=ctk.LEFT, padx=10, pady=8, anchor=ctk.W if not is_user else ctk.E)
 
-        if avatar_path:
-            try:
-                avatar_pil = Image.open(avatar_path)
-                # AUMENTADO EL TAMAÑO DE LOS AVATARES AQUÍ
-                self.avatar_ctk_image = ctk.CTkImage(light_image=avatar_pil,
-                                                     dark_image=avatar_pil,
-                                                     size=(60, 60)) # Tamaño aumentado de 30x30 a 40x40
-                
-                self.avatar_label = ctk.CTkLabel(self, image=self.avatar_ctk_image, text="", fg_color=self.chat_area_bg) 
-            except Exception as e:
-                print(f"Error loading avatar {avatar_path}: {e}")
-                self.avatar_label = None
+        # El avatar se decodifica una sola vez y todas las burbujas comparten el mismo CTkImage
+        self.avatar_ctk_image = image_cache.get(avatar_path, AVATAR_SIZE) if avatar_path else None
+        if self.avatar_ctk_image is not None:
+            self.avatar_label = ctk.CTkLabel(self, image=self.avatar_ctk_image, text="", fg_color=self.chat_area_bg)
         else:
             self.avatar_label = None
 
@@ -59,65 +56,61 @@ class ChatBubble(ctk.CTkFrame):
             self.bubble_frame.pack(side=ctk.RIGHT, fill=ctk.BOTH, expand=True, padx=(5, self.final_slide_padding), pady=2)
             if self.avatar_label:
                 self.avatar_label.pack(side=ctk.RIGHT, padx=(0, 5))
-            self.pack(fill=ctk.X, padx=(self.initial_slide_padding, 10), pady=2, anchor=ctk.E)
+            if auto_pack:
+                self.pack(fill=ctk.X, padx=(self.initial_slide_padding, 10), pady=2, anchor=ctk.E)
         else:
             self.bubble_frame.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True, padx=(self.final_slide_padding, 5), pady=2)
             if self.avatar_label:
                 self.avatar_label.pack(side=ctk.LEFT, padx=(5, 0))
-            self.pack(fill=ctk.X, padx=(10, self.initial_slide_padding), pady=2, anchor=ctk.W)
+            if auto_pack:
+                self.pack(fill=ctk.X, padx=(10, self.initial_slide_padding), pady=2, anchor=ctk.W)
 
-        self.animation_step = 3
-        self.animation_delay = 30
-        self.animation_id = None
+        self.scheduler = None
+        self.slide_padding = self.initial_slide_padding
 
-    def _set_bubble_colors(self, mode):
-        """Establece los colores de la burbuja y el texto según el modo (Light/Dark)."""
-        if self.is_user:
-            self.current_bubble_color = self.bubble_light_user_color if mode == "Light" else self.bubble_dark_user_color
-        else:
-            self.current_bubble_color = self.bubble_light_bot_color if mode == "Light" else self.bubble_dark_bot_color
-        
-        self.current_text_color = self.text_light_color if mode == "Light" else self.text_dark_color
-
-    def update_theme_colors(self, new_chat_area_bg, current_mode):
-        """Actualiza los colores de la burbuja cuando cambia el tema."""
-        self.chat_area_bg = new_chat_area_bg
-        self.configure(fg_color=self.chat_area_bg)
-
-        if self.avatar_label:
-            self.avatar_label.configure(fg_color=self.chat_area_bg)
-
-        self._set_bubble_colors(current_mode)
-        self.bubble_frame.configure(fg_color=self.current_bubble_color)
-        self.message_label.configure(fg_color=self.current_bubble_color, text_color=self.current_text_color)
-
-
-    def start_animation(self):
-        """Inicia la animación de deslizamiento de la burbuja."""
+    def apply_palette(self, palette):
+        """Aplica los tokens de la paleta (suscriptor de ThemeEngine); solo reconfigura lo que cambió."""
+        if palette["chat_area_bg"] != self.chat_area_bg:
+            self.chat_area_bg = palette["chat_area_bg"]
+            self.configure(fg_color=self.chat_area_bg)
+            if self.avatar_label:
+                self.avatar_label.configure(fg_color=self.chat_area_bg)
+
+        bubble_color, text_color = palette[self.bubble_token], palette["bubble_text"]
+        if bubble_color != self.current_bubble_color:
+            self.current_bubble_color = bubble_color
+            self.bubble_frame.configure(fg_color=bubble_color)
+            self.message_label.configure(fg_color=bubble_color, text_color=text_color)
+        elif text_color != self.current_text_color:
+            self.message_label.configure(text_color=text_color)
+        self.current_text_color = text_color
+
+
+    def set_text(self, text):
+        """Reemplaza el texto del mensaje (usado al reutilizar la burbuja para otro mensaje)."""
+        self.text = text
+        self.message_label.configure(text=text)
+
+    def append_text(self, chunk):
+        """Añade texto al final del mensaje (usado al mostrar respuestas en streaming)."""
+        self.text += chunk
+        self.message_label.configure(text=self.text)
+
+    def start_animation(self, scheduler):
+        """Inicia la animación de deslizamiento de la burbuja en el planificador de animaciones."""
+        if not self.auto_pack:
+            return  # Sin pack no hay padding que animar; VirtualChatView anima la posición
+        self.scheduler = scheduler
+        scheduler.start(("bubble", id(self)), Tween(self.initial_slide_padding, 10, SLIDE_DURATION,
+                                                    self._set_slide_padding))
+
+    def _set_slide_padding(self, padding):
+        """Guarda el padding del cuadro; se aplica una sola vez por cuadro en el reacomodo del planificador."""
+        self.slide_padding = round(padding)
+        self.scheduler.request_layout(self._apply_slide_padding)
+
+    def _apply_slide_padding(self):
         if self.is_user:
-            self._animate_slide_in(current_padding=self.initial_slide_padding, target_padding=10, side_to_animate="left")
+            self.pack_configure(padx=(self.slide_padding, 10))
         else:
-            self._animate_slide_in(current_padding=self.initial_slide_padding, target_padding=10, side_to_animate="right")
-
-    def _animate_slide_in(self, current_padding, target_padding, side_to_animate):
-        """
-        Realiza la animación de deslizamiento de la burbuja.
-        Reduce el padding del lado de la animación hasta alcanzar el objetivo.
-        """
-        if self.animation_id:
-            self.after_cancel(self.animation_id)
-
-        if side_to_animate == "left":
-            if current_padding > target_padding:
-                new_padding = max(target_padding, current_padding - self.animation_step)
-                self.pack_configure(padx=(new_padding, 10))
-                self.animation_id = self.after(self.animation_delay, self._animate_slide_in, new_padding, target_padding, side_to_animate)
-            else:
-                self.pack_configure(padx=(target_padding, 10))
-        elif side_to_animate == "right":
-            if current_padding > target_padding:
-                new_padding = max(target_padding, current_padding - self.animation_step)
-                self.pack_configure(padx=(10, new_padding))
-                self.animation_id = self.after(self.animation_delay, self._animate_slide_in, new_padding, target_padding, side_to_animate)
-            else:
-                self.pack_configure(padx=(10, target_padding))
+            self.pack_configure(padx=(10, self.slide_padding))
@@ -0,0 +1,122 @@
+# src/gui/image_cache.py
+"""
+Caché de imágenes compartida por toda la interfaz.
+
+Cada imagen se decodifica una sola vez por (ruta, tamaño, modo) y se guarda reducida a
+HIDPI_FACTOR veces el tamaño con el que se muestra (no a su resolución original); el
+CTkImage correspondiente también es único, de modo que todas las burbujas con el mismo
+avatar comparten la imagen y sus PhotoImage ya escalados. La decodificación puede
+adelantarse en un hilo (prepare); get() se llama desde el hilo de Tk.
+"""
+import os
+import threading
+from typing import NamedTuple
+
+import customtkinter as ctk
+from PIL import Image
+
+# Se conserva el doble del tamaño mostrado para que la imagen se vea nítida con escalado HiDPI
+HIDPI_FACTOR = 2
+
+
+class ImageCacheStats(NamedTuple):
+    images: int        # Imágenes decodificadas en memoria
+    ctk_images: int    # CTkImage creados (uno por clave)
+    bytes: int         # Memoria aproximada de los píxeles decodificados
+    hits: int
+    misses: int
+    failures: int      # Rutas que no se pudieron abrir (no se vuelven a intentar)
+
+
+class ImageCache:
+    """Imágenes decodificadas y CTkImage compartidos, indexados por (ruta, tamaño, modo)."""
+
+    def __init__(self, hidpi_factor: int = HIDPI_FACTOR):
+        self.hidpi_factor = hidpi_factor
+        self._lock = threading.Lock()
+        self._images: dict[tuple, Image.Image | None] = {}
+        self._in_flight: dict[tuple, threading.Event] = {}
+        self._ctk_images: dict[tuple, ctk.CTkImage] = {}
+        self._source_sizes: dict[str, tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str, size: tuple[int, int], mode: str | None) -> tuple:
+        return os.path.normpath(path), tuple(size), mode
+
+    def size_for_height(self, path: str, height: int) -> tuple[int, int]:
+        """Tamaño que conserva la proporción de la imagen para la altura dada (solo lee la cabecera)."""
+        path = os.path.normpath(path)
+        if path not in self._source_sizes:
+            with Image.open(path) as image:
+                self._source_sizes[path] = image.size
+        width, source_height = self._source_sizes[path]
+        return int(width * (height / source_height)), height
+
+    def prepare(self, path: str, size: tuple[int, int], mode: str | None = None) -> Image.Image | None:
+        """
+        Devuelve la imagen decodificada para la clave, decodificándola si hace falta.
+        Es seguro llamarla desde varios hilos: si otro hilo ya la está decodificando, se espera.
+        Devuelve None si la imagen no se pudo abrir.
+        """
+        key = self._key(path, size, mode)
+        with self._lock:
+            if key in self._images:
+                self.hits += 1
+                return self._images[key]
+            event = self._in_flight.get(key)
+            owner = event is None
+            if owner:
+                self.misses += 1
+                event = self._in_flight[key] = threading.Event()
+            else:
+                self.hits += 1
+        if not owner:
+            event.wait()
+            return self._images[key]
+
+        try:
+            image = self._decode(key[0], key[1], mode)
+        except Exception as e:
+            print(f"Error al cargar la imagen {path}: {e}")
+            image = None
+        with self._lock:
+            self._images[key] = image
+            del self._in_flight[key]
+        event.set()
+        return image
+
+    def _decode(self, path: str, size: tuple[int, int], mode: str | None) -> Image.Image:
+        image = Image.open(path)
+        image.load()
+        if mode and image.mode != mode:
+            image = image.convert(mode)
+        target = (size[0] * self.hidpi_factor, size[1] * self.hidpi_factor)
+        if target[0] < image.width or target[1] < image.height:
+            image = image.resize((min(target[0], image.width), min(target[1], image.height)), Image.LANCZOS)
+        return image
+
+    def get(self, path: str, size: tuple[int, int], mode: str | None = None) -> ctk.CTkImage | None:
+        """CTkImage compartido para la clave (o None si la imagen no se pudo abrir). Usar desde el hilo de Tk."""
+        key = self._key(path, size, mode)
+        ctk_image = self._ctk_images.get(key)
+        if ctk_image is not None:
+            self.hits += 1
+            return ctk_image
+        image = self.prepare(path, size, mode)
+        if image is None:
+            return None
+        ctk_image = self._ctk_images[key] = ctk.CTkImage(light_image=image, dark_image=image, size=tuple(size))
+        return ctk_image
+
+    def stats(self) -> ImageCacheStats:
+        with self._lock:
+            images = [image for image in self._images.values() if image is not None]
+            failures = len(self._images) - len(images)
+        memory = sum(image.width * image.height * len(image.getbands()) for image in images)
+        return ImageCacheStats(len(images), len(self._ctk_images), memory, self.hits, self.misses, failures)
+
+
+# Instancia única para toda la aplicación
+image_cache = ImageCache()
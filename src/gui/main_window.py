@@ -1,17 +1,43 @@
 # src/gui/main_window.py
 import customtkinter as ctk
 import tkinter as tk
-from PIL import Image, ImageTk
+import logging
 import os
-import threading
 import time
-
-from src.core.chatbot_logic import ChatbotLogic
-from src.gui.chat_bubble import ChatBubble
-from src.gui.scrollable_frame import ScrollableFrame
+from concurrent.futures import ThreadPoolExecutor
+
+# ChatbotLogic (datos, índices y NumPy) y DataWatcher se importan en segundo plano, en _build_chatbot
+from src.utils.config import ANIMATION_FRAME_RATE, DATA_RELOAD_INTERVAL_SECONDS, REDUCED_MOTION
+from src.utils.gemini_api import ERROR_MESSAGE
+from src.utils.tracing import tracer
+from src.gui.animation import AnimationScheduler, Cycle
+from src.gui.chat_bubble import AVATAR_SIZE
+from src.gui.image_cache import image_cache
+from src.gui.theme import ThemeEngine
+from src.gui.virtual_chat_view import VirtualChatView
+from src.gui.request_dispatcher import RequestDispatcher
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (ms) con el que se vuelcan en la burbuja los fragmentos recibidos en streaming
+STREAM_REFRESH_MS = 50
+# Un solo hilo de trabajo: todas las peticiones comparten la misma sesión de chat y su historial
+DISPATCHER_WORKERS = 1
+# Peticiones que pueden esperar a la vez (p. ej. varios clics seguidos en respuestas rápidas)
+DISPATCHER_MAX_PENDING = 4
+# Periodo (s) con el que se resalta cada punto del indicador de escritura
+TYPING_DOT_PERIOD = 0.3
+# Intervalo (ms) con el que se comprueba si las imágenes ya se decodificaron en segundo plano
+ASSET_POLL_MS = 20
+LOGO_HEIGHT = 50
+SEND_ICON_SIZE = (24, 24)
 
 class MainWindow(ctk.CTk):
-    def __init__(self):
+    def __init__(self, started_at: float | None = None, reduced_motion: bool | None = None):
+        # started_at: instante (time.perf_counter) en que arrancó el proceso, para medir el arranque
+        # reduced_motion: desactiva las animaciones (por defecto, REDUCED_MOTION de la configuración)
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.startup_timings = {}
         super().__init__()
         self.title("IngeChat 360° - UNEFA")
         self.geometry("900x800")
@@ -20,6 +46,11 @@ class MainWindow(ctk.CTk):
         # Configurar modo de apariencia inicial (claro)
         ctk.set_appearance_mode("light") 
         ctk.set_default_color_theme("blue") # Tema por defecto de CustomTkinter
+        # Tokens de color por modo y aplicación por tandas de los cambios de modo
+        self.theme = ThemeEngine(self)
+        # Un único temporizador para todas las animaciones (burbujas nuevas e indicador de escritura)
+        self.animations = AnimationScheduler(self, ANIMATION_FRAME_RATE,
+                                             REDUCED_MOTION if reduced_motion is None else reduced_motion)
 
         self.primary_blue = "#003366"  
         self.secondary_blue = "#4169E1" 
@@ -27,55 +58,125 @@ class MainWindow(ctk.CTk):
         self.white_color = "#FFFFFF"   
         self.border_color_subtle = "#D0D0D0" 
 
-        # Colores que cambiarán con el tema (se actualizarán en _update_theme_colors)
+        # Colores que cambiarán con el tema (se copian de la paleta en _read_palette)
         self.dynamic_bg_color = ""
         self.dynamic_text_color = ""
         self.chat_area_dynamic_bg = ""
         self.typing_indicator_dynamic_color = ""
 
-        self.chatbot = ChatbotLogic()
         self.user_avatar_path = os.path.join("assets", "images", "user_avatar.png")
         self.bot_avatar_path = os.path.join("assets", "images", "bot_avatar.png")
         self.unefa_logo_path = os.path.join("assets", "images", "logo_unefa.png")
         self.send_icon_path = os.path.join("assets", "images", "send_icon.png")
 
+        # La lógica del chatbot (datos locales, índices y cliente de Gemini) se prepara en segundo
+        # plano mientras se dibuja la ventana; las peticiones la esperan si aún no está lista.
+        self.data_watcher = None
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+        self._chatbot_future = self._background.submit(self._build_chatbot)
+
         self.typing_indicator_visible = False
         self.typing_dots = []
-        self.typing_animation_id = None
         
         # Atributo para el marco de botones de respuesta rápida
         self.quick_reply_frame = None 
 
+        # Peticiones al chatbot y estado de la respuesta que se está recibiendo en streaming
+        self.dispatcher = RequestDispatcher(self, max_workers=DISPATCHER_WORKERS,
+                                            max_pending=DISPATCHER_MAX_PENDING, poll_ms=STREAM_REFRESH_MS)
+        self.streaming_message = None  # Índice en el historial del mensaje que se está recibiendo
+        self._request_traces = {}  # request_id -> traza de cada petición en curso
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
         self._load_assets()
-        self._update_theme_colors() 
+        self._read_palette(self.theme.palette)
         self._create_widgets()
+        self.theme.subscribe(self._apply_palette)
         self._initial_message()
-        
+        self.after_idle(self._on_first_paint)
+
+    @property
+    def chatbot(self):
+        """Lógica del chatbot; espera a que termine de prepararse si aún no está lista."""
+        return self._chatbot_future.result()
+
+    def _build_chatbot(self):
+        """Crea la lógica del chatbot fuera del hilo de la interfaz y precalienta el cliente de Gemini."""
+        start = time.perf_counter()
+        from src.core.chatbot_logic import ChatbotLogic
+        from src.core.data_watcher import DataWatcher
+
+        chatbot = ChatbotLogic()
+        # Recarga en caliente de data/: los cambios se aplican sin reiniciar ni perder la conversación
+        if DATA_RELOAD_INTERVAL_SECONDS > 0:
+            self.data_watcher = DataWatcher(chatbot.data_manager, DATA_RELOAD_INTERVAL_SECONDS)
+            self.data_watcher.start()
+        self.startup_timings["chatbot_ready_ms"] = (time.perf_counter() - self.started_at) * 1000
+        logger.info(f"Lógica del chatbot lista en {(time.perf_counter() - start) * 1000:.0f} ms.")
+        self._background.submit(self._warm_up_gemini, chatbot)
+        self._background.submit(chatbot.data_manager.warm_up)
+        return chatbot
+
+    def _warm_up_gemini(self, chatbot):
+        """Importa el SDK de Gemini en segundo plano; las respuestas locales no lo necesitan."""
+        try:
+            chatbot.gemini_api.warm_up()
+            self.startup_timings["gemini_ready_ms"] = (time.perf_counter() - self.started_at) * 1000
+        except Exception as e:
+            logger.warning(f"No se pudo preparar el cliente de Gemini: {e}")
+
+    def _on_first_paint(self):
+        """Registra cuánto tardó la ventana en mostrarse desde que arrancó el proceso."""
+        self.update_idletasks()
+        self.startup_timings["first_paint_ms"] = (time.perf_counter() - self.started_at) * 1000
+        logger.info(f"Ventana visible en {self.startup_timings['first_paint_ms']:.0f} ms desde el arranque.")
 
     def _load_assets(self):
-        """Carga y procesa imágenes para la interfaz."""
-        try:
-            unefa_logo_pil = Image.open(self.unefa_logo_path)
-            original_width, original_height = unefa_logo_pil.size
-            max_logo_height = 50 
-            new_width = int(original_width * (max_logo_height / original_height))
-            self.unefa_logo_ctk = ctk.CTkImage(light_image=unefa_logo_pil,
-                                               dark_image=unefa_logo_pil,
-                                               size=(new_width, max_logo_height))
-
-            if os.path.exists(self.send_icon_path):
-                send_icon_pil = Image.open(self.send_icon_path)
-                self.send_icon_ctk = ctk.CTkImage(light_image=send_icon_pil,
-                                                  dark_image=send_icon_pil,
-                                                  size=(24, 24))
-            else:
-                self.send_icon_ctk = None
-                print(f"Advertencia: No se encontró el icono de enviar en {self.send_icon_path}")
+        """Decodifica las imágenes de la interfaz en segundo plano; se muestran en cuanto están listas."""
+        self.unefa_logo_ctk = None
+        self.send_icon_ctk = None
+        self._assets_future = self._background.submit(self._decode_assets)
+        self.after(ASSET_POLL_MS, self._apply_assets)
+
+    def _decode_assets(self) -> dict:
+        """
+        Se ejecuta en un hilo: decodifica en la caché de imágenes el logo, el icono de envío y
+        los avatares (las burbujas los toman de ahí). Devuelve el tamaño de cada imagen disponible.
+        """
+        sizes = {}
+        for name, path, size in (("logo", self.unefa_logo_path, None), ("send", self.send_icon_path, SEND_ICON_SIZE),
+                                 ("user_avatar", self.user_avatar_path, AVATAR_SIZE),
+                                 ("bot_avatar", self.bot_avatar_path, AVATAR_SIZE)):
+            if not os.path.exists(path):
+                print(f"Advertencia: No se encontró la imagen {path}")
+                continue
+            try:
+                size = size or image_cache.size_for_height(path, LOGO_HEIGHT)
+            except Exception as e:
+                print(f"Error al cargar assets: {e}")
+                continue
+            if image_cache.prepare(path, size) is not None:
+                sizes[name] = size
+        return sizes
+
+    def _apply_assets(self):
+        """En el hilo de Tk: crea los CTkImage con las imágenes ya decodificadas y los asigna a sus widgets."""
+        if not self._assets_future.done():
+            self.after(ASSET_POLL_MS, self._apply_assets)
+            return
+        sizes = self._assets_future.result()
 
-        except Exception as e:
-            print(f"Error al cargar assets: {e}")
-            self.unefa_logo_ctk = None
-            self.send_icon_ctk = None
+        if "logo" in sizes:
+            self.unefa_logo_ctk = image_cache.get(self.unefa_logo_path, sizes["logo"])
+            self.logo_label.configure(image=self.unefa_logo_ctk)
+            self.logo_label.pack(side=ctk.LEFT, padx=(15, 10), pady=0, before=self.title_label)
+
+        if "send" in sizes:
+            self.send_icon_ctk = image_cache.get(self.send_icon_path, sizes["send"])
+            self.send_button.configure(text="", image=self.send_icon_ctk, compound=ctk.LEFT)
+        self.startup_timings["assets_ready_ms"] = (time.perf_counter() - self.started_at) * 1000
+        stats = image_cache.stats()
+        logger.info(f"Caché de imágenes: {stats.images} imágenes, {stats.bytes / 1024:.0f} KiB decodificados.")
 
     def _create_widgets(self):
         """Crea y posiciona todos los widgets de la interfaz."""
@@ -85,14 +186,13 @@ class MainWindow(ctk.CTk):
         header_frame = ctk.CTkFrame(self.main_frame, fg_color=self.primary_blue, corner_radius=10)
         header_frame.pack(fill=ctk.X, pady=(15, 15))
 
-        if self.unefa_logo_ctk:
-            logo_label = ctk.CTkLabel(header_frame, image=self.unefa_logo_ctk, text="")
-            logo_label.pack(side=ctk.LEFT, padx=(15, 10), pady=0)
+        # El logo se muestra cuando termina de decodificarse (ver _apply_assets)
+        self.logo_label = ctk.CTkLabel(header_frame, text="")
 
-        title_label = ctk.CTkLabel(header_frame, text="IngeChat 360°",
-                                   font=ctk.CTkFont("Arial", 20, "bold"),
-                                   text_color=self.white_color)
-        title_label.pack(side=ctk.LEFT, expand=True, fill=ctk.X, pady=0)
+        self.title_label = ctk.CTkLabel(header_frame, text="IngeChat 360°",
+                                        font=ctk.CTkFont("Arial", 20, "bold"),
+                                        text_color=self.white_color)
+        self.title_label.pack(side=ctk.LEFT, expand=True, fill=ctk.X, pady=0)
 
         restart_btn = ctk.CTkButton(header_frame, text="Reiniciar Chat", command=self._restart_chat,
                                     fg_color=self.accent_blue_light, 
@@ -113,10 +213,14 @@ class MainWindow(ctk.CTk):
         )
         self.appearance_mode_switch.pack(side=ctk.RIGHT, padx=(0, 15), pady=0)
 
-        self.chat_display_frame = ScrollableFrame(self.main_frame, fg_color=self.chat_area_dynamic_bg)
+        # Historial virtualizado: solo existen las burbujas visibles, aunque haya miles de mensajes
+        self.chat_display_frame = VirtualChatView(self.main_frame, fg_color=self.chat_area_dynamic_bg,
+                                                  user_avatar_path=self.user_avatar_path,
+                                                  bot_avatar_path=self.bot_avatar_path, theme=self.theme,
+                                                  animations=self.animations)
         self.chat_display_frame.pack(fill=ctk.BOTH, expand=True, pady=10, padx=5)
 
-        self.typing_indicator_frame = ctk.CTkFrame(self.chat_display_frame.frame, fg_color="transparent")
+        self.typing_indicator_frame = ctk.CTkFrame(self.chat_display_frame.footer, fg_color="transparent")
         self.typing_indicator_label = ctk.CTkLabel(self.typing_indicator_frame, text="IngeChat 360° está escribiendo", 
                                                    font=ctk.CTkFont("Arial", 10, weight="normal", slant="italic"), 
                                                    text_color=self.typing_indicator_dynamic_color)
@@ -130,7 +234,7 @@ class MainWindow(ctk.CTk):
         self.typing_indicator_frame.pack_forget()
 
         # Marco para los botones de respuesta rápida (inicialmente oculto)
-        self.quick_reply_frame = ctk.CTkFrame(self.chat_display_frame.frame, fg_color="transparent")
+        self.quick_reply_frame = ctk.CTkFrame(self.chat_display_frame.footer, fg_color="transparent")
         self.quick_reply_frame.pack(fill=ctk.X, pady=(5, 10), padx=5, anchor=ctk.W)
         self.quick_reply_frame.pack_forget() # Ocultar al inicio
 
@@ -150,18 +254,17 @@ class MainWindow(ctk.CTk):
         self.user_input.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=(10, 10), pady=10)
         self.user_input.bind("<Return>", self._send_message_event)
 
-        send_button = ctk.CTkButton(
+        # Hasta que se decodifica el icono, el botón muestra el texto "Enviar"
+        self.send_button = ctk.CTkButton(
             self.input_frame,
-            text="Enviar" if not self.send_icon_ctk else "",
-            image=self.send_icon_ctk,
+            text="Enviar",
             command=self._send_message,
-            compound=ctk.LEFT if self.send_icon_ctk else ctk.NONE,
             fg_color=self.secondary_blue,
             hover_color=self.primary_blue,
             text_color=self.white_color,
             corner_radius=8
         )
-        send_button.pack(side=ctk.RIGHT, padx=(0, 10), pady=10)
+        self.send_button.pack(side=ctk.RIGHT, padx=(0, 10), pady=10)
 
     def _initial_message(self):
         """Muestra el mensaje de bienvenida del chatbot."""
@@ -177,22 +280,10 @@ class MainWindow(ctk.CTk):
 
 
     def _add_message(self, message, is_user):
-        """Agrega un mensaje al área de visualización del chat."""
+        """Agrega un mensaje al historial del chat y devuelve su índice."""
         # Limpiar botones de respuesta rápida anteriores antes de añadir un nuevo mensaje
         self._clear_quick_reply_buttons() 
-
-        bubble = ChatBubble(
-            self.chat_display_frame.frame,
-            message,
-            is_user,
-            avatar_path=self.user_avatar_path if is_user else self.bot_avatar_path,
-            chat_area_bg=self.chat_area_dynamic_bg
-        )
-        bubble.pack(fill=ctk.X, pady=5, padx=5, anchor=ctk.NW if not is_user else ctk.NE)
-        self.chat_display_frame.canvas.update_idletasks()
-        self.chat_display_frame.canvas.yview_moveto(1.0)
-        
-        bubble.start_animation()
+        return self.chat_display_frame.append_message(message, is_user)
 
     def _add_quick_reply_buttons(self, suggestions):
         """Añade botones de respuesta rápida al área de chat."""
@@ -221,8 +312,7 @@ class MainWindow(ctk.CTk):
             button.pack(side=ctk.LEFT, padx=5, pady=5) # Empaquetar horizontalmente
 
         # Asegurarse de que el scroll vaya hasta el final para ver los botones
-        self.chat_display_frame.canvas.update_idletasks()
-        self.chat_display_frame.canvas.yview_moveto(1.0)
+        self.chat_display_frame.scroll_to_end()
 
     def _clear_quick_reply_buttons(self):
         """Elimina todos los botones de respuesta rápida existentes."""
@@ -240,33 +330,24 @@ class MainWindow(ctk.CTk):
         if not self.typing_indicator_visible:
             self.typing_indicator_frame.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=10, pady=5)
             self.typing_indicator_visible = True
-            self._animate_typing_dots(0)
+            self.animations.start("typing", Cycle(len(self.typing_dots), TYPING_DOT_PERIOD,
+                                                  self._highlight_typing_dot))
 
-        self.chat_display_frame.canvas.update_idletasks()
-        self.chat_display_frame.canvas.yview_moveto(1.0)
+        self.chat_display_frame.scroll_to_end()
 
     def _hide_typing_indicator(self):
         if self.typing_indicator_visible:
             self.typing_indicator_frame.pack_forget()
             self.typing_indicator_visible = False
-            if self.typing_animation_id:
-                self.after_cancel(self.typing_animation_id)
-                self.typing_animation_id = None
-            for dot in self.typing_dots:
-                dot.configure(text_color=self.typing_indicator_dynamic_color)
-
-    def _animate_typing_dots(self, dot_index):
-        if not self.typing_indicator_visible:
-            return
+            self.animations.cancel("typing")  # Deja todos los puntos en el color de reposo
 
+    def _highlight_typing_dot(self, dot_index):
+        """Paso de la animación del indicador: resalta un punto (ninguno si dot_index es None)."""
         for i, dot in enumerate(self.typing_dots):
             if i == dot_index:
                 dot.configure(text_color=self.secondary_blue)
             else:
                 dot.configure(text_color=self.typing_indicator_dynamic_color)
-        
-        next_dot_index = (dot_index + 1) % len(self.typing_dots)
-        self.typing_animation_id = self.after(300, self._animate_typing_dots, next_dot_index)
 
 
     def _send_message_event(self, event):
@@ -274,7 +355,7 @@ class MainWindow(ctk.CTk):
 
     def _send_message(self):
         user_text = self.user_input.get().strip()
-        if not user_text:
+        if not user_text or self.dispatcher.is_full():
             return
 
         self.user_input.delete(0, ctk.END)
@@ -284,16 +365,47 @@ class MainWindow(ctk.CTk):
 
         self._show_typing_indicator()
 
-        threading.Thread(target=self._process_bot_response, args=(user_text,)).start()
-
-    def _process_bot_response(self, user_text):
-        bot_response = self.chatbot.process_message(user_text)
-        self.after(100, self._update_ui_with_bot_response, bot_response)
+        # La traza abarca desde el envío hasta que la respuesta termina de mostrarse
+        trace = tracer.start_trace("chat", channel="gui")
+        request = self.dispatcher.submit(lambda: self.chatbot.process_message_stream(user_text, trace=trace),
+                                         on_chunk=self._on_bot_response_chunks,
+                                         on_done=self._on_bot_response_done)
+        if request is not None:
+            self._request_traces[request.request_id] = trace
+
+    def _on_bot_response_chunks(self, request, chunks):
+        """Vuelca en la burbuja los fragmentos llegados desde la última revisión."""
+        start = time.perf_counter()
+        text = "".join(chunks)
+        if self.streaming_message is None:
+            self._hide_typing_indicator()
+            self.streaming_message = self._add_message(text, is_user=False)
+        else:
+            self.chat_display_frame.append_text(self.streaming_message, text)
+        trace = self._request_traces.get(request.request_id)
+        if trace is not None:
+            trace.add_span("ui_render", start, time.perf_counter())
+
+    def _on_bot_response_done(self, request, timing):
+        trace = self._request_traces.pop(request.request_id, None)
+        if trace is not None:
+            trace.add_span("queue_wait", request.submitted_at, request.started_at or request.submitted_at)
+            trace.finish()
+        if self.streaming_message is None:
+            # La petición terminó sin producir texto (p. ej. por un error inesperado)
+            self._hide_typing_indicator()
+            self.streaming_message = self._add_message(ERROR_MESSAGE, is_user=False)
+        bot_response = self.chat_display_frame.message_text(self.streaming_message)
+        self.streaming_message = None
+        self._update_ui_with_bot_response(bot_response)
 
     def _update_ui_with_bot_response(self, bot_response):
+        if self.dispatcher.pending_count:
+            # Aún quedan preguntas en cola: seguir mostrando el indicador de escritura
+            self._show_typing_indicator()
+            return
         self._hide_typing_indicator()
-        self._add_message(bot_response, is_user=False)
-        
+
         self.user_input.configure(state=ctk.NORMAL)
         self.user_input.focus_set()
 
@@ -312,56 +424,69 @@ class MainWindow(ctk.CTk):
              self.after(500, lambda: self._add_quick_reply_buttons(["Pensum de Telecomunicaciones", "Perfil del Egresado de Telecomunicaciones"]))
 
 
-    def _update_theme_colors(self):
-        """Actualiza los colores de los widgets que deben cambiar con el tema."""
-        current_mode = ctk.get_appearance_mode()
-        if current_mode == "Light":
-            self.dynamic_bg_color = "#F0F0F0" # Gris claro para fondo general
-            self.dynamic_text_color = "#333333" # Texto oscuro
-            self.chat_area_dynamic_bg = "#FFFFFF" # Fondo de chat blanco
-            self.typing_indicator_dynamic_color = "gray" # Gris para indicador
-        else: # Dark mode
-            self.dynamic_bg_color = "#2B2B2B" # Gris oscuro para fondo general
-            self.dynamic_text_color = "#FFFFFF" # Texto blanco
-            self.chat_area_dynamic_bg = "#343638" # Fondo de chat oscuro
-            self.typing_indicator_dynamic_color = "#A0A0A0" # Gris claro para indicador
-
-        # Aplicar los colores a los widgets
-        if hasattr(self, 'main_frame'):
-            self.main_frame.configure(fg_color=self.dynamic_bg_color)
-            self.chat_display_frame.configure(fg_color=self.chat_area_dynamic_bg)
-            self.chat_display_frame.canvas.configure(background=self.chat_area_dynamic_bg)
-            self.chat_display_frame.frame.configure(fg_color=self.chat_area_dynamic_bg)
-            
-            self.typing_indicator_label.configure(text_color=self.typing_indicator_dynamic_color)
-            for dot in self.typing_dots:
-                dot.configure(text_color=self.typing_indicator_dynamic_color)
+    def _read_palette(self, palette):
+        """Copia los tokens de la paleta en los atributos de color que usan los widgets al crearse."""
+        self.dynamic_bg_color = palette["app_bg"]
+        self.dynamic_text_color = palette["text"]
+        self.chat_area_dynamic_bg = palette["chat_area_bg"]
+        self.typing_indicator_dynamic_color = palette["typing_indicator"]
 
-            self.input_frame.configure(fg_color=self.chat_area_dynamic_bg)
-            self.user_input.configure(fg_color=self.chat_area_dynamic_bg, text_color=self.dynamic_text_color)
-            self.quick_reply_frame.configure(fg_color=self.chat_area_dynamic_bg) # Actualizar fondo del marco de botones
+    def _apply_palette(self, palette):
+        """Suscriptor de ThemeEngine para el marco de la ventana (las burbujas se suscriben por separado)."""
+        self._read_palette(palette)
+        self.main_frame.configure(fg_color=self.dynamic_bg_color)
+        self.chat_display_frame.apply_palette(palette)
 
-            for widget in self.chat_display_frame.frame.winfo_children():
-                if isinstance(widget, ChatBubble):
-                    widget.update_theme_colors(self.chat_area_dynamic_bg, current_mode)
+        self.typing_indicator_label.configure(text_color=self.typing_indicator_dynamic_color)
+        for dot in self.typing_dots:
+            dot.configure(text_color=self.typing_indicator_dynamic_color)
 
+        self.input_frame.configure(fg_color=self.chat_area_dynamic_bg)
+        self.user_input.configure(fg_color=self.chat_area_dynamic_bg, text_color=self.dynamic_text_color)
+        self.quick_reply_frame.configure(fg_color=self.chat_area_dynamic_bg) # Actualizar fondo del marco de botones
 
     def _change_appearance_mode_event(self):
         """Cambia el modo de apariencia (claro/oscuro) de la aplicación."""
+        start = time.perf_counter()
         if self.appearance_mode_switch.get() == 1:
             ctk.set_appearance_mode("dark")
             self.appearance_mode_switch.configure(text="Modo Claro")
         else:
             ctk.set_appearance_mode("light")
             self.appearance_mode_switch.configure(text="Modo Oscuro")
-        
-        self._update_theme_colors()
+        self._ctk_mode_switch_ms = (time.perf_counter() - start) * 1000
+
+        self.theme.set_mode(ctk.get_appearance_mode(), on_done=self._on_theme_applied)
+
+    def _on_theme_applied(self, stats):
+        logger.info(f"Tema {stats.mode} aplicado a {stats.subscribers} widgets ({stats.visible} visibles) en "
+                    f"{stats.slices} tandas: bloqueo máximo {stats.max_slice_ms:.1f} ms, total {stats.total_ms:.1f} ms "
+                    f"(CustomTkinter: {self._ctk_mode_switch_ms:.1f} ms).")
+
+    def _on_close(self):
+        stats = self.animations.stats()
+        if stats.frames:
+            logger.info(f"Animaciones: {stats.frames} cuadros; cuadro medio {stats.avg_tick_ms:.2f} ms "
+                        f"(máx. {stats.max_tick_ms:.2f} ms), reacomodo medio {stats.avg_layout_ms:.2f} ms "
+                        f"(máx. {stats.max_layout_ms:.2f} ms).")
+        self.animations.stop()
+        self.dispatcher.shutdown()
+        if self.data_watcher is not None:
+            self.data_watcher.stop()
+        self._background.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
 
     def _restart_chat(self):
-        for widget in self.chat_display_frame.frame.winfo_children():
-            if widget != self.typing_indicator_frame and widget != self.quick_reply_frame: # No destruir el marco de botones
-                widget.destroy()
-        self.chatbot.start_new_chat_session()
+        # Ninguna respuesta pendiente debe aparecer en el chat nuevo
+        self.dispatcher.cancel_all()
+        for trace in self._request_traces.values():
+            trace.finish(cancelled=True)
+        self._request_traces.clear()
+        self.streaming_message = None
+        self.user_input.configure(state=ctk.NORMAL)
+        self.chat_display_frame.clear()
+        if self._chatbot_future.done() and self._chatbot_future.exception() is None:
+            self.chatbot.start_new_chat_session()
         self._hide_typing_indicator()
         self._clear_quick_reply_buttons() # Limpiar botones al reiniciar
         self._initial_message()
@@ -0,0 +1,165 @@
+# src/gui/request_dispatcher.py
+import logging
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, NamedTuple
+
+from src.utils.logger import SampledLogger
+
+logger = logging.getLogger(__name__)
+# Eventos de cada petición: se escribe uno de cada LOG_SAMPLE_EVERY
+sampled_logger = SampledLogger(logger)
+
+# Tipos de evento que los hilos de trabajo envían al hilo de Tk
+_CHUNK = "chunk"
+_ERROR = "error"
+_DONE = "done"
+
+
+class RequestTiming(NamedTuple):
+    """Tiempos de una petición, en segundos desde que se encoló."""
+    queue_wait: float
+    time_to_first_chunk: float
+    total_time: float
+
+
+class DispatchedRequest:
+    """Petición en curso: la función de trabajo, sus callbacks y su estado."""
+
+    def __init__(self, request_id: int, work: Callable[[], Iterable], on_chunk: Callable, on_done: Callable,
+                 on_error: Callable | None):
+        self.request_id = request_id
+        self.work = work
+        self.on_chunk = on_chunk
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = False
+        self.future = None
+        # Eventos recibidos pero aún no entregados (la entrega respeta el orden de llegada de las peticiones)
+        self.pending_events = []
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.first_chunk_at = None
+        self.finished_at = None
+
+    def timing(self) -> RequestTiming:
+        started = self.started_at or self.submitted_at
+        finished = self.finished_at or time.perf_counter()
+        first_chunk = self.first_chunk_at or finished
+        return RequestTiming(started - self.submitted_at, first_chunk - self.submitted_at,
+                             finished - self.submitted_at)
+
+
+class RequestDispatcher:
+    """
+    Ejecuta las peticiones del chat en un grupo fijo de hilos con una cola acotada.
+    Los resultados se entregan en el hilo de Tk, en el mismo orden en que se enviaron
+    las peticiones, mediante un único bucle de sondeo con after(). cancel_all()
+    descarta tanto las peticiones encoladas como los resultados de las que están en curso.
+    """
+
+    def __init__(self, tk_root, max_workers: int = 1, max_pending: int = 8, poll_ms: int = 50):
+        self.tk_root = tk_root
+        self.max_pending = max_pending
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chatbot-worker")
+        self._events = queue.Queue()
+        self._in_order = deque()  # Peticiones pendientes de entregar, en orden de envío
+        self._next_id = 0
+        self._poll_id = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._in_order)
+
+    def is_full(self) -> bool:
+        return len(self._in_order) >= self.max_pending
+
+    def submit(self, work: Callable[[], Iterable], on_chunk: Callable, on_done: Callable,
+               on_error: Callable | None = None) -> DispatchedRequest | None:
+        """
+        Encola una petición. 'work' se ejecuta en un hilo y devuelve un iterable de fragmentos;
+        on_chunk(request, chunks), on_error(request, exc) y on_done(request, timing) se llaman en el hilo de Tk.
+        Devuelve None si la cola está llena.
+        """
+        if self.is_full():
+            logger.warning("Cola de peticiones llena; se descarta la nueva petición.")
+            return None
+        self._next_id += 1
+        request = DispatchedRequest(self._next_id, work, on_chunk, on_done, on_error)
+        self._in_order.append(request)
+        request.future = self._executor.submit(self._run, request)
+        if self._poll_id is None:
+            self._poll_id = self.tk_root.after(self.poll_ms, self._poll)
+        return request
+
+    def _run(self, request: DispatchedRequest):
+        """Se ejecuta en un hilo de trabajo: consume los fragmentos y los pasa a la cola de eventos."""
+        if request.cancelled:
+            return
+        request.started_at = time.perf_counter()
+        try:
+            for chunk in request.work():
+                if request.cancelled:
+                    break
+                if request.first_chunk_at is None:
+                    request.first_chunk_at = time.perf_counter()
+                self._events.put((request, _CHUNK, chunk))
+        except Exception as e:
+            logger.error(f"Error en la petición {request.request_id}: {e}")
+            self._events.put((request, _ERROR, e))
+        finally:
+            request.finished_at = time.perf_counter()
+            self._events.put((request, _DONE, None))
+
+    def _poll(self):
+        """Entrega en el hilo de Tk los eventos recibidos, respetando el orden de las peticiones."""
+        self._poll_id = None
+        while True:
+            try:
+                request, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if not request.cancelled:
+                request.pending_events.append((kind, payload))
+
+        while self._in_order:
+            head = self._in_order[0]
+            events, head.pending_events = head.pending_events, []
+            chunks = [payload for kind, payload in events if kind == _CHUNK]
+            if chunks:
+                head.on_chunk(head, chunks)
+            for kind, payload in events:
+                if kind == _ERROR and head.on_error:
+                    head.on_error(head, payload)
+            if not any(kind == _DONE for kind, _ in events):
+                break
+            self._in_order.popleft()
+            timing = head.timing()
+            sampled_logger.info("Petición %d: espera %.0f ms, primer fragmento %.0f ms, total %.0f ms.",
+                                head.request_id, timing.queue_wait * 1000, timing.time_to_first_chunk * 1000,
+                                timing.total_time * 1000)
+            head.on_done(head, timing)
+
+        if self._in_order:
+            self._poll_id = self.tk_root.after(self.poll_ms, self._poll)
+
+    def cancel_all(self):
+        """Cancela todas las peticiones pendientes; sus resultados ya no se entregarán."""
+        for request in self._in_order:
+            request.cancelled = True
+            if request.future is not None:
+                request.future.cancel()
+        if self._in_order:
+            logger.info(f"{len(self._in_order)} peticiones canceladas.")
+        self._in_order.clear()
+        if self._poll_id is not None:
+            self.tk_root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def shutdown(self):
+        """Cancela lo pendiente y libera los hilos de trabajo."""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
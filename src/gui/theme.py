@@ -0,0 +1,119 @@
+# src/gui/theme.py
+"""
+Colores de la interfaz como tokens de estilo con nombre y motor que aplica los cambios
+de modo (claro/oscuro).
+
+Los widgets se suscriben con una función que recibe la paleta y reconfigura solo lo que
+cambió. Al cambiar de modo, ThemeEngine aplica primero a los suscriptores visibles (en
+el mismo ciclo) y al resto por tandas de SLICE_MS en callbacks de inactividad, de modo
+que el tiempo que se bloquea el hilo de Tk no depende de la longitud del historial.
+"""
+import time
+from collections import deque
+from typing import Callable, NamedTuple
+
+import customtkinter as ctk
+
+PALETTES = {
+    "Light": {
+        "app_bg": "#F0F0F0",            # Gris claro para fondo general
+        "text": "#333333",              # Texto oscuro
+        "chat_area_bg": "#FFFFFF",      # Fondo de chat blanco
+        "typing_indicator": "gray",
+        "bubble_user": "#DCF8C6",       # Verde claro para usuario
+        "bubble_bot": "#E0E0E0",        # Gris claro para bot
+        "bubble_text": "black",
+    },
+    "Dark": {
+        "app_bg": "#2B2B2B",            # Gris oscuro para fondo general
+        "text": "#FFFFFF",              # Texto blanco
+        "chat_area_bg": "#343638",      # Fondo de chat oscuro
+        "typing_indicator": "#A0A0A0",
+        "bubble_user": "#004D40",       # Verde oscuro para usuario
+        "bubble_bot": "#424242",        # Gris oscuro para bot
+        "bubble_text": "white",
+    },
+}
+
+# Tiempo máximo (ms) de cada tanda de suscriptores no visibles
+SLICE_MS = 8
+
+
+def current_palette() -> dict[str, str]:
+    """Paleta del modo de apariencia actual de CustomTkinter."""
+    return PALETTES[ctk.get_appearance_mode()]
+
+
+class ThemeSwitchStats(NamedTuple):
+    mode: str
+    subscribers: int
+    visible: int
+    slices: int
+    max_slice_ms: float   # Mayor bloqueo del hilo de Tk en una tanda
+    total_ms: float       # Desde el cambio hasta aplicar el último suscriptor
+
+
+class ThemeEngine:
+    """Suscriptores de la paleta y aplicación de los cambios de modo por tandas."""
+
+    def __init__(self, root, slice_ms: float = SLICE_MS):
+        self.root = root
+        self.slice_ms = slice_ms
+        self.palette = current_palette()
+        self.last_switch: ThemeSwitchStats | None = None
+        self._subscribers: dict[int, tuple[Callable[[dict], None], Callable[[], bool] | None]] = {}
+        self._next_id = 0
+        self._queue: deque[int] = deque()
+        self._job = None
+        self._switch = None  # (modo, suscriptores, visibles, inicio, tiempos de tanda, callback final)
+
+    def subscribe(self, apply: Callable[[dict], None], is_visible: Callable[[], bool] | None = None) -> int:
+        """
+        Registra un suscriptor y devuelve su identificador. 'is_visible' indica si el widget
+        está en pantalla (si se omite, se trata como visible y se aplica en la primera tanda).
+        """
+        subscription = self._next_id
+        self._next_id += 1
+        self._subscribers[subscription] = (apply, is_visible)
+        return subscription
+
+    def unsubscribe(self, subscription: int):
+        self._subscribers.pop(subscription, None)
+
+    def set_mode(self, mode: str, on_done: Callable[[ThemeSwitchStats], None] | None = None):
+        """
+        Aplica la paleta de 'mode' ("Light" o "Dark"): los suscriptores visibles ahora,
+        el resto por tandas. Un cambio nuevo reemplaza al que estuviera en curso.
+        """
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self.palette = PALETTES[mode]
+
+        visible, hidden = [], []
+        for subscription, (_apply, is_visible) in self._subscribers.items():
+            (visible if is_visible is None or is_visible() else hidden).append(subscription)
+        self._queue = deque(visible + hidden)
+        self._switch = (mode, len(self._queue), len(visible), time.perf_counter(), [], on_done)
+        self._run_slice(min_items=len(visible))
+
+    def _run_slice(self, min_items: int = 0):
+        self._job = None
+        start = time.perf_counter()
+        deadline = start + self.slice_ms / 1000
+        applied = 0
+        while self._queue and (applied < min_items or time.perf_counter() < deadline):
+            subscriber = self._subscribers.get(self._queue.popleft())
+            if subscriber is not None:  # Puede haberse dado de baja durante el cambio
+                subscriber[0](self.palette)
+            applied += 1
+
+        mode, subscribers, visible, started, slices, on_done = self._switch
+        slices.append((time.perf_counter() - start) * 1000)
+        if self._queue:
+            self._job = self.root.after_idle(self._run_slice)
+            return
+        self.last_switch = ThemeSwitchStats(mode, subscribers, visible, len(slices), max(slices),
+                                            (time.perf_counter() - started) * 1000)
+        if on_done is not None:
+            on_done(self.last_switch)
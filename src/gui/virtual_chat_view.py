@@ -0,0 +1,363 @@
+# src/gui/virtual_chat_view.py
+"""
+Historial de chat virtualizado.
+
+Los mensajes se guardan en un modelo de datos (ChatHistoryModel) con la altura de cada
+fila y sus posiciones acumuladas; en el canvas solo existen las burbujas de la zona
+visible más un margen, y las que salen de ella se reutilizan para otros mensajes.
+Así añadir un mensaje o desplazarse cuesta lo mismo con 10 que con 5.000 mensajes.
+
+La altura de un mensaje que aún no se ha mostrado se estima con las métricas de la
+fuente; al mostrarlo se mide y se corrige.
+"""
+import math
+import tkinter as tk
+import tkinter.font as tkfont
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable
+
+import customtkinter as ctk
+
+from src.gui.animation import Tween
+from src.gui.chat_bubble import SLIDE_DURATION, ChatBubble
+
+# Separación vertical entre mensajes (px)
+ROW_SPACING = 10
+# Margen por encima y por debajo de la zona visible, en alturas de la ventana
+OVERSCAN_VIEWPORTS = 1.0
+# Animación de entrada de los mensajes nuevos (equivalente al deslizamiento de ChatBubble)
+SLIDE_DISTANCE = 170
+# Pasadas máximas de medición por refresco (las correcciones de altura pueden mover la vista)
+MAX_REFRESH_PASSES = 3
+
+
+class ChatMessage:
+    """Mensaje del historial y la altura (px) que ocupa su burbuja."""
+    __slots__ = ("text", "is_user", "height", "measured")
+
+    def __init__(self, text: str, is_user: bool, height: int):
+        self.text = text
+        self.is_user = is_user
+        self.height = height
+        self.measured = False  # True cuando la altura se midió en pantalla y no es una estimación
+
+
+class ChatHistoryModel:
+    """
+    Lista de mensajes con la posición vertical de cada uno. _offsets[i] es la coordenada
+    y donde empieza el mensaje i y _offsets[-1] la altura total. Añadir al final o cambiar
+    la altura del último mensaje es O(1); un cambio de altura en medio marca las posiciones
+    a partir de ese mensaje para recalcularlas en la siguiente consulta.
+    """
+
+    def __init__(self, estimate_height: Callable[[str, bool], int], spacing: int = ROW_SPACING):
+        self.estimate_height = estimate_height
+        self.spacing = spacing
+        self.messages: list[ChatMessage] = []
+        self._offsets = [0]
+        self._dirty_from: int | None = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __getitem__(self, index: int) -> ChatMessage:
+        return self.messages[index]
+
+    def append(self, text: str, is_user: bool) -> int:
+        """Añade un mensaje y devuelve su índice."""
+        message = ChatMessage(text, is_user, self.estimate_height(text, is_user))
+        self.messages.append(message)
+        if self._dirty_from is None:
+            self._offsets.append(self._offsets[-1] + message.height + self.spacing)
+        return len(self.messages) - 1
+
+    def append_text(self, index: int, chunk: str):
+        """Añade texto a un mensaje (streaming); su altura vuelve a ser una estimación."""
+        message = self.messages[index]
+        message.text += chunk
+        message.measured = False
+        self.set_height(index, max(message.height, self.estimate_height(message.text, message.is_user)))
+
+    def set_height(self, index: int, height: int, measured: bool = False) -> bool:
+        """Cambia la altura de un mensaje. Devuelve True si cambió."""
+        message = self.messages[index]
+        message.measured = message.measured or measured
+        if height == message.height:
+            return False
+        message.height = height
+        if self._dirty_from is None and index == len(self.messages) - 1:
+            self._offsets[-1] = self._offsets[-2] + height + self.spacing
+        else:
+            self._dirty_from = index if self._dirty_from is None else min(self._dirty_from, index)
+        return True
+
+    def _ensure_offsets(self):
+        start = self._dirty_from
+        if start is None:
+            return
+        rows = (message.height + self.spacing for message in self.messages[start:])
+        self._offsets[start:] = accumulate(rows, initial=self._offsets[start])
+        self._dirty_from = None
+
+    @property
+    def total_height(self) -> int:
+        self._ensure_offsets()
+        return self._offsets[-1]
+
+    def offset(self, index: int) -> int:
+        """Coordenada y donde empieza el mensaje."""
+        self._ensure_offsets()
+        return self._offsets[index]
+
+    def index_at(self, y: float) -> int:
+        """Índice del mensaje que ocupa la coordenada y (búsqueda binaria)."""
+        self._ensure_offsets()
+        index = bisect_right(self._offsets, y) - 1
+        return min(max(index, 0), len(self.messages) - 1)
+
+    def visible_range(self, top: float, bottom: float) -> range:
+        """Índices de los mensajes que se solapan con [top, bottom]."""
+        if not self.messages:
+            return range(0)
+        return range(self.index_at(top), self.index_at(bottom) + 1)
+
+    def clear(self):
+        self.messages.clear()
+        self._offsets = [0]
+        self._dirty_from = None
+
+
+class VirtualChatView(ctk.CTkFrame):
+    """
+    Área de chat con desplazamiento que solo instancia las burbujas visibles. Debajo
+    del último mensaje hay un marco ('footer') para el indicador de escritura y los
+    botones de respuesta rápida, que se empaquetan en él como en un marco normal.
+    """
+
+    def __init__(self, parent, fg_color="#F8F8F8", user_avatar_path=None, bot_avatar_path=None, theme=None,
+                 animations=None, *args, **kwargs):
+        # theme: ThemeEngine al que se suscriben las burbujas (visibles primero al cambiar de modo)
+        # animations: AnimationScheduler que anima la entrada de los mensajes (sin él no hay animación)
+        super().__init__(parent, fg_color=fg_color, *args, **kwargs)
+        self.chat_area_bg = fg_color
+        self.theme = theme
+        self.animations = animations
+        self.avatar_paths = {True: user_avatar_path, False: bot_avatar_path}
+
+        self.canvas = tk.Canvas(self, borderwidth=0, background=fg_color, highlightthickness=0)
+        self.vsb = ctk.CTkScrollbar(self, orientation="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.vsb.set)
+        self.vsb.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.footer = ctk.CTkFrame(self.canvas, fg_color=fg_color, width=1, height=1)
+        self._footer_id = self.canvas.create_window(0, 0, window=self.footer, anchor="nw")
+
+        self.model = ChatHistoryModel(self._estimate_height)
+        self._visible: dict[int, ChatBubble] = {}               # índice del mensaje -> burbuja que lo muestra
+        self._pools: dict[bool, list[ChatBubble]] = {True: [], False: []}  # burbujas libres, por tipo
+        self._window_ids: dict[ChatBubble, int] = {}            # burbuja -> elemento del canvas
+        self._slides: dict[int, int] = {}                       # índice -> desplazamiento restante
+        self._moved_slides: set[int] = set()                    # deslizamientos cambiados en este cuadro
+        self._refresh_job = None
+        self._width = 1
+        self._viewport_height = 1
+
+        # Métricas para estimar alturas: misma fuente y ancho de ajuste que ChatBubble
+        scaling = ctk.ScalingTracker.get_widget_scaling(self)
+        font = tkfont.Font(family="Arial", size=-round(11 * scaling))
+        self._line_height = font.metrics("linespace")
+        self._char_width = font.measure("abcdefghijklmnopqrstuvwxyz ") / 27
+        self._wrap_width = 700 * scaling
+        self._min_height = round(64 * scaling)      # avatar de 60 px y su margen
+        self._bubble_padding = round(20 * scaling)  # márgenes de la etiqueta y del marco de la burbuja
+
+        self.footer.bind("<Configure>", lambda event: self._update_layout())
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel) # Windows y macOS
+        self.canvas.bind_all("<Button-4>", self._on_mousewheel)   # Linux (scroll up)
+        self.canvas.bind_all("<Button-5>", self._on_mousewheel)   # Linux (scroll down)
+
+    # --- API usada por MainWindow ---
+
+    def append_message(self, text: str, is_user: bool, animate: bool = True) -> int:
+        """Añade un mensaje al final, desplaza la vista hasta él y devuelve su índice."""
+        index = self.model.append(text, is_user)
+        if animate and self.animations is not None:
+            self.animations.start(("slide", index), Tween(SLIDE_DISTANCE, 0, SLIDE_DURATION,
+                                                         lambda value, i=index: self._set_slide(i, value)))
+        self._update_layout()
+        self.canvas.yview_moveto(1.0)
+        self._schedule_refresh()
+        return index
+
+    def append_text(self, index: int, chunk: str):
+        """Añade texto a un mensaje ya mostrado (respuestas en streaming)."""
+        self.model.append_text(index, chunk)
+        bubble = self._visible.get(index)
+        if bubble is not None:
+            bubble.append_text(chunk)
+        self._update_layout()
+        self.canvas.yview_moveto(1.0)
+        self._schedule_refresh()
+
+    def message_text(self, index: int) -> str:
+        return self.model[index].text
+
+    def scroll_to_end(self):
+        """Desplaza la vista al final (tras mostrar u ocultar algo en el footer)."""
+        self.canvas.update_idletasks()
+        self._update_layout()
+        self.canvas.yview_moveto(1.0)
+        self._schedule_refresh()
+
+    def clear(self):
+        """Elimina todos los mensajes; las burbujas quedan libres para reutilizarse."""
+        for index in list(self._visible):
+            self._release(index)
+        self.model.clear()
+        for index in list(self._slides):
+            self.animations.cancel(("slide", index), finish=False)
+        self._slides.clear()
+        self._update_layout()
+        self.canvas.yview_moveto(0.0)
+
+    def apply_palette(self, palette):
+        """Aplica el fondo del área de chat al marco, al canvas y al footer (las burbujas se suscriben aparte)."""
+        if palette["chat_area_bg"] == self.chat_area_bg:
+            return
+        self.chat_area_bg = palette["chat_area_bg"]
+        self.configure(fg_color=self.chat_area_bg)
+        self.canvas.configure(background=self.chat_area_bg)
+        self.footer.configure(fg_color=self.chat_area_bg)
+
+    # --- Geometría ---
+
+    def _estimate_height(self, text: str, is_user: bool) -> int:
+        """Altura aproximada de la burbuja: líneas que ocupará el texto con el ajuste de ChatBubble."""
+        chars_per_line = max(1, int(self._wrap_width / self._char_width))
+        lines = sum(max(1, math.ceil(len(paragraph) / chars_per_line)) for paragraph in text.split("\n"))
+        return max(self._min_height, lines * self._line_height + self._bubble_padding)
+
+    def _update_layout(self):
+        """Coloca el footer tras el último mensaje y ajusta la región desplazable (O(1))."""
+        total = self.model.total_height
+        footer_height = self.footer.winfo_reqheight() if self.footer.pack_slaves() else 0
+        self.canvas.coords(self._footer_id, 0, total)
+        self.canvas.configure(scrollregion=(0, 0, self._width, total + footer_height))
+
+    def _on_canvas_configure(self, event):
+        self._width = event.width
+        self._viewport_height = event.height
+        self.canvas.itemconfigure(self._footer_id, width=event.width)
+        for index in self._visible:
+            self._place(index)
+        self._update_layout()
+        self._schedule_refresh()
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_refresh()
+
+    def _on_mousewheel(self, event):
+        # Las burbujas son hijas del canvas: la rueda también desplaza cuando el puntero está sobre ellas
+        widget = self.canvas.winfo_containing(event.x_root, event.y_root)
+        if widget is not None and str(widget).startswith(str(self.canvas)):
+            if event.num == 5 or event.delta == -120: # Scroll down
+                self.canvas.yview_scroll(1, "units")
+            elif event.num == 4 or event.delta == 120: # Scroll up
+                self.canvas.yview_scroll(-1, "units")
+            self._schedule_refresh()
+
+    def _is_at_end(self) -> bool:
+        return self.canvas.yview()[1] >= 0.999
+
+    # --- Burbujas visibles ---
+
+    def _schedule_refresh(self):
+        if self._refresh_job is None:
+            self._refresh_job = self.after_idle(self._refresh)
+
+    def _refresh(self):
+        """
+        Sincroniza las burbujas con la zona visible (más el margen): libera las que
+        salieron, asigna burbujas a los mensajes que entraron y mide su altura real.
+        """
+        self._refresh_job = None
+        for _ in range(MAX_REFRESH_PASSES):
+            top = self.canvas.canvasy(0)
+            margin = self._viewport_height * OVERSCAN_VIEWPORTS
+            wanted = self.model.visible_range(top - margin, top + self._viewport_height + margin)
+
+            for index in [index for index in self._visible if index not in wanted]:
+                self._release(index)
+            for index in wanted:
+                if index not in self._visible:
+                    self._acquire(index)
+
+            # Medir las burbujas cuya altura aún es una estimación
+            pending = [index for index in wanted if not self.model[index].measured]
+            if not pending:
+                return
+            at_end = self._is_at_end()
+            self.canvas.update_idletasks()
+            changed = False
+            for index in pending:
+                changed |= self.model.set_height(index, self._visible[index].winfo_reqheight(), measured=True)
+            if not changed:
+                return
+            for index in self._visible:
+                self._place(index)
+            self._update_layout()
+            if at_end:
+                self.canvas.yview_moveto(1.0)
+
+    def _acquire(self, index: int):
+        message = self.model[index]
+        pool = self._pools[message.is_user]
+        bubble = pool.pop() if pool else self._create_bubble(message.is_user)
+        if bubble.text != message.text:
+            bubble.set_text(message.text)
+        if self.theme is not None:
+            bubble.apply_palette(self.theme.palette)  # Por si vuelve a la vista antes de su tanda del cambio de tema
+        self._visible[index] = bubble
+        self.canvas.itemconfigure(self._window_ids[bubble], state="normal")
+        self._place(index)
+
+    def _release(self, index: int):
+        bubble = self._visible.pop(index)
+        self.canvas.itemconfigure(self._window_ids[bubble], state="hidden")
+        self._pools[bubble.is_user].append(bubble)
+
+    def _create_bubble(self, is_user: bool) -> ChatBubble:
+        bubble = ChatBubble(self.canvas, "", is_user, avatar_path=self.avatar_paths[is_user],
+                            chat_area_bg=self.chat_area_bg, auto_pack=False)
+        self._window_ids[bubble] = self.canvas.create_window(0, 0, window=bubble, anchor="nw", state="hidden")
+        if self.theme is not None:
+            self.theme.subscribe(bubble.apply_palette, is_visible=bubble.winfo_ismapped)
+        return bubble
+
+    def _place(self, index: int):
+        """Coloca la burbuja del mensaje; durante la animación de entrada se estrecha por un lado."""
+        bubble = self._visible.get(index)
+        if bubble is None:
+            return
+        slide = self._slides.get(index, 0)
+        x = slide if bubble.is_user else 0
+        self.canvas.coords(self._window_ids[bubble], x, self.model.offset(index) + self.model.spacing // 2)
+        self.canvas.itemconfigure(self._window_ids[bubble], width=max(1, self._width - slide))
+
+    def _set_slide(self, index: int, value: float):
+        """Paso de la animación de entrada; las burbujas movidas se recolocan juntas en el reacomodo del cuadro."""
+        if value > 0:
+            self._slides[index] = round(value)
+        else:
+            self._slides.pop(index, None)
+        self._moved_slides.add(index)
+        self.animations.request_layout(self._place_moved_slides)
+
+    def _place_moved_slides(self):
+        for index in self._moved_slides:
+            self._place(index)
+        self._moved_slides.clear()
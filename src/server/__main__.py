@@ -0,0 +1,67 @@
+# src/server/__main__.py
+"""
+Servidor de chat sin interfaz gráfica.
+
+Uso: python -m src.server [--host 127.0.0.1] [--port 8080] [--fake-llm]
+"""
+import argparse
+import asyncio
+import threading
+
+from src.core.chatbot_logic import ChatbotLogic
+from src.core.data_watcher import DataWatcher
+from src.server.chat_server import ChatServer
+from src.utils.config import DATA_RELOAD_INTERVAL_SECONDS, FAKE_LLM_LATENCY_MS, SESSION_IDLE_TIMEOUT_SECONDS
+from src.utils.gemini_api import GeminiAPI
+from src.utils.llm_backend import FAKE
+from src.utils.logger import setup_logging
+
+setup_logging()
+
+
+def build_chatbot(fake_llm: bool, fake_latency: float) -> ChatbotLogic:
+    """Crea el ChatbotLogic compartido por todos los clientes."""
+    if fake_llm:
+        # El backend "fake" con las variables FAKE_LLM_*, salvo la latencia de --fake-latency
+        return ChatbotLogic(gemini_api=GeminiAPI(None, backend=FAKE,
+                                                 backend_options={"latency_seconds": fake_latency}))
+    return ChatbotLogic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/WebSocket de IngeChat 360°.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fake-llm", action="store_true",
+                        help="Usar un sustituto local de Gemini (no requiere clave ni red).")
+    parser.add_argument("--fake-latency", type=float, default=FAKE_LLM_LATENCY_MS / 1000,
+                        help="Latencia (mediana) en segundos del sustituto local de Gemini.")
+    parser.add_argument("--max-connections", type=int, default=512)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--session-idle", type=float, default=SESSION_IDLE_TIMEOUT_SECONDS,
+                        help="Segundos sin uso tras los que se olvida una sesión (0 lo desactiva).")
+    parser.add_argument("--max-upstream", type=int, default=16,
+                        help="Consultas simultáneas a Gemini.")
+    parser.add_argument("--max-upstream-waiting", type=int, default=64,
+                        help="Consultas a Gemini que pueden esperar antes de responder 503.")
+    parser.add_argument("--reload-interval", type=float, default=DATA_RELOAD_INTERVAL_SECONDS,
+                        help="Segundos entre revisiones de data/ para recargarla en caliente (0 la desactiva).")
+    args = parser.parse_args()
+
+    chatbot = build_chatbot(args.fake_llm, args.fake_latency)
+    # El índice del corrector de tipeo se construye mientras el servidor ya acepta conexiones
+    threading.Thread(target=chatbot.data_manager.warm_up, name="warm-up", daemon=True).start()
+    if args.reload_interval > 0:
+        DataWatcher(chatbot.data_manager, args.reload_interval).start()
+    server = ChatServer(chatbot, host=args.host, port=args.port,
+                        max_connections=args.max_connections, max_sessions=args.max_sessions,
+                        session_idle_seconds=args.session_idle,
+                        max_upstream_concurrency=args.max_upstream, max_upstream_waiting=args.max_upstream_waiting)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Servidor detenido.")
+
+
+if __name__ == "__main__":
+    main()
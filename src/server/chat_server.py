@@ -0,0 +1,374 @@
+# src/server/chat_server.py
+import asyncio
+import contextlib
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
+from src.core.chatbot_logic import ChatbotLogic
+from src.server.protocol import (HttpError, HttpRequest, WS_CLOSE, WS_PING, WS_PONG, WS_TEXT,
+                                 build_response, build_websocket_handshake, encode_websocket_frame,
+                                 read_http_request, read_websocket_message)
+from src.utils.config import SESSION_IDLE_TIMEOUT_SECONDS
+from src.utils.logger import logging_stats
+from src.utils.resilience import OPEN
+from src.utils.tracing import Trace, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class ServerOverloaded(Exception):
+    """Se rechaza una petición porque se alcanzó algún límite de carga."""
+
+
+class ClientSession:
+    """Conversación de un cliente, con un candado para procesar sus mensajes de uno en uno."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class ChatServer:
+    """
+    Servidor asyncio que expone ChatbotLogic por HTTP (POST /chat) y WebSocket (/ws).
+    Un único ChatbotLogic atiende a todos los clientes; cada cliente usa su propio
+    identificador de sesión y, por tanto, su propio historial con Gemini.
+    Las respuestas locales se calculan directamente en el bucle de eventos; las consultas
+    a Gemini se ejecutan en un grupo de hilos para no bloquearlo. Los límites de conexiones,
+    sesiones y consultas a Gemini en curso/en espera aplican contrapresión (503).
+    Las sesiones sin uso durante más de session_idle_seconds se olvidan (0 lo desactiva).
+    """
+
+    def __init__(self, chatbot: ChatbotLogic, host: str = "127.0.0.1", port: int = 8080,
+                 max_connections: int = 512, max_sessions: int = 1000, max_upstream_concurrency: int = 16,
+                 max_upstream_waiting: int = 64, max_body_bytes: int = 16 * 1024,
+                 session_idle_seconds: float = SESSION_IDLE_TIMEOUT_SECONDS):
+        self.chatbot = chatbot
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.max_sessions = max_sessions
+        self.max_upstream_waiting = max_upstream_waiting
+        self.max_body_bytes = max_body_bytes
+        self.session_idle_seconds = session_idle_seconds
+
+        self.sessions: OrderedDict[str, ClientSession] = OrderedDict()
+        self._upstream_semaphore = asyncio.Semaphore(max_upstream_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_upstream_concurrency, thread_name_prefix="gemini")
+        self._server = None
+        self.stats = {
+            "connections": 0,
+            "requests": 0,
+            "local_answers": 0,
+            "upstream_answers": 0,
+            "upstream_in_flight": 0,
+            "upstream_waiting": 0,
+            "rejected": 0,
+        }
+
+    async def start(self):
+        """Abre el socket de escucha. Si port es 0 se asigna un puerto libre."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Servidor de chat escuchando en http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Sesiones ---
+
+    def _get_session(self, session_id: str | None) -> ClientSession:
+        """Devuelve la sesión indicada o crea una nueva, expulsando la menos usada si se alcanza el límite."""
+        self._evict_idle_sessions()
+        session = self.sessions.get(session_id) if session_id else None
+        if session is not None:
+            session.last_used = time.monotonic()
+            self.sessions.move_to_end(session.session_id)
+            return session
+
+        if len(self.sessions) >= self.max_sessions:
+            idle_id = next((sid for sid, s in self.sessions.items() if not s.lock.locked()), None)
+            if idle_id is None:
+                raise ServerOverloaded("Se alcanzó el máximo de sesiones activas.")
+            self._drop_session(idle_id)
+        session = ClientSession(session_id or secrets.token_hex(8))
+        self.sessions[session.session_id] = session
+        return session
+
+    def _evict_idle_sessions(self):
+        """Olvida las sesiones inactivas. El diccionario está ordenado de la menos a la más usada."""
+        if self.session_idle_seconds <= 0:
+            return
+        deadline = time.monotonic() - self.session_idle_seconds
+        for session_id, session in list(self.sessions.items()):
+            if session.last_used > deadline:
+                break
+            if not session.lock.locked():
+                self._drop_session(session_id)
+
+    def _drop_session(self, session_id: str):
+        """Olvida la sesión y libera su historial con Gemini."""
+        self.sessions.pop(session_id, None)
+        self.chatbot.start_new_chat_session(session_id)
+
+    # --- Respuestas ---
+
+    async def _acquire_upstream(self, trace: Trace):
+        """Reserva un hueco para consultar a Gemini o rechaza si ya hay demasiadas consultas esperando."""
+        if self._upstream_semaphore.locked() and self.stats["upstream_waiting"] >= self.max_upstream_waiting:
+            trace.annotate(source="rejected")
+            raise ServerOverloaded("Demasiadas consultas a Gemini en espera.")
+        self.stats["upstream_waiting"] += 1
+        try:
+            with trace.span("upstream_wait"):
+                await self._upstream_semaphore.acquire()
+        finally:
+            self.stats["upstream_waiting"] -= 1
+        self.stats["upstream_in_flight"] += 1
+
+    def _release_upstream(self):
+        self.stats["upstream_in_flight"] -= 1
+        self._upstream_semaphore.release()
+
+    async def answer(self, session: ClientSession, message: str) -> str:
+        """Responde un mensaje completo en el contexto de la sesión."""
+        trace = tracer.start_trace("chat", session_id=session.session_id, channel="http")
+        try:
+            async with session.lock:
+                session.last_used = time.monotonic()
+                local_answer = self.chatbot.find_local_answer(message, trace)
+                if local_answer:
+                    self.stats["local_answers"] += 1
+                    return local_answer
+
+                await self._acquire_upstream(trace)
+                try:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(self._executor, self.chatbot.query_gemini, message,
+                                                          session.session_id, trace)
+                finally:
+                    self._release_upstream()
+                self.stats["upstream_answers"] += 1
+                return response
+        finally:
+            trace.finish()
+
+    async def answer_stream(self, session: ClientSession, message: str) -> AsyncIterator[str]:
+        """Responde un mensaje por fragmentos; la consulta a Gemini se consume en un hilo."""
+        trace = tracer.start_trace("chat", session_id=session.session_id, channel="websocket")
+        try:
+            async with session.lock:
+                session.last_used = time.monotonic()
+                local_answer = self.chatbot.find_local_answer(message, trace)
+                if local_answer:
+                    self.stats["local_answers"] += 1
+                    yield local_answer
+                    return
+
+                await self._acquire_upstream(trace)
+                # Si el consumidor cierra este generador (el cliente se desconectó), el hilo deja de leer
+                cancelled = threading.Event()
+                try:
+                    loop = asyncio.get_running_loop()
+                    chunks = asyncio.Queue()
+
+                    def produce():
+                        stream = self.chatbot.query_gemini_stream(message, session.session_id, trace)
+                        try:
+                            for chunk in stream:
+                                if cancelled.is_set():
+                                    break
+                                loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                        finally:
+                            stream.close()
+                            loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+                    producer = loop.run_in_executor(self._executor, produce)
+                    while (chunk := await chunks.get()) is not None:
+                        yield chunk
+                    await producer
+                finally:
+                    cancelled.set()
+                    self._release_upstream()
+                self.stats["upstream_answers"] += 1
+        finally:
+            trace.finish()
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.stats["connections"] >= self.max_connections:
+            self.stats["rejected"] += 1
+            writer.write(build_response(503, {"error": "Servidor ocupado."}, keep_alive=False))
+            await self._close_writer(writer)
+            return
+
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    request = await read_http_request(reader, self.max_body_bytes)
+                except HttpError as e:
+                    writer.write(build_response(e.status, {"error": e.message}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                self.stats["requests"] += 1
+
+                if request.is_websocket_upgrade and request.path == "/ws":
+                    try:
+                        handshake = build_websocket_handshake(request)
+                    except HttpError as e:
+                        writer.write(build_response(e.status, {"error": e.message}, keep_alive=False))
+                        break
+                    writer.write(handshake)
+                    await writer.drain()
+                    await self._handle_websocket(reader, writer)
+                    break
+
+                status, payload = await self._dispatch(request)
+                writer.write(build_response(status, payload, keep_alive=request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.stats["connections"] -= 1
+            await self._close_writer(writer)
+
+    async def _dispatch(self, request: HttpRequest) -> tuple[int, dict | str]:
+        """Atiende una petición HTTP normal y devuelve (código, cuerpo JSON o texto de /metrics)."""
+        try:
+            if request.path == "/chat":
+                if request.method != "POST":
+                    raise HttpError(405, "Usa POST para /chat.")
+                payload = request.json()
+                message = str(payload.get("message", "")).strip()
+                if not message:
+                    raise HttpError(400, "El campo 'message' es obligatorio.")
+                session = self._get_session(payload.get("session_id"))
+                response = await self.answer(session, message)
+                return 200, {"session_id": session.session_id, "response": response}
+
+            if request.path == "/reset":
+                if request.method != "POST":
+                    raise HttpError(405, "Usa POST para /reset.")
+                session = self.sessions.get(request.json().get("session_id"))
+                if session is None:
+                    raise HttpError(404, "Sesión no encontrada.")
+                async with session.lock:
+                    self.chatbot.start_new_chat_session(session.session_id)
+                return 200, {"session_id": session.session_id, "reset": True}
+
+            if request.path in ("/health", "/stats"):
+                token_metrics = getattr(self.chatbot.gemini_api, "token_metrics", None)
+                caller = getattr(self.chatbot.gemini_api, "caller", None)
+                gemini_client = caller.stats() if caller else None
+                single_flight = getattr(self.chatbot.gemini_api, "single_flight", None)
+                last_reload = self.chatbot.data_manager.last_reload
+                # Con el circuito abierto se sigue respondiendo, pero solo con los datos locales
+                status = "degraded" if gemini_client and gemini_client.breaker_state == OPEN else "ok"
+                return 200, {"status": status, "sessions": len(self.sessions), **self.stats,
+                             "tokens": token_metrics.snapshot() if token_metrics else None,
+                             "gemini_client": gemini_client._asdict() if gemini_client else None,
+                             "coalescing": single_flight.stats()._asdict() if single_flight else None,
+                             "last_reload": last_reload._asdict() if last_reload else None,
+                             "tracing": tracer.snapshot() if request.path == "/stats" else None,
+                             "logging": logging_stats()._asdict()}
+
+            if request.path == "/metrics":
+                return 200, tracer.prometheus_text()
+
+            raise HttpError(404, f"Ruta no encontrada: {request.path}")
+        except HttpError as e:
+            return e.status, {"error": e.message}
+        except ServerOverloaded as e:
+            self.stats["rejected"] += 1
+            return 503, {"error": str(e)}
+
+    # --- WebSocket ---
+
+    async def _handle_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Cada conexión WebSocket es una sesión. El cliente envía texto (o JSON con 'message')
+        y recibe {'type': 'chunk', 'text': ...} por fragmento y {'type': 'done'} al final.
+        Los mensajes se procesan de uno en uno, lo que limita de forma natural a cada cliente.
+        """
+        session = None
+
+        async def send(payload: dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(encode_websocket_frame(WS_TEXT, data))
+            await writer.drain()
+
+        try:
+            while True:
+                try:
+                    opcode, data = await read_websocket_message(reader, self.max_body_bytes)
+                except HttpError as e:
+                    await send({"type": "error", "error": e.message})
+                    break
+                if opcode == WS_CLOSE:
+                    writer.write(encode_websocket_frame(WS_CLOSE, data[:2]))
+                    await writer.drain()
+                    break
+                if opcode == WS_PING:
+                    writer.write(encode_websocket_frame(WS_PONG, data))
+                    await writer.drain()
+                    continue
+                if opcode != WS_TEXT:
+                    continue
+
+                text = data.decode("utf-8", errors="replace")
+                try:
+                    payload = json.loads(text)
+                    message = str(payload.get("message", "")).strip() if isinstance(payload, dict) else text
+                except ValueError:
+                    message = text.strip()
+                if not message:
+                    continue
+
+                self.stats["requests"] += 1
+                try:
+                    # Se vuelve a pedir en cada mensaje: si expiró por inactividad se recrea con el mismo id
+                    is_new = session is None
+                    session = self._get_session(None if is_new else session.session_id)
+                    if is_new:
+                        await send({"type": "session", "session_id": session.session_id})
+                    # aclosing cierra la respuesta (y detiene su hilo) aunque el envío falle a la mitad
+                    async with contextlib.aclosing(self.answer_stream(session, message)) as stream:
+                        async for chunk in stream:
+                            await send({"type": "chunk", "text": chunk})
+                    await send({"type": "done"})
+                except ServerOverloaded as e:
+                    self.stats["rejected"] += 1
+                    await send({"type": "error", "error": str(e)})
+        finally:
+            # También si el cliente se desconecta sin trama de cierre (IncompleteReadError, ConnectionError)
+            if session is not None:
+                self._drop_session(session.session_id)
+
+    @staticmethod
+    async def _close_writer(writer: asyncio.StreamWriter):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
@@ -0,0 +1,174 @@
+# src/server/protocol.py
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from typing import NamedTuple
+
+# Constante de RFC 6455 para calcular Sec-WebSocket-Accept
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    503: "Service Unavailable",
+}
+
+WS_TEXT = 0x1
+WS_CLOSE = 0x8
+WS_PING = 0x9
+WS_PONG = 0xA
+_WS_CONTINUATION = 0x0
+
+MAX_HEADER_LINES = 100
+
+
+class HttpError(Exception):
+    """Error de protocolo que se responde al cliente con el código HTTP indicado."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class HttpRequest(NamedTuple):
+    method: str
+    path: str
+    headers: dict[str, str]  # Nombres en minúsculas
+    body: bytes
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+    @property
+    def is_websocket_upgrade(self) -> bool:
+        return self.headers.get("upgrade", "").lower() == "websocket"
+
+    def json(self) -> dict:
+        """Decodifica el cuerpo como un objeto JSON."""
+        try:
+            payload = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "El cuerpo de la petición no es JSON válido.")
+        if not isinstance(payload, dict):
+            raise HttpError(400, "Se esperaba un objeto JSON.")
+        return payload
+
+
+async def read_http_request(reader: asyncio.StreamReader, max_body_bytes: int) -> HttpRequest | None:
+    """Lee una petición HTTP/1.1. Devuelve None si el cliente cerró la conexión."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Línea de petición inválida.")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(431, "Demasiadas cabeceras.")
+
+    try:
+        content_length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400, "Content-Length inválido.")
+    if content_length < 0:
+        raise HttpError(400, "Content-Length inválido.")
+    if content_length > max_body_bytes:
+        raise HttpError(413, f"El cuerpo supera el máximo de {max_body_bytes} bytes.")
+    body = await reader.readexactly(content_length) if content_length else b""
+    return HttpRequest(method.upper(), target.split("?", 1)[0], headers, body)
+
+
+def build_response(status: int, payload: dict | str, keep_alive: bool = True,
+                   extra_headers: dict | None = None) -> bytes:
+    """Construye una respuesta HTTP con cuerpo JSON (o texto plano si 'payload' es una cadena)."""
+    if isinstance(payload, str):
+        # Formato de texto de Prometheus (/metrics)
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+    }
+    headers.update(extra_headers or {})
+    head = f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return head.encode("latin-1") + b"\r\n" + body
+
+
+def build_websocket_handshake(request: HttpRequest) -> bytes:
+    """Construye la respuesta 101 que acepta la actualización a WebSocket."""
+    key = request.headers.get("sec-websocket-key")
+    if not key:
+        raise HttpError(400, "Falta la cabecera Sec-WebSocket-Key.")
+    accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+    return ("HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii")
+
+
+async def read_websocket_message(reader: asyncio.StreamReader, max_bytes: int) -> tuple[int, bytes]:
+    """
+    Lee un mensaje WebSocket completo (uniendo fragmentos) y devuelve (opcode, datos).
+    Los frames de control (ping/close) se devuelven en cuanto llegan.
+    """
+    opcode = None
+    payload = b""
+    while True:
+        first, second = await reader.readexactly(2)
+        fin = first & 0x80
+        frame_opcode = first & 0x0F
+        masked = second & 0x80
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await reader.readexactly(8))
+        if len(payload) + length > max_bytes:
+            raise HttpError(413, "Mensaje WebSocket demasiado grande.")
+        mask = await reader.readexactly(4) if masked else None
+        data = await reader.readexactly(length)
+        if mask:
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+        if frame_opcode >= 0x8:
+            return frame_opcode, data
+        if frame_opcode != _WS_CONTINUATION:
+            opcode = frame_opcode
+        payload += data
+        if fin:
+            return opcode, payload
+
+
+def encode_websocket_frame(opcode: int, data: bytes, mask: bytes | None = None) -> bytes:
+    """Codifica un frame WebSocket (los clientes deben enmascarar sus frames; el servidor no)."""
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(data)
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", length)
+    if mask:
+        data = mask + bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+    return header + data
@@ -4,4 +4,90 @@ from dotenv import load_dotenv
 
 load_dotenv() # Carga las variables del archivo .env
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Modelo de lenguaje que usa GeminiAPI (src/utils/llm_backend.py): "gemini" (requiere GEMINI_API_KEY)
+# o "fake", un sustituto local y determinista para desarrollar y medir sin clave ni red
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").strip().lower()
+# Sustituto "fake": latencia mediana en ms y su distribución ("fixed", "uniform" o "lognormal"), dispersión
+# (fracción de la latencia en "uniform", desviación logarítmica en "lognormal"), fragmentos por segundo en
+# streaming (0: la latencia se reparte entre los fragmentos), fracción de llamadas que fallan y semilla
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+FAKE_LLM_LATENCY_DISTRIBUTION = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal")
+FAKE_LLM_LATENCY_SPREAD = float(os.getenv("FAKE_LLM_LATENCY_SPREAD", "0.4"))
+FAKE_LLM_CHUNKS_PER_SECOND = float(os.getenv("FAKE_LLM_CHUNKS_PER_SECOND", "20"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+# Confianza mínima (0..1) para responder con una FAQ local en lugar de consultar a Gemini
+FAQ_MIN_CONFIDENCE = float(os.getenv("FAQ_MIN_CONFIDENCE", "0.6"))
+# Fracción mínima (0..1) de las palabras con contenido de la consulta (sin 'de', 'la', ...) que deben
+# aparecer en la pregunta de la FAQ: "horario de la biblioteca" no es la FAQ de la biblioteca virtual
+FAQ_MIN_COVERAGE = float(os.getenv("FAQ_MIN_COVERAGE", "0.6"))
+
+# Similitud mínima (0..1) para responder con un ejemplo de data/training_data.json
+TRAINING_MIN_SIMILARITY = float(os.getenv("TRAINING_MIN_SIMILARITY", "0.8"))
+
+# Errores de tipeo que se corrigen por palabra al normalizar las consultas (0 desactiva la corrección).
+# Las palabras de menos de 8 letras admiten como mucho uno.
+TYPO_MAX_DISTANCE = int(os.getenv("TYPO_MAX_DISTANCE", "2"))
+
+# Caché de respuestas de Gemini. Si RESPONSE_CACHE_PATH está vacío la caché solo vive en memoria.
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Sesiones de chat con Gemini: máximo de sesiones, expiración por inactividad y presupuesto de historial
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+SESSION_IDLE_TIMEOUT_SECONDS = float(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", "1800"))
+SESSION_MAX_HISTORY_TOKENS = int(os.getenv("SESSION_MAX_HISTORY_TOKENS", "2000"))
+
+# Datos locales que se añaden a las consultas a Gemini: presupuesto de tokens (0 lo desactiva) y máximo de fragmentos
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "300"))
+CONTEXT_TOP_K = int(os.getenv("CONTEXT_TOP_K", "4"))
+
+# Cada cuántos segundos se revisan los archivos de data/ para recargarlos en caliente (0 lo desactiva)
+DATA_RELOAD_INTERVAL_SECONDS = float(os.getenv("DATA_RELOAD_INTERVAL_SECONDS", "2"))
+
+# Instantánea binaria de data/ (relativa al directorio de datos) para arrancar sin reconstruir índices.
+# Se genera con 'python -m src.core.kb_snapshot'; vacío la desactiva.
+KB_SNAPSHOT_FILE = os.getenv("KB_SNAPSHOT_FILE", "kb_snapshot.bin")
+
+# Animaciones de la interfaz: cuadros por segundo del planificador y movimiento reducido
+# (REDUCED_MOTION=1 desactiva las animaciones, p. ej. en equipos lentos)
+ANIMATION_FRAME_RATE = int(os.getenv("ANIMATION_FRAME_RATE", "30"))
+REDUCED_MOTION = os.getenv("REDUCED_MOTION", "0").lower() in ("1", "true", "si", "sí")
+
+# Trazas de cada consulta (src/utils/tracing.py): archivo JSON lines donde se escriben al terminar (vacío las deja solo en memoria)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+# Registro (src/utils/logger.py): nivel, archivo rotativo (vacío: solo consola), tamaño y copias que se conservan,
+# máximo de caracteres de los textos largos (mensajes y respuestas de Gemini), uno de cada cuántos eventos
+# por petición se escriben y capacidad de la cola del hilo de escritura (si se llena, se descarta)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", os.path.join("logs", "ingechat.log"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "3"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "200"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "10"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Resiliencia de las llamadas a Gemini (src/utils/resilience.py): plazo total de una llamada con sus reintentos y
+# plazo de cada intento (0: sin plazo), reintentos de errores transitorios con espera exponencial (base y máximo,
+# en segundos), percentil de latencia a partir del cual se lanza una llamada duplicada (0 lo desactiva; p. ej. 0.95),
+# fallos seguidos que abren el circuito (0 lo desactiva), segundos que permanece abierto y llamadas simultáneas como
+# máximo (incluye los duplicados y las llamadas abandonadas por su plazo que aún no terminaron)
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "20"))
+GEMINI_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("GEMINI_ATTEMPT_TIMEOUT_SECONDS", "8"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "0.25"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "2"))
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0"))
+GEMINI_BREAKER_FAILURES = int(os.getenv("GEMINI_BREAKER_FAILURES", "5"))
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+
+# Preguntas idénticas sin historial que llegan a la vez comparten una sola llamada a Gemini
+# (src/utils/single_flight.py): segundos que las demás esperan su resultado (0 desactiva la agrupación)
+GEMINI_COALESCE_WAIT_SECONDS = float(os.getenv("GEMINI_COALESCE_WAIT_SECONDS", "25"))
@@ -0,0 +1,132 @@
+# src/utils/fake_gemini.py
+import logging
+import math
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """Error transitorio simulado (como un 503 de la API de Gemini)."""
+    code = 503
+
+
+class _Part:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Response:
+    """Respuesta con la forma de las del SDK: .parts y usage_metadata; iterable si es en streaming."""
+
+    def __init__(self, chunks: list[str], chunk_delay: float = 0.0):
+        self.parts = [_Part("".join(chunks))]
+        self.usage_metadata = None
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self):
+        for i, text in enumerate(self._chunks):
+            if i:
+                time.sleep(self._chunk_delay)
+            yield _Response([text])
+
+
+class _FaultInjectingChat:
+    def __init__(self, model: "FaultInjectingModel", history: list):
+        self.model = model
+        self.history = history
+
+    def send_message(self, content: str, stream: bool = False):
+        return self.model.respond(content, stream)
+
+
+# Distribuciones de la latencia de FaultInjectingModel
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class FaultInjectingModel:
+    """
+    Modelo local con fallos inyectables: es el backend "fake" de src/utils/llm_backend.py, con el
+    que se prueba el cliente real (caché, sesiones, plazos, reintentos y circuit breaker) sin
+    red. Cada llamada tarda 'latency_seconds', siempre ("fixed"),
+    repartida en ±'latency_spread' veces ese valor ("uniform") o con mediana 'latency_seconds' y
+    desviación 'latency_spread' en escala logarítmica ("lognormal", con cola larga como la de una
+    API real). Con probabilidad 'slow_rate' tarda 'slow_seconds' (cola lenta), con 'error_rate'
+    falla con UpstreamUnavailable y con 'hang_rate' se queda colgada 'hang_seconds'.
+    En streaming, sin 'chunk_rate' la latencia se reparte entre los fragmentos; con él, el primer
+    fragmento llega tras la latencia y los siguientes a 'chunk_rate' fragmentos por segundo.
+    Con 'response_chars' la respuesta se rellena hasta ese número de caracteres.
+    Los atributos se pueden cambiar en caliente (p. ej. error_rate = 1.0 simula una caída).
+    """
+
+    def __init__(self, latency_seconds: float = 0.05, slow_rate: float = 0.0, slow_seconds: float = 2.0,
+                 error_rate: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 60.0,
+                 chunks: int = 5, seed: int | None = 0, latency_distribution: str = "fixed",
+                 latency_spread: float = 0.0, chunk_rate: float | None = None, response_chars: int = 0):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribución de latencia desconocida: {latency_distribution!r} "
+                             f"(opciones: {', '.join(LATENCY_DISTRIBUTIONS)}).")
+        self.latency_seconds = latency_seconds
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.chunk_rate = chunk_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.chunks = max(1, chunks)
+        self.response_chars = response_chars
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def start_chat(self, history: list):
+        return _FaultInjectingChat(self, history)
+
+    def _sample_latency(self) -> float:
+        """Latencia de una llamada normal según la distribución configurada (con self._lock tomado)."""
+        if self.latency_distribution == "uniform":
+            spread = self.latency_seconds * self.latency_spread
+            return max(0.0, self._random.uniform(self.latency_seconds - spread, self.latency_seconds + spread))
+        if self.latency_distribution == "lognormal" and self.latency_seconds > 0:
+            return self._random.lognormvariate(math.log(self.latency_seconds), self.latency_spread)
+        return self.latency_seconds
+
+    def respond(self, content: str, stream: bool = False) -> _Response:
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            latency = self._sample_latency()
+        if roll < self.error_rate:
+            time.sleep(latency)
+            with self._lock:
+                self.failures += 1
+            raise UpstreamUnavailable("Servicio no disponible (fallo simulado).")
+        roll -= self.error_rate
+        if roll < self.hang_rate:
+            delay = self.hang_seconds
+        elif roll - self.hang_rate < self.slow_rate:
+            delay = self.slow_seconds
+        else:
+            delay = latency
+        question = content.rsplit("Pregunta: ", 1)[-1]
+        text = f"Respuesta simulada de IngeChat 360° a: {question}"
+        if len(text) < self.response_chars:
+            text = (text * (self.response_chars // len(text) + 1))[:self.response_chars]
+        size = -(-len(text) // self.chunks)
+        parts = [text[i:i + size] for i in range(0, len(text), size)]
+        if stream and self.chunk_rate:
+            time.sleep(delay)
+            return _Response(parts, 1 / self.chunk_rate)
+        if stream:
+            # La latencia se reparte entre el primer fragmento y los siguientes
+            time.sleep(delay / self.chunks)
+            return _Response(parts, delay / self.chunks)
+        time.sleep(delay)
+        return _Response(parts)
+
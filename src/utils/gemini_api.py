@@ -1,21 +1,48 @@
 # src/utils/gemini_api.py
-import google.generativeai as genai
-from src.utils.config import GEMINI_API_KEY
+from src.utils.config import (GEMINI_API_KEY, RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES,
+                              RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_SECONDS, SESSION_MAX_COUNT,
+                              SESSION_IDLE_TIMEOUT_SECONDS, SESSION_MAX_HISTORY_TOKENS,
+                              GEMINI_COALESCE_WAIT_SECONDS, LLM_BACKEND)
+from src.utils.llm_backend import check_backend, create_backend
+from src.utils.response_cache import ResponseCache, normalize_cache_key
+from src.utils.session_manager import SessionManager, ChatSessionState, DEFAULT_SESSION_ID, estimate_tokens
+from src.utils.token_metrics import TokenMetrics, TokenUsage
+from src.utils.logger import SampledLogger, Truncated
+from src.utils.resilience import CircuitOpenError, ResilientCaller
+from src.utils.single_flight import SingleFlight
+from src.utils.tracing import NULL_TRACE, Trace
+from typing import Iterator, NamedTuple
 import logging
+import threading
+import time
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Eventos de cada petición: se escribe uno de cada LOG_SAMPLE_EVERY
+sampled_logger = SampledLogger(logger)
+
+ERROR_MESSAGE = "Lo siento, tuve un problema al procesar tu solicitud. Por favor, inténtalo de nuevo más tarde."
+# Encabezado de la respuesta con datos locales cuando Gemini no está disponible
+FALLBACK_HEADER = ("En este momento no puedo consultar a Gemini, pero esto es lo que encontré en la "
+                   "información de la UNEFA:")
+
+class StreamTiming(NamedTuple):
+    """Tiempos de una respuesta en streaming, en segundos (en trace.attributes["stream_timing"])."""
+    time_to_first_chunk: float
+    total_time: float
+    chunks: int
 
 class GeminiAPI:
-    def __init__(self, api_key: str):
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY no está configurada. Asegúrate de tenerla en tu archivo .env")
-        genai.configure(api_key=api_key)
-        # CORRECCIÓN AQUÍ: Cambiado 'gemini-pro' por 'gemini-1.5-flash'
-        # Basado en la lista de modelos disponibles que proporcionaste.
-        self.model = genai.GenerativeModel('gemini-1.5-flash') 
-
-        self.chat_history = [] # Para mantener el contexto de la conversación
+    def __init__(self, api_key: str | None, response_cache: ResponseCache | None = None,
+                 session_manager: SessionManager | None = None, caller: ResilientCaller | None = None,
+                 single_flight: SingleFlight | None = None, backend: str = LLM_BACKEND,
+                 backend_options: dict | None = None):
+        # Con el backend "fake" no hace falta clave; 'backend_options' ajusta su latencia, sus
+        # errores, etc. (src/utils/llm_backend.py)
+        check_backend(backend, api_key)
+        self._api_key = api_key
+        self.backend = backend
+        self.backend_options = backend_options
+
         self.system_instruction = (
             "Eres IngeChat 360°, un asistente virtual especializado en proporcionar información "
             "precisa y detallada sobre las carreras de Ingeniería (Sistemas, Mecánica, "
@@ -24,31 +51,307 @@ class GeminiAPI:
             "relacionadas exclusivamente con estas carreras. "
             "Si la pregunta no está directamente relacionada con las carreras de ingeniería de la UNEFA, "
             "responde amablemente que tu función es específica y no puedes asistir con ese tema. "
-            "Proporciona respuestas concisas pero informativas, y si es posible, sugiere dónde encontrar más detalles."
+            "Proporciona respuestas concisas pero informativas, y si es posible, sugiere dónde encontrar más detalles. "
+            "Si el mensaje incluye información de referencia de la UNEFA, básate en ella y no inventes datos "
+            "que no aparezcan allí."
         )
-        self.start_new_chat() # Inicializar la conversación
+        self.system_tokens = estimate_tokens(self.system_instruction)
+        # El SDK de Gemini tarda casi un segundo en importarse: el modelo (el backend) se crea en la primera
+        # consulta que lo necesite (o antes, con warm_up() desde un hilo en segundo plano).
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.token_metrics = TokenMetrics()
+        if response_cache is None:
+            response_cache = ResponseCache(max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                                           max_bytes=RESPONSE_CACHE_MAX_BYTES,
+                                           ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+                                           db_path=RESPONSE_CACHE_PATH or None)
+        self.response_cache = response_cache
+        # Historial de cada conversación (se crean al usarse por primera vez)
+        self.sessions = session_manager or SessionManager(max_sessions=SESSION_MAX_COUNT,
+                                                          idle_timeout_seconds=SESSION_IDLE_TIMEOUT_SECONDS,
+                                                          max_history_tokens=SESSION_MAX_HISTORY_TOKENS)
+        # Plazos, reintentos, hedging y circuit breaker de las llamadas al modelo
+        self.caller = caller or ResilientCaller()
+        # Las preguntas idénticas sin historial que llegan a la vez comparten una llamada (None: no se agrupan)
+        if single_flight is None and GEMINI_COALESCE_WAIT_SECONDS > 0:
+            single_flight = SingleFlight(wait_timeout=GEMINI_COALESCE_WAIT_SECONDS)
+        self.single_flight = single_flight
+
+    @property
+    def model(self):
+        """Modelo del backend configurado; se crea (y el SDK se importa) la primera vez que se usa."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = create_backend(self.backend, self._api_key, self.system_instruction,
+                                                 self.backend_options)
+                    logger.info(f"Cliente de {self.backend} inicializado en "
+                                f"{(time.perf_counter() - start) * 1000:.0f} ms.")
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        # Permite sustituir el modelo (p. ej. por uno local en los benchmarks)
+        self._model = model
+
+    def warm_up(self):
+        """Importa el SDK y crea el modelo por adelantado, para que la primera consulta no lo pague."""
+        _ = self.model
+
+    def start_new_chat(self, session_id: str = DEFAULT_SESSION_ID):
+        """Reinicia la conversación de una sesión: borra su historial y sus respuestas en caché."""
+        self.sessions.reset(session_id)
+        self.response_cache.invalidate_session(session_id)
+        logger.info(f"Nueva sesión de chat iniciada con Gemini ({session_id}).")
+
+    def clear_response_cache(self):
+        """Descarta todas las respuestas en caché (p. ej. porque cambiaron los datos locales que las fundamentan)."""
+        self.response_cache.clear()
+        logger.info("Caché de respuestas de Gemini vaciada.")
+
+    def _cache_context(self, session: ChatSessionState) -> str:
+        """Contexto de la sesión para la clave de la caché (vacío si aún no hay historial)."""
+        return f"{session.session_id}:{session.digest}" if session.digest else ""
+
+    def _get_cached_response(self, session: ChatSessionState, user_message: str, context: str) -> str | None:
+        """Busca la respuesta en la caché y, si existe, la añade al historial de la sesión."""
+        cached_response = self.response_cache.get(user_message, context)
+        if cached_response is None:
+            return None
+        sampled_logger.info("Respuesta obtenida de la caché de Gemini.")
+        # Mantener el historial coherente aunque no se haya llamado al modelo
+        self.sessions.record_turn(session, user_message, cached_response)
+        return cached_response
+
+    @staticmethod
+    def _build_prompt(user_message: str, local_context: str) -> str:
+        """Mensaje que se envía al modelo: la pregunta, precedida de los datos locales relevantes si los hay."""
+        if not local_context:
+            return user_message
+        return f"Información de referencia de la UNEFA:\n{local_context}\n\nPregunta: {user_message}"
+
+    def _flight_key(self, user_message: str, local_context: str, context: str) -> tuple[str, str] | None:
+        """
+        Clave para agrupar la petición con otras idénticas en curso, o None si no se agrupa: solo
+        las preguntas sin historial (cuya respuesta no depende de la sesión) se comparten.
+        """
+        if self.single_flight is None or context:
+            return None
+        return normalize_cache_key(user_message), local_context
+
+    @staticmethod
+    def _response_text(response) -> str:
+        return "".join(part.text for part in response.parts if hasattr(part, 'text'))
+
+    @staticmethod
+    def _fallback_response(local_context: str) -> str:
+        """Respuesta cuando Gemini falla o el circuito está abierto: los datos locales más relevantes, si los hay."""
+        if local_context:
+            return f"{FALLBACK_HEADER}\n{local_context}"
+        return ERROR_MESSAGE
+
+    def _record_token_usage(self, session: ChatSessionState, user_message: str, local_context: str,
+                            response_text: str, response) -> TokenUsage:
+        """Registra los tokens de una petición; usa usage_metadata de Gemini si está disponible."""
+        prompt_tokens = estimate_tokens(user_message)
+        context_tokens = estimate_tokens(local_context) if local_context else 0
+        input_tokens = self.system_tokens + session.history_tokens + prompt_tokens + context_tokens
+        output_tokens = estimate_tokens(response_text)
+        usage_metadata = getattr(response, "usage_metadata", None)
+        if usage_metadata is not None:
+            input_tokens = getattr(usage_metadata, "prompt_token_count", 0) or input_tokens
+            output_tokens = getattr(usage_metadata, "candidates_token_count", 0) or output_tokens
+        usage = TokenUsage(prompt_tokens, context_tokens, session.history_tokens, self.system_tokens,
+                           input_tokens, output_tokens)
+        self.token_metrics.record(usage)
+        sampled_logger.info("Tokens: entrada %d (historial %d, mensaje %d, contexto %d), salida %d.",
+                            input_tokens, usage.history_tokens, prompt_tokens, context_tokens, output_tokens)
+        return usage
+
+    def send_message(self, user_message: str, use_cache: bool = True,
+                     session_id: str = DEFAULT_SESSION_ID, local_context: str = "",
+                     trace: Trace | None = None) -> str:
+        """
+        Envía un mensaje al modelo Gemini en el contexto de una sesión y obtiene una respuesta.
+        Si use_cache es True, se reutilizan respuestas previas a la misma pregunta en el mismo contexto.
+        'local_context' (fragmentos de los datos locales) acompaña solo a esta petición; en el
+        historial se guarda la pregunta sin él. En 'trace' quedan los tramos de caché y de red.
+        Una pregunta sin historial idéntica a otra que ya se está consultando espera su respuesta
+        en lugar de repetir la llamada.
+        """
+        trace = trace or NULL_TRACE
+        session = self.sessions.get(session_id)
+        with session.lock:
+            context = self._cache_context(session)
+            if use_cache:
+                with trace.span("cache_lookup"):
+                    cached_response = self._get_cached_response(session, user_message, context)
+                if cached_response is not None:
+                    trace.annotate(source="cache")
+                    return cached_response
+
+            # Cada intento (y su posible duplicado) abre su propio chat con una copia del historial
+            history = list(session.history)
+            prompt = self._build_prompt(user_message, local_context)
+
+            def generate() -> tuple[str, object]:
+                response = self.caller.call(lambda: self.model.start_chat(history=history).send_message(prompt),
+                                            trace)
+                return self._response_text(response), response
+
+            flight_key = self._flight_key(user_message, local_context, context)
+            try:
+                with trace.span("gemini_network"):
+                    if flight_key is None:
+                        (response_text, response), shared = generate(), False
+                    else:
+                        (response_text, response), shared = self.single_flight.do(flight_key, generate)
+
+                if shared:
+                    # Otra petición idéntica hizo la llamada y ya guardó la respuesta y sus tokens
+                    sampled_logger.info("Respuesta compartida con una consulta idéntica en curso.")
+                    trace.annotate(source="gemini", coalesced=True)
+                    self.sessions.record_turn(session, user_message, response_text)
+                    return response_text
+                trace.annotate(source="gemini")
+                
+                # Los textos completos solo en DEBUG, recortados y formateados en el hilo de escritura
+                logger.debug("Usuario: %s | Gemini: %s", Truncated(user_message), Truncated(response_text))
+                if use_cache and response_text:
+                    self.response_cache.put(user_message, response_text, context, session_id)
+                self._record_token_usage(session, user_message, local_context, response_text, response)
+                self.sessions.record_turn(session, user_message, response_text)
+                return response_text
+            except CircuitOpenError as e:
+                sampled_logger.info("Circuito de Gemini abierto: se responde con los datos locales.")
+                trace.annotate(source="fallback" if local_context else "error", error=type(e).__name__)
+                return self._fallback_response(local_context)
+            except Exception as e:
+                logger.error(f"Error al comunicarse con Gemini: {e}")
+                trace.annotate(source="fallback" if local_context else "error", error=type(e).__name__)
+                return self._fallback_response(local_context)
+
+    def send_message_stream(self, user_message: str, use_cache: bool = True,
+                            session_id: str = DEFAULT_SESSION_ID, local_context: str = "",
+                            trace: Trace | None = None) -> Iterator[str]:
+        """
+        Envía un mensaje al modelo Gemini y devuelve los fragmentos de la respuesta a medida que llegan.
+        Al terminar, los tiempos de la respuesta quedan en 'trace': el atributo stream_timing
+        (StreamTiming como diccionario) y los tramos gemini_first_chunk y gemini_network, así cada
+        llamada tiene los suyos aunque haya varias a la vez. Si una pregunta idéntica sin historial
+        ya se está consultando, su respuesta se entrega completa en un solo fragmento.
+        El candado de la sesión solo se toma para leer su estado y para registrar el turno, nunca
+        mientras se entrega un fragmento: un consumidor que abandona el generador sin cerrarlo no
+        deja la sesión bloqueada. Otro mensaje de la misma sesión enviado durante la respuesta
+        parte del historial sin el turno en curso.
+        """
+        trace = trace or NULL_TRACE
+        session = self.sessions.get(session_id)
+        cached_response = None
+        flight_key, flight, leader = None, None, True
+        with session.lock:
+            context = self._cache_context(session)
+            if use_cache:
+                with trace.span("cache_lookup"):
+                    cached_response = self._get_cached_response(session, user_message, context)
+            if cached_response is None:
+                history = list(session.history)
+                prompt = self._build_prompt(user_message, local_context)
+                flight_key = self._flight_key(user_message, local_context, context)
+                if flight_key is not None:
+                    flight, leader = self.single_flight.join(flight_key)
+
+        if cached_response is not None:
+            trace.annotate(source="cache")
+            yield cached_response
+            return
+        if not leader:
+            # Otra petición idéntica ya está consultando a Gemini: su respuesta llega completa
+            yield self._wait_shared(session, user_message, local_context, flight, trace)
+            return
+        try:
+            yield from self._stream_response(session, user_message, use_cache, local_context, context,
+                                             history, prompt, flight_key, flight, trace)
+        finally:
+            if flight is not None and not flight.done:
+                # El consumidor abandonó la respuesta antes de que terminara
+                self.single_flight.resolve(flight_key, flight,
+                                           error=RuntimeError("La respuesta compartida se interrumpió."))
+
+    def _wait_shared(self, session: ChatSessionState, user_message: str, local_context: str, flight,
+                     trace: Trace) -> str:
+        """Espera la respuesta de una petición idéntica en curso y la añade al historial de la sesión."""
+        try:
+            with trace.span("gemini_network"):
+                response_text, _response = self.single_flight.wait(flight)
+        except Exception as e:
+            logger.error(f"Error en la consulta compartida a Gemini: {e}")
+            trace.annotate(source="fallback" if local_context else "error", error=type(e).__name__)
+            return self._fallback_response(local_context)
+        sampled_logger.info("Respuesta compartida con una consulta idéntica en curso.")
+        trace.annotate(source="gemini", coalesced=True)
+        with session.lock:
+            self.sessions.record_turn(session, user_message, response_text)
+        return response_text
+
+    def _stream_response(self, session: ChatSessionState, user_message: str, use_cache: bool, local_context: str,
+                         context: str, history: list, prompt: str, flight_key, flight,
+                         trace: Trace) -> Iterator[str]:
+        """Hace la llamada en streaming y, si otras peticiones idénticas la esperan, les publica el resultado."""
+        responses = []
 
-    def start_new_chat(self):
-        """Inicia una nueva sesión de chat con la instrucción del sistema."""
-        self.chat_session = self.model.start_chat(history=[])
-        logger.info("Nueva sesión de chat iniciada con Gemini.")
+        def open_stream():
+            response = self.model.start_chat(history=history).send_message(prompt, stream=True)
+            responses.append(response)
+            return response
 
-    def send_message(self, user_message: str) -> str:
-        """Envía un mensaje al modelo Gemini y obtiene una respuesta."""
+        start = time.perf_counter()
+        first_chunk_time = None
+        chunks = []
         try:
-            prompt = f"{self.system_instruction}\n\nUsuario: {user_message}"
-            
-            response = self.chat_session.send_message(prompt)
-            
-            response_text = ""
-            for part in response.parts:
-                if hasattr(part, 'text'):
-                    response_text += part.text
-            
-            logger.info(f"Usuario: {user_message}")
-            logger.info(f"Gemini: {response_text}")
-            return response_text
+            for chunk in self.caller.stream(open_stream, trace):
+                text = self._response_text(chunk)
+                if not text:
+                    continue
+                if first_chunk_time is None:
+                    first_chunk_time = time.perf_counter()
+                    trace.add_span("gemini_first_chunk", start, first_chunk_time)
+                chunks.append(text)
+                yield text
         except Exception as e:
-            logger.error(f"Error al comunicarse con Gemini: {e}")
-            return "Lo siento, tuve un problema al procesar tu solicitud. Por favor, inténtalo de nuevo más tarde."
+            # El turno incompleto no se guarda en el historial de la sesión
+            if flight is not None:
+                self.single_flight.resolve(flight_key, flight, error=e)
+            if isinstance(e, CircuitOpenError):
+                sampled_logger.info("Circuito de Gemini abierto: se responde con los datos locales.")
+            else:
+                logger.error(f"Error al comunicarse con Gemini (streaming): {e}")
+            trace.add_span("gemini_network", start, time.perf_counter())
+            if chunks:
+                trace.annotate(source="error", error=type(e).__name__)
+                yield f"\n\n{ERROR_MESSAGE}"
+            else:
+                trace.annotate(source="fallback" if local_context else "error", error=type(e).__name__)
+                yield self._fallback_response(local_context)
+            return
 
+        end = time.perf_counter()
+        total_time = end - start
+        # Incluye el tiempo que el consumidor tarda entre fragmento y fragmento
+        trace.add_span("gemini_network", start, end)
+        time_to_first_chunk = (first_chunk_time or time.perf_counter()) - start
+        trace.annotate(source="gemini",
+                       stream_timing=StreamTiming(time_to_first_chunk, total_time, len(chunks))._asdict())
+        response_text = "".join(chunks)
+        logger.debug("Usuario: %s | Gemini: %s", Truncated(user_message), Truncated(response_text))
+        sampled_logger.info("Streaming: primer fragmento en %.0f ms, respuesta completa en %.0f ms "
+                            "(%d fragmentos).", time_to_first_chunk * 1000, total_time * 1000, len(chunks))
+        if use_cache and response_text:
+            self.response_cache.put(user_message, response_text, context, session.session_id)
+        if flight is not None:
+            self.single_flight.resolve(flight_key, flight, result=(response_text, responses[-1]))
+        with session.lock:
+            self._record_token_usage(session, user_message, local_context, response_text, responses[-1])
+            self.sessions.record_turn(session, user_message, response_text)
@@ -0,0 +1,70 @@
+# src/utils/llm_backend.py
+"""
+Backends del modelo de lenguaje que usa GeminiAPI.
+
+Un backend es el objeto que GeminiAPI guarda en .model: start_chat(history) devuelve un chat
+cuyo send_message(content, stream=False) responde con la forma de las respuestas del SDK de
+Gemini (.parts con .text y usage_metadata; en streaming, un iterable de esas respuestas).
+GeminiAPI pone todo lo demás (caché, sesiones, plazos, reintentos y agrupación), así que
+cambiar de backend no cambia el camino de una consulta:
+- "gemini": el SDK google.generativeai, con la clave GEMINI_API_KEY;
+- "fake": FaultInjectingModel (src/utils/fake_gemini.py), local y determinista, con la latencia,
+  el ritmo de los fragmentos y la tasa de errores de las variables FAKE_LLM_* del .env; los
+  benchmarks y el servidor (--fake-llm) cambian algunos de esos valores con 'options'.
+"""
+import logging
+from typing import Any, Iterable, Protocol
+
+from src.utils.config import (FAKE_LLM_LATENCY_MS, FAKE_LLM_LATENCY_DISTRIBUTION, FAKE_LLM_LATENCY_SPREAD,
+                              FAKE_LLM_CHUNKS_PER_SECOND, FAKE_LLM_ERROR_RATE, FAKE_LLM_SEED)
+
+logger = logging.getLogger(__name__)
+
+GEMINI = "gemini"
+FAKE = "fake"
+BACKENDS = (GEMINI, FAKE)
+
+
+class LLMChat(Protocol):
+    def send_message(self, content: str, stream: bool = False) -> Any: ...
+
+
+class LLMBackend(Protocol):
+    def start_chat(self, history: Iterable[dict]) -> LLMChat: ...
+
+
+def check_backend(name: str, api_key: str | None):
+    """Lanza ValueError si el backend no existe o le falta la clave."""
+    if name not in BACKENDS:
+        raise ValueError(f"LLM_BACKEND desconocido: {name!r} (opciones: {', '.join(BACKENDS)}).")
+    if name == GEMINI and not api_key:
+        raise ValueError("GEMINI_API_KEY no está configurada. Asegúrate de tenerla en tu archivo .env "
+                         "(o usa LLM_BACKEND=fake para trabajar sin clave).")
+
+
+def create_backend(name: str, api_key: str | None, system_instruction: str,
+                   options: dict | None = None) -> LLMBackend:
+    """
+    Crea el backend 'name'; el SDK de Gemini solo se importa si se usa. 'options' reemplaza
+    parámetros de FaultInjectingModel (solo con el backend "fake").
+    """
+    check_backend(name, api_key)
+    if name == FAKE:
+        from src.utils.fake_gemini import FaultInjectingModel
+        settings = dict(latency_seconds=FAKE_LLM_LATENCY_MS / 1000, latency_distribution=FAKE_LLM_LATENCY_DISTRIBUTION,
+                        latency_spread=FAKE_LLM_LATENCY_SPREAD, chunk_rate=FAKE_LLM_CHUNKS_PER_SECOND or None,
+                        error_rate=FAKE_LLM_ERROR_RATE, seed=FAKE_LLM_SEED)
+        settings.update(options or {})
+        logger.info(f"Usando el backend local 'fake' (latencia {settings['latency_seconds'] * 1000:.0f} ms, "
+                    f"{settings['latency_distribution']}, errores {settings['error_rate']:.0%}).")
+        return FaultInjectingModel(**settings)
+    if options:
+        raise ValueError(f"El backend {name!r} no admite opciones: {', '.join(options)}.")
+
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    # CORRECCIÓN AQUÍ: Cambiado 'gemini-pro' por 'gemini-1.5-flash'
+    # Basado en la lista de modelos disponibles que proporcionaste.
+    # La instrucción del sistema se configura una sola vez en el modelo, en lugar de
+    # anteponerla a cada mensaje (y guardarla repetida en el historial).
+    return genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_instruction)
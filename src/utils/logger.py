@@ -0,0 +1,206 @@
+# src/utils/logger.py
+"""
+Registro (logging) asíncrono de la aplicación.
+
+setup_logging() configura una sola vez el logger raíz con un AsyncQueueHandler: el hilo que
+registra solo encola el LogRecord, sin formatearlo ni escribirlo, y un hilo de escritura
+vacía la cola cada FLUSH_INTERVAL_SECONDS, formatea los registros y los escribe en la consola
+y en un archivo rotativo. Encolar no despierta a ese hilo, así que quien registra no paga
+cambios de hilo por cada registro. Si la cola se llena, los registros se descartan en lugar
+de bloquear.
+
+Los eventos que se repiten en cada petición se registran con SampledLogger, que escribe uno
+de cada LOG_SAMPLE_EVERY por plantilla del mensaje (deben usar argumentos con %s en lugar de
+f-strings) y descarta los demás antes de crear el LogRecord. Los textos largos (mensajes del
+usuario, respuestas de Gemini) se pasan envueltos en Truncated, que los recorta al
+formatearlos, ya en el hilo de escritura.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import NamedTuple
+
+from src.utils.config import (LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_PAYLOAD_MAX_CHARS,
+                              LOG_SAMPLE_EVERY, LOG_QUEUE_SIZE)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+# Cada cuánto el hilo de escritura vacía la cola
+FLUSH_INTERVAL_SECONDS = 0.2
+
+_sample_every = max(1, LOG_SAMPLE_EVERY)
+_sampled_out = 0
+
+
+class Truncated:
+    """Texto que se recorta a 'limit' caracteres cuando (y solo si) se formatea el registro."""
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text: str, limit: int | None = None):
+        self.text = text
+        self.limit = LOG_PAYLOAD_MAX_CHARS if limit is None else limit
+
+    def __str__(self) -> str:
+        text = str(self.text)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}… (+{len(text) - self.limit} caracteres)"
+
+
+class LoggingStats(NamedTuple):
+    enqueued: int      # Registros entregados al hilo de escritura
+    sampled_out: int   # Descartados por muestreo
+    dropped: int       # Descartados porque la cola estaba llena
+    pending: int       # En la cola, aún sin escribir
+
+
+class SampledLogger:
+    """
+    Logger para eventos que se repiten en cada petición: de cada plantilla de mensaje solo se
+    registra una de cada LOG_SAMPLE_EVERY veces; las demás no llegan a crear el LogRecord.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        # Sin candado: una carrera entre hilos solo cambia qué evento concreto se escribe
+        self._counts: dict[str, int] = {}
+
+    def _keep(self, level: int, msg: str) -> bool:
+        global _sampled_out
+        if not self.logger.isEnabledFor(level):
+            return False
+        count = self._counts.get(msg, 0)
+        self._counts[msg] = count + 1
+        if count % _sample_every == 0:
+            return True
+        _sampled_out += 1
+        return False
+
+    def debug(self, msg: str, *args):
+        if self._keep(logging.DEBUG, msg):
+            self.logger.debug(msg, *args)
+
+    def info(self, msg: str, *args):
+        if self._keep(logging.INFO, msg):
+            self.logger.info(msg, *args)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """QueueHandler que no formatea en el hilo que registra y que nunca se bloquea."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # El hilo de escritura está en el mismo proceso: el registro viaja tal cual y se formatea allí
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+        self.enqueued += 1
+
+
+class BackgroundWriter(threading.Thread):
+    """Hilo que vacía la cola periódicamente y entrega los registros a las salidas (consola, archivo)."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, outputs: list[logging.Handler],
+                 interval: float = FLUSH_INTERVAL_SECONDS):
+        super().__init__(name="logging-writer", daemon=True)
+        self.queue = log_queue
+        self.outputs = outputs
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            for output in self.outputs:
+                if record.levelno >= output.level:
+                    output.handle(record)
+
+    def stop(self):
+        """Escribe lo pendiente y termina."""
+        self._stopped.set()
+        self.join()
+
+
+def set_sampling(every: int):
+    """Cambia cada cuántos eventos de SampledLogger se escribe uno (1 los escribe todos)."""
+    global _sample_every
+    _sample_every = max(1, every)
+
+
+_lock = threading.Lock()
+_handler: AsyncQueueHandler | None = None
+_writer: BackgroundWriter | None = None
+
+
+def setup_logging(level: str = LOG_LEVEL, log_file: str = LOG_FILE, console: bool = True,
+                  sample_every: int = LOG_SAMPLE_EVERY, queue_size: int = LOG_QUEUE_SIZE):
+    """
+    Configura el logger raíz con la cola y arranca el hilo de escritura (solo la primera vez).
+    'log_file' vacío desactiva el archivo; al salir del proceso se escriben los registros pendientes.
+    """
+    global _handler, _writer
+    with _lock:
+        if _handler is not None:
+            return
+        set_sampling(sample_every)
+        # El formato no usa el hilo ni el proceso: no hace falta obtenerlos al crear cada LogRecord
+        logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+        formatter = logging.Formatter(LOG_FORMAT)
+        outputs = []
+        if console:
+            outputs.append(logging.StreamHandler())
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            outputs.append(RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                               encoding="utf-8", delay=True))
+        for output in outputs:
+            output.setFormatter(formatter)
+
+        _handler = AsyncQueueHandler(queue.SimpleQueue(), queue_size)
+        _writer = BackgroundWriter(_handler.queue, outputs)
+        _writer.start()
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_handler)
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Quita el handler, escribe lo que quede en la cola y cierra los archivos."""
+    global _handler, _writer
+    with _lock:
+        if _handler is None:
+            return
+        logging.getLogger().removeHandler(_handler)
+        _writer.stop()
+        for output in _writer.outputs:
+            output.close()
+        _handler = _writer = None
+
+
+def logging_stats() -> LoggingStats:
+    """Contadores del registro asíncrono (ceros si no está configurado)."""
+    handler = _handler
+    if handler is None:
+        return LoggingStats(0, _sampled_out, 0, 0)
+    return LoggingStats(handler.enqueued, _sampled_out, handler.dropped, handler.queue.qsize())
@@ -0,0 +1,365 @@
+# src/utils/resilience.py
+"""
+Capa de resiliencia para las llamadas a Gemini.
+
+ResilientCaller ejecuta cada llamada al SDK (bloqueante y sin plazo propio) en un grupo de
+hilos acotado y la espera solo hasta su plazo: si se vence, quien la pidió queda libre aunque
+la llamada siga en curso. Cada intento tiene su propio plazo, más corto que el total; los
+errores transitorios (429, 5xx, red, intento vencido) se reintentan con espera exponencial y
+variación aleatoria mientras quede tiempo del plazo total. Opcionalmente, si una
+llamada tarda más que el percentil configurado de las latencias recientes, se lanza un
+duplicado y se usa la primera respuesta (hedging). Un CircuitBreaker corta las llamadas tras
+varios fallos seguidos, para responder al instante mientras Gemini no se recupera.
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Iterator, NamedTuple, TypeVar
+
+from src.utils.config import (GEMINI_TIMEOUT_SECONDS, GEMINI_ATTEMPT_TIMEOUT_SECONDS, GEMINI_MAX_RETRIES, GEMINI_RETRY_BASE_SECONDS,
+                              GEMINI_RETRY_MAX_SECONDS, GEMINI_HEDGE_PERCENTILE, GEMINI_BREAKER_FAILURES,
+                              GEMINI_BREAKER_RESET_SECONDS, GEMINI_MAX_CONCURRENCY)
+from src.utils.tracing import NULL_TRACE, Trace
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Códigos HTTP y nombres de excepciones de google.api_core que indican un fallo transitorio
+_RETRYABLE_CODES = frozenset({408, 429, 500, 502, 503, 504})
+_RETRYABLE_NAMES = frozenset({"ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "InternalServerError",
+                              "DeadlineExceeded", "GatewayTimeout", "BadGateway", "RetryError"})
+
+# Estados del CircuitBreaker
+CLOSED = "cerrado"
+OPEN = "abierto"
+HALF_OPEN = "semiabierto"
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se llama a Gemini hasta que pase el tiempo de espera."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """La llamada (con sus reintentos) no terminó dentro de su plazo."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Indica si vale la pena repetir la llamada que produjo 'error'."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if type(error).__name__ in _RETRYABLE_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in _RETRYABLE_CODES
+
+
+class CircuitBreaker:
+    """
+    Tras 'failure_threshold' fallos seguidos el circuito se abre y rechaza las llamadas durante
+    'reset_timeout' segundos; después deja pasar una sola llamada de prueba (semiabierto), que
+    lo vuelve a cerrar si sale bien o lo abre otra vez si falla. Un umbral de 0 lo desactiva.
+    """
+
+    def __init__(self, failure_threshold: int = GEMINI_BREAKER_FAILURES,
+                 reset_timeout: float = GEMINI_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Indica si se puede llamar ahora (en semiabierto, solo a la llamada de prueba)."""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuito de Gemini cerrado: la llamada de prueba respondió.")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuito de Gemini abierto tras {self.consecutive_failures} fallos seguidos; "
+                                   f"se reintentará en {self.reset_timeout:.0f} s.")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class LatencyWindow:
+    """Latencias de las últimas llamadas correctas, para calcular cuándo conviene duplicar una llamada."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+        self._cached: dict[float, float] = {}
+        self._added_since_cache = 0
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+        self._added_since_cache += 1
+
+    def percentile(self, fraction: float) -> float | None:
+        """Percentil de las latencias recientes (None si aún hay pocas). Se recalcula cada 10 muestras."""
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._added_since_cache >= 10 or fraction not in self._cached:
+            ordered = sorted(self._samples)
+            self._cached[fraction] = ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+            self._added_since_cache = 0
+        return self._cached[fraction]
+
+
+class _DaemonPool:
+    """
+    Grupo de hilos daemon que se crean a medida que hacen falta, hasta 'max_workers'. A diferencia
+    de ThreadPoolExecutor, una llamada colgada no impide que el proceso termine.
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self._tasks: queue.SimpleQueue = queue.SimpleQueue()
+        self._workers = 0
+        # Hilos esperando una tarea y tareas encoladas que aún no tomó ninguno: los hilos libres
+        # para una tarea nueva son la diferencia
+        self._waiting = 0
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    @property
+    def idle(self) -> int:
+        """Hilos que empezarían ya una tarea nueva."""
+        with self._lock:
+            return max(0, self._waiting - self._queued)
+
+    def submit(self, function: Callable, *args, only_if_idle: bool = False) -> Future | None:
+        """
+        Encola la tarea. Con only_if_idle, solo si hay un hilo libre (o se puede crear) para
+        empezarla ya; si no, devuelve None sin encolarla.
+        """
+        future = Future()
+        with self._lock:
+            if self._waiting <= self._queued:
+                if self._workers < self.max_workers:
+                    self._workers += 1
+                    threading.Thread(target=self._work, name=f"{self.name}-{self._workers}", daemon=True).start()
+                elif only_if_idle:
+                    return None
+            # La tarea cuenta como encolada hasta que un hilo la toma, así que ocupa un hilo libre
+            self._queued += 1
+            self._tasks.put((future, function, args))
+        return future
+
+    def _work(self):
+        while True:
+            with self._lock:
+                self._waiting += 1
+            future, function, args = self._tasks.get()
+            with self._lock:
+                self._waiting -= 1
+                self._queued -= 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+
+class ResilienceStats(NamedTuple):
+    calls: int
+    retries: int
+    hedges: int            # Duplicados lanzados
+    hedge_wins: int        # Veces que respondió antes el duplicado
+    timeouts: int
+    failures: int          # Llamadas que fallaron tras agotar los reintentos
+    short_circuited: int   # Rechazadas al instante con el circuito abierto
+    breaker_state: str
+    times_opened: int
+
+
+class ResilientCaller:
+    """
+    Ejecuta llamadas bloqueantes a Gemini con plazo, reintentos, hedging opcional y circuit breaker.
+    Sin plazo ni hedging, las llamadas se hacen directamente en el hilo que las pide.
+    """
+
+    def __init__(self, timeout: float | None = GEMINI_TIMEOUT_SECONDS,
+                 attempt_timeout: float | None = GEMINI_ATTEMPT_TIMEOUT_SECONDS, max_retries: int = GEMINI_MAX_RETRIES,
+                 retry_base: float = GEMINI_RETRY_BASE_SECONDS, retry_max: float = GEMINI_RETRY_MAX_SECONDS,
+                 hedge_percentile: float = GEMINI_HEDGE_PERCENTILE, breaker: CircuitBreaker | None = None,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY):
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.attempt_timeout = attempt_timeout if attempt_timeout and attempt_timeout > 0 else self.timeout
+        self.max_retries = max(0, max_retries)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyWindow()
+        self._direct = self.attempt_timeout is None and not hedge_percentile
+        # Hilos que hacen las llamadas al SDK; una llamada abandonada por su plazo sigue ocupando el suyo
+        self._executor = None if self._direct else _DaemonPool(max_concurrency, "gemini-call")
+        self._counts = dict.fromkeys(("calls", "retries", "hedges", "hedge_wins", "timeouts", "failures",
+                                      "short_circuited"), 0)
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> ResilienceStats:
+        with self._lock:
+            counts = dict(self._counts)
+        return ResilienceStats(**counts, breaker_state=self.breaker.state, times_opened=self.breaker.times_opened)
+
+    def _backoff(self, attempt: int) -> float:
+        """Espera antes del reintento 'attempt' (0, 1, ...): exponencial con variación aleatoria completa."""
+        return random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempt)))
+
+    def call(self, function: Callable[[], T], trace: Trace | None = None, hedge: bool = True) -> T:
+        """
+        Llama a 'function' respetando el circuito, el plazo y los reintentos. Lanza CircuitOpenError
+        si el circuito está abierto, DeadlineExceededError si se agota el plazo o el último error.
+        """
+        trace = trace or NULL_TRACE
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            trace.annotate(circuit=OPEN)
+            raise CircuitOpenError("El circuito de Gemini está abierto.")
+
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        attempt = 0
+        while True:
+            try:
+                result = self._attempt(function, deadline, trace, hedge)
+            except Exception as e:
+                if not (is_retryable(e) or isinstance(e, DeadlineExceededError)):
+                    # Errores de la petición (p. ej. contenido bloqueado): Gemini sí respondió
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if isinstance(e, DeadlineExceededError):
+                    self._count("timeouts")
+                delay = self._backoff(attempt)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if attempt >= self.max_retries or out_of_time or self.breaker.state == OPEN:
+                    self._count("failures")
+                    raise
+                attempt += 1
+                self._count("retries")
+                trace.annotate(retries=attempt)
+                logger.warning(f"Reintento {attempt} de la llamada a Gemini en {delay * 1000:.0f} ms "
+                               f"tras {type(e).__name__}: {e}")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _attempt(self, function: Callable[[], T], deadline: float | None, trace: Trace, hedge: bool) -> T:
+        """Un intento, con su duplicado si se pasa del percentil de latencia. Plazo vencido: DeadlineExceededError."""
+        start = time.monotonic()
+        if self._direct:
+            result = function()
+            self.latencies.add(time.monotonic() - start)
+            return result
+
+        if self.attempt_timeout is not None:
+            attempt_deadline = start + self.attempt_timeout
+            deadline = attempt_deadline if deadline is None else min(deadline, attempt_deadline)
+        futures = [self._executor.submit(function)]
+        hedge_after = self.latencies.percentile(self.hedge_percentile) if hedge and self.hedge_percentile else None
+        if hedge_after is not None:
+            done, _ = wait(futures, timeout=self._remaining(deadline, limit=hedge_after))
+            # El duplicado solo se lanza si hay un hilo libre: no debe hacer cola detrás de otras llamadas
+            hedge = None
+            if not done and (deadline is None or time.monotonic() < deadline):
+                hedge = self._executor.submit(function, only_if_idle=True)
+            if hedge is not None:
+                futures.append(hedge)
+                self._count("hedges")
+                trace.annotate(hedged=True)
+
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=self._remaining(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count("hedge_wins")
+                    self.latencies.add(time.monotonic() - start)
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceededError(f"Gemini no respondió en {time.monotonic() - start:.1f} s.")
+
+    @staticmethod
+    def _remaining(deadline: float | None, limit: float | None = None) -> float | None:
+        if deadline is None:
+            return limit
+        remaining = max(0.0, deadline - time.monotonic())
+        return remaining if limit is None else min(remaining, limit)
+
+    def stream(self, open_stream: Callable[[], Iterator[T]], trace: Trace | None = None) -> Iterator[T]:
+        """
+        Abre una respuesta en streaming con open_stream() y devuelve sus fragmentos. La apertura
+        y el primer fragmento pasan por call() (circuito, plazo y reintentos, sin duplicados); cada
+        uno de los siguientes debe llegar antes de que pase el plazo de un intento desde el anterior
+        (sin reintentos, porque ya se entregó parte de la respuesta).
+        """
+        def first():
+            iterator = iter(open_stream())
+            return iterator, next(iterator, None)
+
+        iterator, chunk = self.call(first, trace, hedge=False)
+        if chunk is None:
+            return
+        yield chunk
+        while True:
+            if self._direct:
+                chunk = next(iterator, None)
+            else:
+                future: Future = self._executor.submit(next, iterator, None)
+                done, _ = wait([future], timeout=self.attempt_timeout)
+                if not done:
+                    self._count("timeouts")
+                    self.breaker.record_failure()
+                    raise DeadlineExceededError(
+                        f"Gemini dejó de enviar fragmentos durante {self.attempt_timeout:.1f} s.")
+                chunk = future.result()
+            if chunk is None:
+                return
+            yield chunk
@@ -0,0 +1,168 @@
+# src/utils/response_cache.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from src.utils.text_normalizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class _CacheEntry(NamedTuple):
+    response: str
+    session_id: str | None  # Solo se asigna si la respuesta depende del historial de esa sesión
+    created_at: float
+    size: int
+
+
+def normalize_cache_key(message: str) -> str:
+    """Normaliza un mensaje para usarlo como clave: sin mayúsculas, tildes ni puntuación."""
+    return " ".join(tokenize(message))
+
+
+class ResponseCache:
+    """
+    Caché de respuestas de Gemini con expulsión LRU (por número de entradas y por
+    tamaño en bytes), caducidad por TTL y persistencia opcional en SQLite.
+
+    Las claves combinan el mensaje normalizado con el contexto de la sesión. Las
+    respuestas a mensajes sin historial previo ('context' vacío) se comparten entre
+    sesiones y son las únicas que se guardan en disco; las que dependen del
+    historial quedan asociadas a su sesión y se invalidan al reiniciarla.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 4 * 1024 * 1024,
+                 ttl_seconds: float = 24 * 3600, db_path: str | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        """Abre (o crea) la base SQLite y carga las entradas vigentes en memoria."""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "message TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT message, response, created_at FROM responses ORDER BY created_at"
+            ).fetchall()
+            with self._lock:
+                for message, response, created_at in rows:
+                    self._store((message, ""), _CacheEntry(response, None, created_at, self._size_of(message, response)))
+            logger.info(f"Caché de respuestas cargada desde {db_path} ({len(self._entries)} entradas).")
+        except sqlite3.Error as e:
+            logger.error(f"No se pudo abrir la caché persistente {db_path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def _size_of(message: str, response: str) -> int:
+        return len(message.encode("utf-8")) + len(response.encode("utf-8"))
+
+    def get(self, message: str, context: str = "") -> str | None:
+        """Devuelve la respuesta guardada para el mensaje y contexto, o None si no existe o caducó."""
+        key = (normalize_cache_key(message), context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry.created_at > self.ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+
+    def put(self, message: str, response: str, context: str = "", session_id: str | None = None):
+        """
+        Guarda una respuesta. Si 'context' no está vacío, la respuesta depende del
+        historial de 'session_id' y se invalidará al reiniciar esa sesión.
+        """
+        normalized = normalize_cache_key(message)
+        entry = _CacheEntry(response, session_id if context else None, time.time(),
+                            self._size_of(normalized, response))
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._store((normalized, context), entry)
+            if self._db is not None and not context:
+                self._db_execute("INSERT OR REPLACE INTO responses (message, response, created_at) VALUES (?, ?, ?)",
+                                 (normalized, response, entry.created_at))
+
+    def _store(self, key: tuple[str, str], entry: _CacheEntry):
+        """Inserta una entrada y expulsa las menos usadas recientemente si se superan los límites."""
+        if key in self._entries:
+            self._remove(key, persist=False)
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: tuple[str, str], persist: bool = True):
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.size
+        message, context = key
+        if persist and self._db is not None and not context:
+            self._db_execute("DELETE FROM responses WHERE message = ?", (message,))
+
+    def _db_execute(self, query: str, params: tuple):
+        try:
+            self._db.execute(query, params)
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error al actualizar la caché persistente: {e}")
+
+    def invalidate_session(self, session_id: str):
+        """Elimina las respuestas que dependían del historial de una sesión."""
+        with self._lock:
+            stale_keys = [key for key, entry in self._entries.items() if entry.session_id == session_id]
+            for key in stale_keys:
+                self._remove(key)
+        if stale_keys:
+            logger.info(f"Caché: {len(stale_keys)} respuestas invalidadas de la sesión {session_id}.")
+
+    def clear(self):
+        """Vacía la caché en memoria y en disco."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            if self._db is not None:
+                self._db_execute("DELETE FROM responses", ())
+
+    def stats(self) -> dict:
+        """Devuelve los contadores de uso de la caché."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
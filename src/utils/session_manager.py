@@ -0,0 +1,129 @@
+# src/utils/session_manager.py
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.logger import SampledLogger
+from src.utils.response_cache import normalize_cache_key
+
+logger = logging.getLogger(__name__)
+# Eventos de cada petición: se escribe uno de cada LOG_SAMPLE_EVERY
+sampled_logger = SampledLogger(logger)
+
+DEFAULT_SESSION_ID = "default"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens (~4 caracteres por token en español)."""
+    return max(1, len(text) // 4)
+
+
+class ChatSessionState:
+    """Historial de una conversación con Gemini y sus datos de uso."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.history: list[dict] = []  # [{"role": "user"|"model", "parts": [texto]}]
+        self.turn_tokens: list[int] = []  # Tokens estimados de cada turno (pregunta + respuesta)
+        self.history_tokens = 0
+        # Huella de las preguntas de la sesión; forma parte de la clave de la caché de respuestas
+        self.digest = ""
+        self.last_used = time.monotonic()
+        # Serializa los turnos de una misma sesión para que el historial no se mezcle
+        self.lock = threading.Lock()
+
+    @property
+    def turns(self) -> int:
+        return len(self.turn_tokens)
+
+    def add_turn(self, user_message: str, model_text: str):
+        """Añade un turno completo (pregunta y respuesta) al historial."""
+        self.history.append({"role": "user", "parts": [user_message]})
+        self.history.append({"role": "model", "parts": [model_text]})
+        tokens = estimate_tokens(user_message) + estimate_tokens(model_text)
+        self.turn_tokens.append(tokens)
+        self.history_tokens += tokens
+        turn = f"{self.digest}|{normalize_cache_key(user_message)}"
+        self.digest = hashlib.sha1(turn.encode("utf-8")).hexdigest()
+
+    def truncate(self, max_tokens: int) -> int:
+        """Descarta los turnos más antiguos hasta que el historial quepa en max_tokens. Devuelve cuántos se quitaron."""
+        removed = 0
+        while self.turn_tokens and self.history_tokens > max_tokens:
+            self.history_tokens -= self.turn_tokens.pop(0)
+            del self.history[:2]
+            removed += 1
+        return removed
+
+
+class SessionManager:
+    """
+    Asocia identificadores de sesión con su historial de chat.
+    Las sesiones se crean al usarse por primera vez, se expulsan tras un tiempo de
+    inactividad o cuando se supera el número máximo (la menos usada primero), y el
+    historial de cada una se limita a un presupuesto de tokens quitando los turnos
+    más antiguos.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_timeout_seconds: float = 1800,
+                 max_history_tokens: int = 2000):
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_history_tokens = max_history_tokens
+        self._sessions: OrderedDict[str, ChatSessionState] = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted_sessions = 0
+        self.truncated_turns = 0
+
+    def get(self, session_id: str = DEFAULT_SESSION_ID) -> ChatSessionState:
+        """Devuelve la sesión, creándola si no existe."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep > min(self.idle_timeout_seconds, 60):
+                self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSessionState(session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    oldest_id, _ = self._sessions.popitem(last=False)
+                    self.evicted_sessions += 1
+                    logger.info(f"Sesión {oldest_id} expulsada (máximo de {self.max_sessions} sesiones).")
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def _evict_idle(self, now: float):
+        self._last_sweep = now
+        idle_ids = [sid for sid, s in self._sessions.items() if now - s.last_used > self.idle_timeout_seconds]
+        for session_id in idle_ids:
+            del self._sessions[session_id]
+        if idle_ids:
+            self.evicted_sessions += len(idle_ids)
+            logger.info(f"{len(idle_ids)} sesiones inactivas expulsadas.")
+
+    def record_turn(self, session: ChatSessionState, user_message: str, model_text: str):
+        """Añade un turno a la sesión y recorta el historial si supera el presupuesto de tokens."""
+        session.add_turn(user_message, model_text)
+        removed = session.truncate(self.max_history_tokens)
+        if removed:
+            self.truncated_turns += removed
+            sampled_logger.info("Sesión %s: %d turnos antiguos descartados del historial.", session.session_id, removed)
+
+    def reset(self, session_id: str = DEFAULT_SESSION_ID):
+        """Elimina la sesión; la próxima consulta empezará con el historial vacío."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "history_tokens": sum(s.history_tokens for s in self._sessions.values()),
+                "evicted_sessions": self.evicted_sessions,
+                "truncated_turns": self.truncated_turns,
+            }
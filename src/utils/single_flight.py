@@ -0,0 +1,132 @@
+# src/utils/single_flight.py
+"""
+Agrupación de llamadas idénticas simultáneas (single-flight).
+
+Mientras hay una llamada en curso con cierta clave, las que llegan con la misma clave no la
+repiten: esperan a que termine y comparten su resultado o su error. La espera tiene un plazo
+propio; al vencerse, quien esperaba recibe DeadlineExceededError y la llamada original sigue.
+La clave se libera en cuanto la llamada termina, de modo que la siguiente con esa clave vuelve
+a ejecutarse (o la resuelve la caché, si quien la hizo guardó el resultado).
+"""
+import logging
+import threading
+from typing import Callable, Generic, Hashable, NamedTuple, TypeVar
+
+from src.utils.config import GEMINI_COALESCE_WAIT_SECONDS
+from src.utils.resilience import DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Flight(Generic[T]):
+    """Una llamada en curso; quienes la comparten esperan en wait() su resultado o su error."""
+
+    __slots__ = ("_done", "result", "error", "waiters")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> T:
+        if not self._done.wait(timeout):
+            raise DeadlineExceededError(f"La llamada compartida no terminó en {timeout:.1f} s.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlightStats(NamedTuple):
+    calls: int          # Llamadas ejecutadas (una por grupo de llamadas idénticas)
+    coalesced: int      # Llamadas que compartieron el resultado de otra en lugar de repetirla
+    shared_errors: int  # De esas, las que recibieron el error de la llamada compartida
+    wait_timeouts: int  # De esas, las que dejaron de esperar al vencerse el plazo
+    in_flight: int      # Claves con una llamada en curso
+
+
+class SingleFlight:
+    """
+    Una sola llamada en curso por clave. do() cubre el caso habitual (quien llega primero
+    ejecuta la función); join() y resolve() permiten publicar el resultado de una llamada que
+    se consume por partes, como una respuesta en streaming.
+    """
+
+    def __init__(self, wait_timeout: float | None = GEMINI_COALESCE_WAIT_SECONDS):
+        # Segundos que se espera el resultado de la llamada compartida (None: sin plazo)
+        self.wait_timeout = wait_timeout or None
+        self._flights: dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._coalesced = 0
+        self._shared_errors = 0
+        self._wait_timeouts = 0
+
+    def join(self, key: Hashable) -> tuple[Flight, bool]:
+        """
+        Devuelve la llamada en curso con esa clave y si quien llama es el que debe ejecutarla
+        (True) o solo esperarla con wait() (False). Quien la ejecuta debe llamar a resolve().
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self._coalesced += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self._calls += 1
+            return flight, True
+
+    def resolve(self, key: Hashable, flight: Flight, result=None, error: BaseException | None = None):
+        """Publica el resultado (o el error) de la llamada y libera la clave."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight._done.set()
+
+    def wait(self, flight: Flight[T]) -> T:
+        """Espera el resultado de una llamada ejecutada por otro, hasta el plazo configurado."""
+        try:
+            return flight.wait(self.wait_timeout)
+        except DeadlineExceededError:
+            if not flight.done:
+                with self._lock:
+                    self._wait_timeouts += 1
+                raise
+            with self._lock:
+                self._shared_errors += 1
+            raise
+        except BaseException:
+            with self._lock:
+                self._shared_errors += 1
+            raise
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> tuple[T, bool]:
+        """
+        Ejecuta function() o, si ya hay una llamada en curso con la misma clave, espera la suya.
+        Devuelve el resultado y si fue compartido (True) o propio (False); los errores se propagan.
+        """
+        flight, leader = self.join(key)
+        if not leader:
+            return self.wait(flight), True
+        try:
+            result = function()
+        except BaseException as e:
+            self.resolve(key, flight, error=e)
+            raise
+        self.resolve(key, flight, result=result)
+        return result, False
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(self._calls, self._coalesced, self._shared_errors, self._wait_timeouts,
+                                     len(self._flights))
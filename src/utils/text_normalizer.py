@@ -0,0 +1,168 @@
+# src/utils/text_normalizer.py
+import re
+import threading
+import unicodedata
+from typing import NamedTuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold_accents(text: str) -> str:
+    """Convierte el texto a minúsculas y elimina tildes y diacríticos ('Eléctrica' -> 'electrica')."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> list[str]:
+    """Divide un texto en tokens sin tildes y en minúsculas."""
+    return _TOKEN_RE.findall(fold_accents(text))
+
+
+# Palabras vacías del español (sin tildes) que no ayudan a distinguir un tema de otro
+STOP_WORDS = frozenset("""
+a al algo como con cual cuales cuando de del donde el ella ellas ellos en entre era es esa ese eso esta este esto
+estos estas fue ha hay la las le les lo los mas me mi mis muy no nos o para pero por que quien quienes se sea ser
+si sin sobre son su sus te tiene tu un una uno unos unas y ya yo
+""".split())
+
+
+def content_tokens(text: str) -> list[str]:
+    """Como tokenize, pero sin palabras vacías."""
+    return [token for token in tokenize(text) if token not in STOP_WORDS]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein (con transposiciones de letras vecinas) entre 'a' y 'b'.
+    Deja de calcular en cuanto supera 'limit' y entonces devuelve limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _deletes(word: str, distance: int) -> set[str]:
+    """La palabra y todas sus variantes con hasta 'distance' letras borradas."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class SpellCorrector:
+    """
+    Corrector de errores de tipeo con un índice de borrados (al estilo de SymSpell).
+    Cada palabra del vocabulario se registra bajo sus variantes con hasta max_distance letras
+    borradas; para corregir una palabra desconocida se generan sus propias variantes, se
+    buscan en el índice y solo se calcula la distancia real con esos pocos candidatos.
+    Las palabras cortas, las que tienen dígitos y las palabras vacías no se corrigen.
+    El índice se construye con la primera palabra desconocida, no al crear el corrector, para
+    que cargar los datos (en particular la instantánea binaria) no pague su costo.
+    """
+
+    MIN_LENGTH = 4
+    # Las palabras de menos de LONG_WORD letras admiten un solo error
+    LONG_WORD = 8
+    CACHE_SIZE = 4096
+
+    def __init__(self, vocabulary: dict[str, int], max_distance: int = 2):
+        # Palabra -> frecuencia (desempata entre candidatos a la misma distancia)
+        self.vocabulary = vocabulary
+        self.max_distance = max_distance
+        self._deletes: dict[str, list[str]] | None = None
+        self._build_lock = threading.Lock()
+        # Palabra desconocida -> corrección (o ella misma); se vacía al llenarse
+        self._cache: dict[str, str] = {}
+
+    def _delete_index(self) -> dict[str, list[str]]:
+        """Índice de borrados; se construye una sola vez, la primera vez que se necesita."""
+        if self._deletes is None:
+            with self._build_lock:
+                if self._deletes is None:
+                    deletes: dict[str, list[str]] = {}
+                    for word in self.vocabulary:
+                        if len(word) >= self.MIN_LENGTH and word.isalpha():
+                            for variant in _deletes(word, self._limit(word)):
+                                deletes.setdefault(variant, []).append(word)
+                    self._deletes = deletes
+        return self._deletes
+
+    def warm_up(self):
+        """Construye el índice por adelantado (p. ej. desde un hilo en segundo plano)."""
+        if self.max_distance > 0:
+            self._delete_index()
+
+    def _limit(self, word: str) -> int:
+        return min(self.max_distance, 1 if len(word) < self.LONG_WORD else 2)
+
+    def correct(self, word: str) -> str:
+        """Palabra del vocabulario más cercana a 'word' (ya sin tildes), o 'word' si no hay ninguna."""
+        if (word in self.vocabulary or self.max_distance <= 0 or len(word) < self.MIN_LENGTH
+                or word in STOP_WORDS or not word.isalpha()):
+            return word
+        cached = self._cache.get(word)
+        if cached is not None:
+            return cached
+
+        deletes = self._delete_index()
+        limit = self._limit(word)
+        best, best_key = word, None
+        seen = set()
+        for variant in _deletes(word, limit):
+            for candidate in deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    key = (distance, -self.vocabulary[candidate], candidate)
+                    if best_key is None or key < best_key:
+                        best, best_key = candidate, key
+
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[word] = best
+        return best
+
+
+class NormalizedQuery(NamedTuple):
+    """Consulta normalizada: sin tildes ni puntuación, en minúsculas y con los errores de tipeo corregidos."""
+    text: str                                   # Tokens unidos por espacios
+    tokens: tuple[str, ...]
+    corrections: tuple[tuple[str, str], ...]    # (token original, corrección)
+
+
+class QueryNormalizer:
+    """
+    Normalización común de las consultas antes de buscarlas en los datos locales (FAQs,
+    intenciones y entrenamiento): pliega tildes, quita la puntuación y corrige los errores
+    de tipeo contra el vocabulario del dominio. Las palabras vacías se conservan porque
+    forman parte de frases de intención como "que es" o "plan de estudios".
+    """
+
+    def __init__(self, vocabulary: dict[str, int], max_distance: int = 2):
+        self.corrector = SpellCorrector(vocabulary, max_distance)
+
+    def normalize(self, text: str) -> NormalizedQuery:
+        tokens = tokenize(text)
+        corrections = []
+        for i, token in enumerate(tokens):
+            corrected = self.corrector.correct(token)
+            if corrected != token:
+                corrections.append((token, corrected))
+                tokens[i] = corrected
+        return NormalizedQuery(" ".join(tokens), tuple(tokens), tuple(corrections))
@@ -0,0 +1,41 @@
+# src/utils/token_metrics.py
+import threading
+from collections import deque
+from typing import NamedTuple
+
+
+class TokenUsage(NamedTuple):
+    """Tokens de una petición a Gemini, separados por origen."""
+    prompt_tokens: int        # Mensaje actual del usuario (estimado)
+    context_tokens: int       # Datos locales añadidos al mensaje (estimado)
+    history_tokens: int       # Historial enviado junto al mensaje (estimado)
+    system_tokens: int        # Instrucción del sistema (estimado)
+    input_tokens: int         # Total de entrada; el valor de usage_metadata cuando Gemini lo informa
+    output_tokens: int        # Respuesta generada
+
+
+class TokenMetrics:
+    """Acumula el uso de tokens de las peticiones a Gemini (totales y últimas peticiones)."""
+
+    def __init__(self, recent_size: int = 100):
+        self._lock = threading.Lock()
+        self.recent: deque[TokenUsage] = deque(maxlen=recent_size)
+        self.requests = 0
+        self.totals = {field: 0 for field in TokenUsage._fields}
+
+    def record(self, usage: TokenUsage):
+        with self._lock:
+            self.requests += 1
+            self.recent.append(usage)
+            for field, value in usage._asdict().items():
+                self.totals[field] += value
+
+    def snapshot(self) -> dict:
+        """Devuelve los totales, la media de entrada por petición y la última petición."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                **{f"total_{field}": value for field, value in self.totals.items()},
+                "avg_input_tokens": self.totals["input_tokens"] / self.requests if self.requests else 0.0,
+                "last": self.recent[-1]._asdict() if self.recent else None,
+            }
@@ -0,0 +1,269 @@
+# src/utils/tracing.py
+"""
+Trazas por petición y métricas agregadas del chatbot.
+
+Cada consulta tiene una Trace con un identificador propio, los tramos (spans) que se midieron
+durante ella (búsqueda en FAQs, enrutado de intenciones, caché, red de Gemini, dibujo en la
+interfaz...) y el origen de la respuesta. Al terminar, el Tracer la suma a sus contadores por
+origen y a los histogramas de latencia (por origen y por tramo) y la entrega a los exportadores
+(p. ej. un archivo JSON lines). prometheus_text() expone las métricas en formato Prometheus.
+"""
+import atexit
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from src.utils.config import TRACE_FILE
+from src.utils.logger import FLUSH_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Orígenes de respuesta que no consultan a Gemini
+LOCAL_SOURCES = ("faq", "course", "career", "unefa", "training")
+# Límites superiores (s) de los cubos de los histogramas de latencia
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075,
+                   0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, 30.0)
+
+
+class Span(NamedTuple):
+    name: str
+    start_ms: float     # Desde el inicio de la traza
+    duration_ms: float
+
+
+class Trace:
+    """Traza de una petición. La cierra quien la creó, con finish()."""
+
+    def __init__(self, tracer: "Tracer | None", name: str, **attributes):
+        self.tracer = tracer
+        self.trace_id = secrets.token_hex(8)
+        self.name = name
+        self.attributes = dict(attributes)
+        self.spans: list[Span] = []
+        self.started_at = time.time()
+        self.duration_ms: float | None = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str):
+        """Mide el bloque como un tramo de la traza."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter())
+
+    def add_span(self, name: str, start: float, end: float):
+        """Añade un tramo medido fuera de span() (instantes de time.perf_counter)."""
+        self.spans.append(Span(name, (start - self._start) * 1000, (end - start) * 1000))
+
+    def annotate(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def source(self) -> str:
+        return self.attributes.get("source", "unknown")
+
+    def finish(self, **attributes):
+        """Cierra la traza y la registra en el Tracer (solo la primera vez)."""
+        if self.duration_ms is not None:
+            return
+        self.annotate(**attributes)
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if self.tracer is not None:
+            self.tracer.record(self)
+
+    def to_dict(self) -> dict:
+        return {"trace_id": self.trace_id, "name": self.name, "started_at": self.started_at,
+                "duration_ms": self.duration_ms, "attributes": self.attributes,
+                "spans": [span._asdict() for span in self.spans]}
+
+
+class _NullTrace(Trace):
+    """Traza que no registra nada, para quien llama sin trazar."""
+
+    def __init__(self):
+        super().__init__(None, "null")
+
+    @contextmanager
+    def span(self, name: str):
+        yield
+
+    def add_span(self, name: str, start: float, end: float):
+        pass
+
+    def annotate(self, **attributes):
+        pass
+
+    def finish(self, **attributes):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Histogram:
+    """Histograma de latencias con cubos fijos (compatible con el formato de Prometheus)."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # El último cubo es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimación del cuantil q (s), interpolando dentro del cubo."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self) -> dict:
+        return {"count": self.count, "avg_ms": self.sum / self.count * 1000 if self.count else 0.0,
+                **{f"p{int(q * 100)}_ms": self.quantile(q) * 1000 for q in (0.5, 0.95, 0.99)}}
+
+
+class JsonLinesExporter:
+    """
+    Escribe cada traza terminada como una línea JSON en un archivo. Quien termina la traza solo
+    la serializa y la encola; un hilo de escritura vacía la cola cada 'interval' segundos, como el
+    registro de src/utils/logger.py. Si la cola se llena, las trazas se descartan en lugar de bloquear.
+    """
+
+    def __init__(self, path: str, interval: float = FLUSH_INTERVAL_SECONDS, max_pending: int = 10000):
+        self.path = path
+        self.interval = interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._queue = queue.SimpleQueue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def export(self, trace: Trace):
+        if self._queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self._queue.put_nowait(json.dumps(trace.to_dict(), ensure_ascii=False))
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def close(self):
+        """Escribe las trazas pendientes y cierra el archivo."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._writer.join()
+        self._file.close()
+
+
+class Tracer:
+    """Crea las trazas y acumula contadores por origen e histogramas por origen y por tramo."""
+
+    def __init__(self, recent_size: int = 256):
+        self._lock = threading.Lock()
+        self.exporters = []
+        self.answers: dict[str, int] = {}
+        self.request_latency: dict[str, Histogram] = {}
+        self.span_latency: dict[str, Histogram] = {}
+        self.recent: deque[Trace] = deque(maxlen=recent_size)
+
+    def start_trace(self, name: str = "chat", **attributes) -> Trace:
+        return Trace(self, name, **attributes)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def observe(self, span_name: str, seconds: float):
+        """Registra la duración de una operación que no pertenece a ninguna petición (p. ej. una recarga)."""
+        with self._lock:
+            self.span_latency.setdefault(span_name, Histogram()).observe(seconds)
+
+    def record(self, trace: Trace):
+        with self._lock:
+            source = trace.source
+            self.answers[source] = self.answers.get(source, 0) + 1
+            self.request_latency.setdefault(source, Histogram()).observe(trace.duration_ms / 1000)
+            for span in trace.spans:
+                self.span_latency.setdefault(span.name, Histogram()).observe(span.duration_ms / 1000)
+            self.recent.append(trace)
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                logger.error(f"No se pudo exportar la traza {trace.trace_id}: {e}")
+
+    def snapshot(self, slowest: int = 5) -> dict:
+        """Fracción de respuestas locales, latencia por origen y por tramo, y las trazas recientes más lentas."""
+        with self._lock:
+            total = sum(self.answers.values())
+            local = sum(self.answers.get(source, 0) for source in LOCAL_SOURCES)
+            recent = sorted(self.recent, key=lambda trace: trace.duration_ms, reverse=True)[:slowest]
+            return {
+                "requests": total,
+                "answers": dict(self.answers),
+                "local_fraction": local / total if total else 0.0,
+                "latency_by_source": {source: h.summary() for source, h in self.request_latency.items()},
+                "latency_by_span": {name: h.summary() for name, h in self.span_latency.items()},
+                "slowest": [trace.to_dict() for trace in recent],
+            }
+
+    def prometheus_text(self) -> str:
+        """Métricas en el formato de texto de Prometheus."""
+        lines = ["# HELP ingechat_answers_total Respuestas por origen.", "# TYPE ingechat_answers_total counter"]
+        with self._lock:
+            for source, count in sorted(self.answers.items()):
+                lines.append(f'ingechat_answers_total{{source="{source}"}} {count}')
+            for metric, label, histograms in (
+                    ("ingechat_request_duration_seconds", "source", self.request_latency),
+                    ("ingechat_span_duration_seconds", "span", self.span_latency)):
+                lines.append(f"# TYPE {metric} histogram")
+                for value, histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Instancia única para toda la aplicación
+tracer = Tracer()
+if TRACE_FILE:
+    tracer.add_exporter(JsonLinesExporter(TRACE_FILE))